@@ -6,10 +6,22 @@ Fetches data from Neon database and performs comprehensive NLP analysis
 import os
 import sys
 import json
+import gzip
+import array
+import argparse
 import subprocess
+import itertools
+import time
+import hashlib
+import heapq
+import zlib
+import asyncio
+import threading
 from pathlib import Path
 from collections import Counter, defaultdict
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import warnings
 
 # Suppress warnings for cleaner output
@@ -53,6 +65,7 @@ def install_package(package_name, import_name=None):
 required_packages = [
     ('pandas', 'pandas'),
     ('numpy', 'numpy'),
+    ('scipy', 'scipy'),
     ('matplotlib', 'matplotlib'),
     ('seaborn', 'seaborn'),
     ('nltk', 'nltk'),
@@ -67,6 +80,7 @@ for package, import_name in required_packages:
 # Import all required libraries
 import pandas as pd
 import numpy as np
+from scipy import sparse
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
@@ -83,6 +97,12 @@ from nltk.sentiment import SentimentIntensityAnalyzer
 import psycopg2
 import psycopg2.extras
 
+# Optional fast JSON parser (used for JSON Lines input when installed)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Download NLTK data
 print("\nDownloading NLTK resources...")
 nltk_resources = ['punkt', 'averaged_perceptron_tagger', 'wordnet', 'stopwords', 'vader_lexicon']
@@ -145,8 +165,123 @@ def get_database_url():
     
     return None
 
-def fetch_responses_from_db(survey_id=1):
-    """Fetch all responses from Neon database and convert to JSON format"""
+# One row per response with its answers aggregated into a JSON array, oldest
+# first so streamed duplicate detection keeps the original submission.
+# since (optional) limits the rows to responses submitted after it.
+RESPONSES_QUERY = """
+    SELECT 
+        r.id,
+        r.survey_id,
+        r.submitted_at,
+        json_agg(
+            json_build_object(
+                'question_id', a.question_id,
+                'answer_value', a.answer_value,
+                'answer_data', a.answer_data
+            )
+        ) as answers
+    FROM responses r
+    LEFT JOIN answers a ON r.id = a.response_id
+    WHERE r.survey_id = %(survey_id)s
+      AND (%(since)s::timestamp IS NULL OR r.submitted_at > %(since)s::timestamp)
+    GROUP BY r.id, r.survey_id, r.submitted_at
+    ORDER BY r.submitted_at, r.id
+"""
+
+# One pre-built JSONB document per response (see response_documents in database/schema.sql)
+DOCUMENTS_QUERY = """
+    SELECT 
+        response_id AS id,
+        survey_id,
+        submitted_at,
+        document
+    FROM response_documents
+    WHERE survey_id = %(survey_id)s
+      AND (%(since)s::timestamp IS NULL OR submitted_at > %(since)s::timestamp)
+    ORDER BY submitted_at, response_id
+"""
+
+def answers_to_response(answers):
+    """Convert a response's aggregated answer rows to the responses.json format"""
+    response_obj = {}
+    
+    # Process answers
+    if answers:
+        for answer in answers:
+            question_id = answer['question_id']
+            answer_value = answer['answer_value']
+            answer_data = answer['answer_data']
+            
+            # Determine which field to use
+            if answer_data:
+                # JSONB values usually arrive already decoded by psycopg2
+                if isinstance(answer_data, str):
+                    try:
+                        response_obj[question_id] = json.loads(answer_data)
+                    except json.JSONDecodeError:
+                        response_obj[question_id] = answer_data
+                else:
+                    response_obj[question_id] = answer_data
+            else:
+                # Try to parse as number if possible
+                if answer_value is not None:
+                    try:
+                        num_value = float(answer_value)
+                        if num_value == int(num_value):
+                            response_obj[question_id] = int(num_value)
+                        else:
+                            response_obj[question_id] = num_value
+                    except (ValueError, TypeError):
+                        response_obj[question_id] = answer_value
+                else:
+                    response_obj[question_id] = None
+    
+    return response_obj
+
+def document_to_response(document):
+    """Convert a response_documents document to the responses.json format"""
+    answers = [
+        {'question_id': question_id, 'answer_value': answer.get('value'), 'answer_data': answer.get('data')}
+        for question_id, answer in (document or {}).items()
+    ]
+    return answers_to_response(answers)
+
+def row_to_response(row, use_documents=False):
+    """Convert a row of RESPONSES_QUERY or DOCUMENTS_QUERY to the responses.json format"""
+    if use_documents:
+        response = document_to_response(row['document'])
+    else:
+        response = answers_to_response(row['answers'])
+    
+    submitted_at = row['submitted_at']
+    response['submitted_at'] = submitted_at.isoformat() if submitted_at is not None else None
+    response['response_id'] = row['id']
+    return response
+
+def response_key(response):
+    """Identity of a response across runs: its database id, else submission time + name
+    
+    Unlike a hash of the content, the key survives answers being added or
+    edited after the response row was written.
+    """
+    response_id = response.get('response_id')
+    if response_id is not None and not pd.isna(response_id):
+        return f"id:{int(response_id)}"
+    submitted = response.get('submitted_at') or response.get('timestamp') or ''
+    return f"at:{submitted}|{response.get('fullName') or ''}"
+
+def frame_response_keys(df):
+    """response_key of every row of a response DataFrame"""
+    columns = [col for col in ['response_id', 'submitted_at', 'timestamp', 'fullName'] if col in df.columns]
+    return [response_key(row) for row in df[columns].to_dict('records')]
+
+def fetch_responses_from_db(survey_id=1, use_documents=False, since=None):
+    """Fetch all responses from Neon database and convert to JSON format
+    
+    With use_documents=True the denormalized response_documents table is read
+    instead of joining and aggregating the answers table. With since, only
+    responses submitted after that time are fetched.
+    """
     db_url = get_database_url()
     
     if not db_url:
@@ -158,24 +293,8 @@ def fetch_responses_from_db(survey_id=1):
         cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
         
         # Fetch all responses with their answers
-        cur.execute("""
-            SELECT 
-                r.id,
-                r.survey_id,
-                r.submitted_at,
-                json_agg(
-                    json_build_object(
-                        'question_id', a.question_id,
-                        'answer_value', a.answer_value,
-                        'answer_data', a.answer_data
-                    )
-                ) as answers
-            FROM responses r
-            LEFT JOIN answers a ON r.id = a.response_id
-            WHERE r.survey_id = %s
-            GROUP BY r.id, r.survey_id, r.submitted_at
-            ORDER BY r.submitted_at DESC
-        """, (survey_id,))
+        cur.execute(DOCUMENTS_QUERY if use_documents else RESPONSES_QUERY,
+                    {'survey_id': survey_id, 'since': since})
         
         responses_data = cur.fetchall()
         cur.close()
@@ -184,54 +303,84 @@ def fetch_responses_from_db(survey_id=1):
         print(f"[OK] Fetched {len(responses_data)} responses from database")
         
         # Convert to the same JSON format as responses.json
-        responses_json = []
-        for row in responses_data:
-            response_obj = {}
-            
-            # Process answers
-            if row['answers']:
-                for answer in row['answers']:
-                    question_id = answer['question_id']
-                    answer_value = answer['answer_value']
-                    answer_data = answer['answer_data']
-                    
-                    # Determine which field to use
-                    if answer_data:
-                        try:
-                            response_obj[question_id] = json.loads(answer_data)
-                        except json.JSONDecodeError:
-                            response_obj[question_id] = answer_data
-                    else:
-                        # Try to parse as number if possible
-                        if answer_value is not None:
-                            try:
-                                num_value = float(answer_value)
-                                if num_value == int(num_value):
-                                    response_obj[question_id] = int(num_value)
-                                else:
-                                    response_obj[question_id] = num_value
-                            except (ValueError, TypeError):
-                                response_obj[question_id] = answer_value
-                        else:
-                            response_obj[question_id] = None
-            
-            responses_json.append(response_obj)
-        
-        return responses_json
+        return [row_to_response(row, use_documents) for row in responses_data]
+    
+    except Exception as e:
+        raise Exception(f"Database error: {str(e)}")
+
+def iter_responses_from_db(survey_id=1, batch_size=1000, use_documents=False, since=None):
+    """Stream responses from the database in batches using a server-side cursor
     
+    With since, only responses submitted after that time are returned.
+    """
+    db_url = get_database_url()
+    
+    if not db_url:
+        raise ValueError("No database URL found")
+    
+    try:
+        print(f"Connecting to database...")
+        conn = psycopg2.connect(db_url)
     except Exception as e:
         raise Exception(f"Database error: {str(e)}")
+    
+    try:
+        # A named cursor keeps the result set on the server; rows arrive batch_size at a time
+        cur = conn.cursor(name='rcl_responses_stream', cursor_factory=psycopg2.extras.DictCursor)
+        cur.itersize = batch_size
+        cur.execute(DOCUMENTS_QUERY if use_documents else RESPONSES_QUERY,
+                    {'survey_id': survey_id, 'since': since})
+        
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [row_to_response(row, use_documents) for row in rows]
+        
+        cur.close()
+    finally:
+        conn.close()
+
+def find_responses_file():
+    """Locate responses.json (or a JSONL / gzip export of it) for the offline fallback"""
+    possible_dirs = [
+        Path('.'),
+        Path('src/lib'),
+        Path('../src/lib'),
+        Path('../../src/lib'),
+    ]
+    file_names = ['responses.json', 'responses.jsonl', 'responses.json.gz', 'responses.jsonl.gz']
+    
+    for directory in possible_dirs:
+        for file_name in file_names:
+            p = directory / file_name
+            if p.exists():
+                return p
+    
+    raise FileNotFoundError(
+        "Could not find responses.json and database connection failed. "
+        "Please ensure DATABASE_URL is set in .env or responses.json exists."
+    )
 
-def load_data():
-    """Load data from database or fallback to JSON file"""
+def load_data(input_path=None, use_documents=False):
+    """Load data from database or fallback to JSON file
+    
+    Returns a list of response dicts from the database, or a DataFrame when
+    the responses are read from a file. With input_path the database is skipped.
+    """
     print("\n" + "=" * 80)
     print("DATA LOADING")
     print("=" * 80)
     
+    if input_path:
+        df = load_responses_file(input_path)
+        print(f"[OK] Loaded {len(df)} responses from {input_path}")
+        return df
+    
     # Try database first
     try:
         print("\nAttempting to fetch from Neon database...")
-        data = fetch_responses_from_db()
+        data = fetch_responses_from_db(use_documents=use_documents)
         print(f"[OK] Successfully loaded {len(data)} responses from database")
         return data
     except Exception as e:
@@ -239,24 +388,202 @@ def load_data():
         print("\nFalling back to responses.json file...")
         
         # Fallback to responses.json
-        possible_paths = [
-            Path('responses.json'),
-            Path('src/lib/responses.json'),
-            Path('../src/lib/responses.json'),
-            Path('../../src/lib/responses.json'),
-        ]
-        
-        for p in possible_paths:
-            if p.exists():
-                with open(p, encoding='utf-8') as f:
-                    data = json.load(f)
-                print(f"[OK] Loaded {len(data)} responses from {p}")
-                return data
-        
-        raise FileNotFoundError(
-            "Could not find responses.json and database connection failed. "
-            "Please ensure DATABASE_URL is set in .env or responses.json exists."
-        )
+        p = find_responses_file()
+        df = load_responses_file(p)
+        print(f"[OK] Loaded {len(df)} responses from {p}")
+        return df
+
+def iter_file_chunks(path, chunk_size, since=None):
+    """Yield lists of at most chunk_size responses streamed from an export file"""
+    records = iter_response_records(path)
+    if since is not None:
+        records = (record for record in records if is_after(response_time(record), since))
+    while True:
+        batch = list(itertools.islice(records, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+def iter_response_chunks(chunk_size, input_path=None, use_documents=False, since=None):
+    """Yield lists of at most chunk_size responses, from the database or the JSON fallback
+    
+    With since, only responses submitted after that time are yielded.
+    """
+    print("\n" + "=" * 80)
+    print("DATA LOADING")
+    print("=" * 80)
+    
+    if input_path:
+        print(f"\nStreaming responses from {input_path}...")
+        yield from iter_file_chunks(input_path, chunk_size, since)
+        return
+    
+    # Connection problems surface on the first batch; only then is it safe to fall back
+    try:
+        print("\nAttempting to stream from Neon database...")
+        stream = iter_responses_from_db(batch_size=chunk_size, use_documents=use_documents, since=since)
+        first_batch = next(stream, None)
+    except Exception as e:
+        print(f"[ERROR] Database fetch failed: {e}")
+        print("\nFalling back to responses.json file...")
+        
+        p = find_responses_file()
+        print(f"Streaming responses from {p}...")
+        yield from iter_file_chunks(p, chunk_size, since)
+        return
+    
+    if first_batch is None:
+        return
+    yield first_batch
+    yield from stream
+
+# ============================================================================
+# FILE LOADING (JSON / JSON LINES / GZIP)
+# ============================================================================
+
+# Answers that are always numeric; stored as float64 buffers while loading
+NUMERIC_COLUMNS = ['age'] + [
+    f'{variant}_{question}'
+    for variant in ['A', 'B']
+    for question in ['taste', 'appearance', 'selfRelevance', 'kidsRelevance', 'expectation', 'SelfRelevance']
+]
+
+def open_responses_file(path):
+    """Open an export file as text, decompressing .gz files on the fly"""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def is_json_lines(path):
+    """True for .jsonl / .ndjson files (optionally gzipped)"""
+    suffixes = Path(path).suffixes
+    return '.jsonl' in suffixes or '.ndjson' in suffixes
+
+def iter_json_lines(f):
+    """Yield one object per non-empty line, using orjson when it is installed"""
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in f:
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+def iter_json_array(f, buffer_size=1 << 20):
+    """Yield the objects of a top-level JSON array without reading the whole file.
+    
+    The file is read buffer_size characters at a time and each element is
+    decoded with JSONDecoder.raw_decode as soon as it is complete, so memory
+    use depends on the size of one response rather than the whole export.
+    Elements are expected to be objects (as in responses.json).
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    started = False
+    eof = False
+    
+    while True:
+        # Skip whitespace and separators, refilling the buffer as needed
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ',')):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = f.read(buffer_size)
+            buffer, pos = chunk, 0
+            eof = not chunk
+        
+        if pos >= len(buffer):
+            if started:
+                raise ValueError("Unexpected end of file inside JSON array")
+            return
+        
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("Expected a JSON array of responses")
+            started = True
+            pos += 1
+            continue
+        
+        if buffer[pos] == ']':
+            return
+        
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(buffer_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        
+        yield obj
+        pos = end
+        if pos > buffer_size:
+            buffer, pos = buffer[pos:], 0
+
+def iter_response_records(path):
+    """Stream response dicts from a .json / .jsonl file (optionally .gz)"""
+    with open_responses_file(path) as f:
+        if is_json_lines(path):
+            yield from iter_json_lines(f)
+        else:
+            yield from iter_json_array(f)
+
+def to_float(value):
+    """Parse a numeric answer, returning NaN for missing or non-numeric values"""
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def records_to_frame(records):
+    """Build a DataFrame column by column from an iterable of response dicts.
+    
+    Numeric answers go straight into compact float64 buffers and everything
+    else into per-column lists, so no intermediate list of dicts is kept.
+    Numeric columns without missing values become int64, matching what
+    pd.DataFrame(list_of_dicts) would produce.
+    """
+    numeric_columns = set(NUMERIC_COLUMNS)
+    columns = {}
+    n_rows = 0
+    
+    for record in records:
+        for key in record:
+            if key not in columns:
+                if key in numeric_columns:
+                    columns[key] = array.array('d', [np.nan]) * n_rows
+                else:
+                    columns[key] = [None] * n_rows
+        
+        for key, values in columns.items():
+            value = record.get(key)
+            if key in numeric_columns:
+                values.append(to_float(value))
+            else:
+                values.append(value)
+        n_rows += 1
+    
+    frame_data = {}
+    for key, values in columns.items():
+        if key in numeric_columns:
+            numbers = np.frombuffer(values, dtype=np.float64) if n_rows else np.zeros(0)
+            if not np.isnan(numbers).any() and np.array_equal(numbers, np.round(numbers)):
+                frame_data[key] = numbers.astype(np.int64)
+            else:
+                frame_data[key] = numbers.copy()
+        else:
+            frame_data[key] = values
+    
+    return pd.DataFrame(frame_data)
+
+def load_responses_file(path):
+    """Load a responses export (.json, .jsonl, optionally gzipped) into a DataFrame"""
+    return records_to_frame(iter_response_records(path))
 
 # ============================================================================
 # TEXT PROCESSING UTILITIES
@@ -285,14 +612,237 @@ def normalize_text(text):
     
     return text_str
 
+# ============================================================================
+# NLP MODEL BUNDLE
+# ============================================================================
+
+# Directory of the prebuilt NLP bundle (see build_nlp_bundle); used at import when present.
+# Next to this file rather than in the working directory, so where the script
+# is run from cannot change which models it uses.
+NLP_BUNDLE_DIR = os.environ.get('ANALYTICS_NLP_BUNDLE', str(Path(__file__).parent / '.nlp_bundle'))
+
+# Bumped whenever the bundle layout changes
+NLP_BUNDLE_VERSION = 1
+
+# wordnet.ADJ; reading the attribute would load the whole WordNet corpus
+WORDNET_ADJ = 'a'
+
+class BundledTagger:
+    """Averaged perceptron tagger reading its weights from the bundle's arrays.
+    
+    Feature extraction, the tag dictionary and tie-breaking are NLTK's own
+    (an nltk PerceptronTagger created without weights); only the weight
+    lookup is replaced. Weights are stored CSR-style: sorted feature
+    strings, row offsets, and class indices / values in the original dict
+    order, so scores are summed in the same order and tags are identical.
+    A feature's weights are read from the arrays the first time it occurs
+    and memoized, so only the features the survey text uses are touched.
+    """
+    
+    def __init__(self, features, offsets, labels, values, classes, tagdict):
+        from nltk.tag.perceptron import PerceptronTagger
+        self.features = features
+        self.offsets = offsets
+        self.labels = labels
+        self.values = values
+        self.classes = list(classes)
+        self._weights = {}
+        self.tagger = PerceptronTagger(load=False)
+        self.tagger.tagdict = tagdict
+        self.tagger.classes = self.tagger.model.classes = set(self.classes)
+        self.tagger.model.predict = self.predict
+    
+    def feature_weights(self, feature):
+        """(label, weight) pairs of one feature, in the order NLTK stored them"""
+        weights = self._weights.get(feature)
+        if weights is None:
+            weights = ()
+            row = np.searchsorted(self.features, feature)
+            if row < len(self.features) and self.features[row] == feature:
+                start, end = self.offsets[row], self.offsets[row + 1]
+                weights = tuple((self.classes[label], weight) for label, weight in
+                                zip(self.labels[start:end].tolist(), self.values[start:end].tolist()))
+            self._weights[feature] = weights
+        return weights
+    
+    def predict(self, features, return_conf=False):
+        """AveragedPerceptron.predict over the bundled weights (confidence is not computed)"""
+        scores = defaultdict(float)
+        for feature, value in features.items():
+            if value == 0:
+                continue
+            for label, weight in self.feature_weights(feature):
+                scores[label] += value * weight
+        # Same secondary alphabetic sort as NLTK, for stability
+        return max(self.classes, key=lambda label: (scores[label], label)), None
+    
+    def tag(self, tokens):
+        """Drop-in replacement for nltk.pos_tag(tokens)"""
+        return self.tagger.tag(tokens)
+
+class BundledLemmatizer:
+    """WordNetLemmatizer whose adjective lemmas come from a precomputed table.
+    
+    The table holds every inflected form whose adjective lemma differs from
+    the form (exception-list entries and -er/-est forms of WordNet
+    adjectives); any other word is its own lemma, exactly as WordNet's morphy
+    would decide. Other parts of speech fall back to WordNet itself.
+    """
+    
+    def __init__(self, forms, lemmas):
+        self.forms = forms
+        self.lemmas = lemmas
+        self._wordnet_lemmatizer = None
+    
+    def lemmatize(self, word, pos='n'):
+        if pos == WORDNET_ADJ and self.forms is not None:
+            row = np.searchsorted(self.forms, word)
+            if row < len(self.forms) and self.forms[row] == word:
+                return str(self.lemmas[row])
+            return word
+        if self._wordnet_lemmatizer is None:
+            self._wordnet_lemmatizer = WordNetLemmatizer()
+        return self._wordnet_lemmatizer.lemmatize(word, pos)
+
+class NLPBundle:
+    """Tagger weights, adjective lemma table, VADER lexicon and stopwords loaded from a bundle"""
+    
+    def __init__(self, tagger, lemmatizer, vader_lexicon, stop_words):
+        self.tagger = tagger
+        self.lemmatizer = lemmatizer
+        self.vader_lexicon = vader_lexicon
+        self.stop_words = stop_words
+    
+    def sentiment_analyzer(self):
+        """SentimentIntensityAnalyzer over the bundled lexicon, without parsing vader_lexicon.txt"""
+        from nltk.sentiment.vader import VaderConstants
+        analyzer = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+        analyzer.lexicon = self.vader_lexicon
+        analyzer.constants = VaderConstants()
+        return analyzer
+
+def adjective_lemma_table():
+    """(form, lemma) pairs for every adjective form WordNet lemmatizes to something else"""
+    from nltk.corpus import wordnet as wn
+    wordnet_lemmatizer = WordNetLemmatizer()
+    
+    forms = set(wn._exception_map[WORDNET_ADJ])
+    for pos in ['a', 's']:
+        for lemma in wn.all_lemma_names(pos=pos):
+            forms.update([lemma, lemma + 'er', lemma + 'est'])
+            if lemma.endswith('e'):
+                forms.update([lemma[:-1] + 'er', lemma[:-1] + 'est'])
+    
+    pairs = []
+    for form in sorted(forms):
+        lemma = wordnet_lemmatizer.lemmatize(form, WORDNET_ADJ)
+        if lemma != form:
+            pairs.append((form, lemma))
+    return pairs
+
+def build_nlp_bundle(path=NLP_BUNDLE_DIR):
+    """Serialize the NLTK models analytics.py uses into path for fast loading"""
+    from nltk.tag.perceptron import PerceptronTagger
+    
+    print(f"Building NLP bundle in {path}...")
+    bundle_dir = Path(path)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    
+    started = time.time()
+    tagger = PerceptronTagger()
+    classes = sorted(tagger.classes)
+    class_index = {label: i for i, label in enumerate(classes)}
+    features = sorted(tagger.model.weights)
+    offsets = np.zeros(len(features) + 1, dtype=np.int64)
+    labels = []
+    values = []
+    for row, feature in enumerate(features):
+        weights = tagger.model.weights[feature]
+        labels.extend(class_index[label] for label in weights)
+        values.extend(weights.values())
+        offsets[row + 1] = len(labels)
+    np.save(bundle_dir / 'tagger_features.npy', np.array(features, dtype=str))
+    np.save(bundle_dir / 'tagger_offsets.npy', offsets)
+    np.save(bundle_dir / 'tagger_labels.npy', np.array(labels, dtype=np.int16))
+    np.save(bundle_dir / 'tagger_values.npy', np.array(values, dtype=np.float64))
+    print(f"[OK] Tagger: {len(features)} features, {len(values)} weights, {len(tagger.tagdict)} tag dictionary entries")
+    
+    try:
+        pairs = adjective_lemma_table()
+        np.save(bundle_dir / 'adjective_forms.npy', np.array([form for form, _ in pairs], dtype=str))
+        np.save(bundle_dir / 'adjective_lemmas.npy', np.array([lemma for _, lemma in pairs], dtype=str))
+        has_lemmas = True
+        print(f"[OK] Adjective lemma table: {len(pairs)} forms")
+    except LookupError:
+        has_lemmas = False
+        print("[ERROR] WordNet is not available; adjectives will be lemmatized through WordNet at run time")
+    
+    manifest = {
+        'version': NLP_BUNDLE_VERSION,
+        'nltk_version': nltk.__version__,
+        'built_at': datetime.now().isoformat(),
+        'classes': classes,
+        'tagdict': tagger.tagdict,
+        'adjective_lemmas': has_lemmas,
+        'vader_lexicon': SentimentIntensityAnalyzer().lexicon,
+        'stop_words': sorted(stopwords.words('english')),
+    }
+    temp_path = bundle_dir / 'bundle.json.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, bundle_dir / 'bundle.json')
+    print(f"[OK] VADER lexicon: {len(manifest['vader_lexicon'])} words, stopwords: {len(manifest['stop_words'])}")
+    print(f"[OK] Built in {time.time() - started:.1f}s")
+    
+    loaded_at = time.time()
+    load_nlp_bundle(path)
+    print(f"Loading the bundle takes {(time.time() - loaded_at) * 1000:.0f} ms")
+    return path
+
+def load_nlp_bundle(path=NLP_BUNDLE_DIR, mmap=True):
+    """Load a bundle written by build_nlp_bundle, or None if there is none (or it is stale).
+    
+    With mmap the arrays are memory-mapped read-only, so forked workers
+    share the same pages instead of each holding a copy.
+    """
+    bundle_dir = Path(path)
+    manifest_path = bundle_dir / 'bundle.json'
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != NLP_BUNDLE_VERSION or manifest.get('nltk_version') != nltk.__version__:
+        print(f"Warning: NLP bundle in {path} was built for NLTK {manifest.get('nltk_version')}; "
+              f"ignoring it (rebuild with --build-nlp-bundle)")
+        return None
+    
+    mmap_mode = 'r' if mmap else None
+    def array(name):
+        return np.load(bundle_dir / f'{name}.npy', mmap_mode=mmap_mode)
+    
+    tagger = BundledTagger(array('tagger_features'), array('tagger_offsets'), array('tagger_labels'),
+                           array('tagger_values'), manifest['classes'], manifest['tagdict'])
+    if manifest['adjective_lemmas']:
+        lemmatizer = BundledLemmatizer(array('adjective_forms'), array('adjective_lemmas'))
+    else:
+        lemmatizer = BundledLemmatizer(None, None)
+    return NLPBundle(tagger, lemmatizer, manifest['vader_lexicon'], set(manifest['stop_words']))
+
 # ============================================================================
 # NLTK-BASED ADJECTIVE EXTRACTION
 # ============================================================================
 
-# Initialize NLTK components
-lemmatizer = WordNetLemmatizer()
-sia = SentimentIntensityAnalyzer()
-stop_words = set(stopwords.words('english'))
+# Initialize NLTK components, from the prebuilt bundle when there is one
+nlp_bundle = load_nlp_bundle()
+if nlp_bundle is not None:
+    lemmatizer = nlp_bundle.lemmatizer
+    sia = nlp_bundle.sentiment_analyzer()
+    stop_words = nlp_bundle.stop_words
+    pos_tag = nlp_bundle.tagger.tag
+else:
+    lemmatizer = WordNetLemmatizer()
+    sia = SentimentIntensityAnalyzer()
+    stop_words = set(stopwords.words('english'))
 
 def get_wordnet_pos(treebank_tag):
     """Convert treebank POS tag to wordnet POS tag for lemmatization"""
@@ -322,36 +872,203 @@ def extract_adjectives(text):
         
         pos_tags = pos_tag(tokens)
         
-        adjectives = []
-        for word, tag in pos_tags:
-            if tag and tag.startswith('JJ'):
-                word_lower = word.lower().strip()
-                
-                if (len(word_lower) > 2 and 
-                    word_lower not in stop_words and 
-                    any(c.isalpha() for c in word_lower)):
-                    
-                    try:
-                        lemma = lemmatizer.lemmatize(word_lower, pos=wordnet.ADJ)
-                        if lemma and any(c.isalpha() for c in lemma):
-                            adjectives.append(lemma)
-                    except Exception:
-                        adjectives.append(word_lower)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_adjectives = []
-        for adj in adjectives:
-            if adj not in seen:
-                seen.add(adj)
-                unique_adjectives.append(adj)
-        
-        return unique_adjectives
+        return unique_adjectives([token_adjective(word, tag) for word, tag in pos_tags])
         
     except Exception as e:
         print(f"Warning: Error processing text '{text[:50]}...': {str(e)}")
         return []
 
+def token_adjective(word, tag):
+    """Adjective lemma for one tagged token, or None if it is not a usable adjective"""
+    if tag and tag.startswith('JJ'):
+        word_lower = word.lower().strip()
+        
+        if (len(word_lower) > 2 and 
+            word_lower not in stop_words and 
+            any(c.isalpha() for c in word_lower)):
+            
+            try:
+                lemma = lemmatizer.lemmatize(word_lower, pos=WORDNET_ADJ)
+                if lemma and any(c.isalpha() for c in lemma):
+                    return lemma
+            except Exception:
+                return word_lower
+    return None
+
+def unique_adjectives(adjectives):
+    """Drop None and duplicates while preserving order"""
+    seen = set()
+    unique = []
+    for adj in adjectives:
+        if adj is not None and adj not in seen:
+            seen.add(adj)
+            unique.append(adj)
+    return unique
+
+# On-disk adjective lexicon learned from tagged texts (see AdjectiveLexicon)
+ADJECTIVE_LEXICON_FILE = '.adjective_lexicon.json'
+
+# Consistent taggings needed before a token is trusted without the tagger
+LEXICON_MIN_OBSERVATIONS = 3
+
+# Texts the fast path can tokenize itself: words, commas, one closing . ! or ?
+# (word_tokenize splits these exactly at the regex matches)
+LEXICON_TEXT_PATTERN = re.compile(r"[A-Za-z]+(?:,? [A-Za-z]+)*[.!?]?")
+LEXICON_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|[,.!?]")
+
+class AdjectiveLexicon:
+    """Token -> adjective lemma lexicon that lets short answers skip POS tagging.
+    
+    Every text that goes through the tagger records, per token, what
+    token_adjective made of it (a lemma or None). A token is trusted once it
+    has been seen min_observations times with a single outcome; tokens the
+    tagger has treated differently in different contexts never are. A text
+    whose tokens are all trusted is answered from the lexicon, anything else
+    falls back to extract_adjectives and teaches the lexicon. POS tags depend
+    on context, so a trusted token can still be tagged differently in a
+    context the lexicon has not seen: fast-path answers approximate
+    extract_adjectives rather than reproduce it.
+    
+    Tokens are case-sensitive because the tagger is. Only texts matching
+    LEXICON_TEXT_PATTERN are eligible, and a text only teaches the lexicon
+    when the regex tokens equal word_tokenize's, so the fast path never
+    tokenizes differently (e.g. word_tokenize splits "cannot").
+    
+    Pipeline worker threads share one lexicon, so lookups, learning and the
+    counters go through self.lock.
+    """
+    
+    def __init__(self, min_observations=LEXICON_MIN_OBSERVATIONS):
+        self.min_observations = min_observations
+        self.observations = defaultdict(Counter)  # token -> Counter(lemma or '' -> taggings)
+        self.trusted = {}                         # token -> lemma or None
+        self.fast_texts = 0
+        self.tagged_texts = 0
+        # Observations not yet handed back by a pipeline worker process (see take_updates)
+        self.new_observations = None
+        self.lock = threading.Lock()
+    
+    def __getstate__(self):
+        # Locks cannot be pickled; worker processes get a fresh one
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+    
+    def trust(self, token):
+        """Trust token if all its taggings so far agree and there are enough of them (self.lock held)"""
+        outcomes = self.observations[token]
+        if len(outcomes) == 1 and sum(outcomes.values()) >= self.min_observations:
+            self.trusted[token] = next(iter(outcomes)) or None
+        else:
+            self.trusted.pop(token, None)
+    
+    def learn(self, tagged, adjectives):
+        """Record what token_adjective made of each token of one tagged text"""
+        with self.lock:
+            for (token, _), adjective in zip(tagged, adjectives):
+                self.observations[token][adjective or ''] += 1
+                if self.new_observations is not None:
+                    self.new_observations[token][adjective or ''] += 1
+                self.trust(token)
+    
+    def add_observations(self, observations):
+        """Merge {token: {lemma or '': taggings}} counts, e.g. from a saved lexicon"""
+        with self.lock:
+            for token, outcomes in observations.items():
+                self.observations[token].update(outcomes)
+                self.trust(token)
+    
+    def take_updates(self):
+        """Observations and text counts since the last call; used in pipeline worker processes"""
+        with self.lock:
+            updates = {
+                'observations': {token: dict(outcomes) for token, outcomes in (self.new_observations or {}).items()},
+                'fast_texts': self.fast_texts,
+                'tagged_texts': self.tagged_texts,
+            }
+            self.new_observations = defaultdict(Counter)
+            self.fast_texts = self.tagged_texts = 0
+        return updates
+    
+    def merge_updates(self, updates):
+        """Add what a worker's copy of the lexicon learned (see take_updates)"""
+        self.add_observations(updates['observations'])
+        with self.lock:
+            self.fast_texts += updates['fast_texts']
+            self.tagged_texts += updates['tagged_texts']
+    
+    def extract(self, text):
+        """Adjectives of text: extract_adjectives(text), or the lexicon's answer when every token is trusted"""
+        normalized_text = normalize_text(text)
+        if not normalized_text:
+            return []
+        
+        eligible = LEXICON_TEXT_PATTERN.fullmatch(normalized_text) is not None
+        if eligible:
+            tokens = LEXICON_TOKEN_PATTERN.findall(normalized_text)
+            with self.lock:
+                # self marks an untrusted token (None is a valid "not an adjective" entry)
+                adjectives = [self.trusted.get(token, self) for token in tokens]
+                fast = self not in adjectives
+                if fast:
+                    self.fast_texts += 1
+            if fast:
+                return unique_adjectives(adjectives)
+        
+        with self.lock:
+            self.tagged_texts += 1
+        try:
+            tagged = pos_tag(word_tokenize(normalized_text))
+        except Exception as e:
+            print(f"Warning: Error processing text '{text[:50]}...': {str(e)}")
+            return []
+        
+        adjectives = [token_adjective(word, tag) for word, tag in tagged]
+        if eligible and [word for word, _ in tagged] == tokens:
+            self.learn(tagged, adjectives)
+        return unique_adjectives(adjectives)
+    
+    def hit_rate(self):
+        texts = self.fast_texts + self.tagged_texts
+        return self.fast_texts / texts if texts else 0.0
+    
+    def save(self, path):
+        """Write the observations so later runs start with a warm lexicon"""
+        with self.lock:
+            data = {
+                'min_observations': self.min_observations,
+                'observations': {token: dict(outcomes) for token, outcomes in self.observations.items()},
+            }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path, min_observations=LEXICON_MIN_OBSERVATIONS):
+        lexicon = cls(min_observations)
+        if Path(path).exists():
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            lexicon.add_observations(data.get('observations', {}))
+        return lexicon
+    
+    def report(self):
+        texts = self.fast_texts + self.tagged_texts
+        print(f"\nAdjective lexicon: {self.fast_texts} of {texts} answers ({self.hit_rate():.1%}) "
+              f"skipped POS tagging; {len(self.trusted)} of {len(self.observations)} tokens trusted")
+
+# Lexicon used by prepare_responses instead of extract_adjectives (set by main)
+_adjective_lexicon = None
+
+def adjective_extractor():
+    """extract_adjectives, or the lexicon fast path when one is loaded"""
+    return _adjective_lexicon.extract if _adjective_lexicon is not None else extract_adjectives
+
 def classify_adjective_sentiment(adjective):
     """Classify if an adjective is positive or negative using VADER sentiment"""
     if not adjective or not isinstance(adjective, str):
@@ -398,47 +1115,139 @@ def classify_adjective_sentiment(adjective):
         print(f"Warning: Error classifying sentiment for '{adjective}': {str(e)}")
         return 'neutral'
 
-def group_similar_adjectives(adjectives):
-    """Group similar adjectives using synonym mapping"""
-    if not adjectives:
-        return {}
+# Hand-made synonym groups (group name -> variants). When a variant is listed
+# in several groups, the group listed last wins.
+ADJECTIVE_SYNONYM_GROUPS = {
+    'tasty': ['tasty', 'flavorful', 'flavourful', 'delicious', 'yummy', 
+              'scrumptious', 'delectable', 'appetizing'],
+    'bland': ['bland', 'tasteless', 'flavorless', 'flavourless', 'boring'],
+    'dry': ['dry', 'dried', 'dehydrated'],
+    'juicy': ['juicy', 'moist', 'succulent', 'tender'],
+    'crispy': ['crispy', 'crunchy', 'crisp'],
+    'soggy': ['soggy', 'soft', 'mushy', 'watery'],
+    'greasy': ['greasy', 'oily', 'fatty'],
+    'sweet': ['sweet', 'sugary', 'sugared'],
+    'salty': ['salty', 'salted', 'over-salted'],
+    'spicy': ['spicy', 'hot', 'pungent'],
+    'tender': ['tender', 'soft', 'delicate'],
+    'tough': ['tough', 'hard', 'chewy', 'rubbery'],
+    'fresh': ['fresh', 'crisp', 'new'],
+    'stale': ['stale', 'old', 'rancid'],
+    'burnt': ['burnt', 'burned', 'charred', 'overcooked'],
+    'good': ['good', 'nice', 'fine', 'decent'],
+    'great': ['great', 'excellent', 'amazing', 'wonderful'],
+    'bad': ['bad', 'terrible', 'awful', 'poor'],
+}
+
+# Optional JSON file with extra groups, in the same shape as ADJECTIVE_SYNONYM_GROUPS
+SYNONYM_CONFIG_FILE = 'adjective_synonyms.json'
+
+# On-disk cache of WordNet clustering results for adjectives not in the groups
+WORDNET_CLUSTER_CACHE = '.adjective_clusters.json'
+
+_synonym_index = None
+
+# Copy of the index as built from the hand-made and config groups, before WordNet additions
+_base_synonym_index = None
+
+def load_synonym_groups(config_path=None):
+    """Return the synonym groups, extended with the groups from the config file if present"""
+    groups = {name: list(variants) for name, variants in ADJECTIVE_SYNONYM_GROUPS.items()}
     
-    synonym_groups = {
-        'tasty': ['tasty', 'flavorful', 'flavourful', 'delicious', 'yummy', 
-                  'scrumptious', 'delectable', 'appetizing'],
-        'bland': ['bland', 'tasteless', 'flavorless', 'flavourless', 'boring'],
-        'dry': ['dry', 'dried', 'dehydrated'],
-        'juicy': ['juicy', 'moist', 'succulent', 'tender'],
-        'crispy': ['crispy', 'crunchy', 'crisp'],
-        'soggy': ['soggy', 'soft', 'mushy', 'watery'],
-        'greasy': ['greasy', 'oily', 'fatty'],
-        'sweet': ['sweet', 'sugary', 'sugared'],
-        'salty': ['salty', 'salted', 'over-salted'],
-        'spicy': ['spicy', 'hot', 'pungent'],
-        'tender': ['tender', 'soft', 'delicate'],
-        'tough': ['tough', 'hard', 'chewy', 'rubbery'],
-        'fresh': ['fresh', 'crisp', 'new'],
-        'stale': ['stale', 'old', 'rancid'],
-        'burnt': ['burnt', 'burned', 'charred', 'overcooked'],
-        'good': ['good', 'nice', 'fine', 'decent'],
-        'great': ['great', 'excellent', 'amazing', 'wonderful'],
-        'bad': ['bad', 'terrible', 'awful', 'poor'],
-    }
+    if config_path is None:
+        candidates = [Path(SYNONYM_CONFIG_FILE), Path(__file__).parent / SYNONYM_CONFIG_FILE]
+        config_path = next((p for p in candidates if p.exists()), None)
     
-    adj_to_group = {}
-    for group_name, variants in synonym_groups.items():
+    if config_path is not None and Path(config_path).exists():
+        with open(config_path, encoding='utf-8') as f:
+            extra_groups = json.load(f)
+        for name, variants in extra_groups.items():
+            groups.setdefault(name, []).extend(variants)
+        print(f"Loaded {len(extra_groups)} adjective synonym groups from {config_path}")
+    
+    return groups
+
+def build_synonym_index(groups):
+    """Build the variant -> group name lookup"""
+    index = {}
+    for group_name, variants in groups.items():
         for variant in variants:
-            adj_to_group[variant] = group_name
+            index[variant.lower().strip()] = group_name
+    return index
+
+def get_synonym_index():
+    """Return the synonym index, building it on first use"""
+    global _synonym_index, _base_synonym_index
+    if _synonym_index is None:
+        _synonym_index = build_synonym_index(load_synonym_groups())
+        _base_synonym_index = dict(_synonym_index)
+    return _synonym_index
+
+def wordnet_adjective_group(adjective, index):
+    """Find the synonym group of an unknown adjective through its WordNet synsets.
     
-    final_groups = defaultdict(list)
-    for adj in adjectives:
-        if not adj or not isinstance(adj, str):
-            continue
-        adj_lower = adj.lower().strip()
-        group_key = adj_to_group.get(adj_lower, adj_lower)
-        final_groups[group_key].append(adj_lower)
+    Lemmas of the adjective's synsets and of their similar-to clusters vote for
+    the groups they belong to; the most common group wins.
+    """
+    votes = Counter()
+    for synset in wordnet.synsets(adjective, pos=wordnet.ADJ):
+        related = [synset] + synset.similar_tos()
+        for related_synset in related:
+            for lemma_name in related_synset.lemma_names():
+                group = index.get(lemma_name.lower().replace('_', ' '))
+                if group is not None:
+                    votes[group] += 1
+    
+    if not votes:
+        return None
+    return votes.most_common(1)[0][0]
+
+def extend_synonym_index_with_wordnet(adjectives, cache_path=WORDNET_CLUSTER_CACHE):
+    """Assign adjectives missing from the synonym index to groups using WordNet.
+    
+    Results (including "no group found") are cached on disk, keyed by a
+    signature of the hand-made groups, so each adjective is only looked up once
+    across runs. Lookups and the signature only use the hand-made groups, so
+    adjectives added by an earlier call do not change either. Returns the
+    number of adjectives added to the index.
+    """
+    index = get_synonym_index()
+    signature = hashlib.sha1(json.dumps(sorted(_base_synonym_index.items())).encode('utf-8')).hexdigest()
+    
+    cache = {}
+    cache_file = Path(cache_path)
+    if cache_file.exists():
+        try:
+            with open(cache_file, encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('signature') == signature:
+                cache = stored.get('clusters', {})
+        except (OSError, json.JSONDecodeError):
+            cache = {}
+    
+    unknown = {adj.lower().strip() for adj in adjectives if isinstance(adj, str) and adj.strip()}
+    unknown = {adj for adj in unknown if adj not in index}
+    
+    missing = [adj for adj in unknown if adj not in cache]
+    for adj in missing:
+        try:
+            cache[adj] = wordnet_adjective_group(adj, _base_synonym_index)
+        except LookupError:
+            print("Warning: WordNet corpus not available, skipping adjective clustering")
+            return 0
     
-    return dict(final_groups)
+    if missing:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'clusters': cache}, f)
+    
+    added = 0
+    for adj in unknown:
+        group = cache.get(adj)
+        if group is not None:
+            index[adj] = group
+            added += 1
+    
+    return added
 
 def analyze_adjectives_by_sentiment(adjectives_list, context='likes'):
     """Analyze adjectives and classify them as positive/negative based on context"""
@@ -478,37 +1287,38 @@ def analyze_adjectives_by_sentiment(adjectives_list, context='likes'):
         'neutral': neutral_adjs
     }
 
-def group_and_count_adjectives(adjectives):
+def normalize_adjective_counts(counts):
+    """Lowercase/strip adjective keys of a Counter, dropping empty and non-string entries"""
+    normalized = Counter()
+    for adj, count in counts.items():
+        if adj and isinstance(adj, str) and adj.strip():
+            normalized[adj.strip().lower()] += count
+    return normalized
+
+def group_adjective_counts(raw_counts, synonym_index=None):
+    """Roll raw adjective counts up into their synonym groups"""
+    adj_to_group = synonym_index if synonym_index is not None else get_synonym_index()
+    grouped_counts = Counter()
+    for adj, count in raw_counts.items():
+        if count > 0:
+            grouped_counts[adj_to_group.get(adj, adj)] += count
+    return grouped_counts
+
+def group_and_count_adjectives(adjectives, synonym_index=None):
     """Group similar adjectives and count frequencies"""
     if not isinstance(adjectives, list):
         adjectives = []
     
-    valid_adjectives = []
-    for adj in adjectives:
-        if adj and isinstance(adj, str) and adj.strip():
-            valid_adjectives.append(adj.strip().lower())
+    raw_counts = normalize_adjective_counts(Counter(adjectives))
     
-    if not valid_adjectives:
+    if not raw_counts:
         return Counter(), Counter()
     
-    raw_counts = Counter(valid_adjectives)
-    
     try:
-        grouped = group_similar_adjectives(valid_adjectives)
+        grouped_counts = group_adjective_counts(raw_counts, synonym_index)
     except Exception as e:
         print(f"Warning: Error grouping adjectives: {str(e)}")
-        grouped = {}
-    
-    grouped_counts = Counter()
-    for group_name, variants in grouped.items():
-        if not variants:
-            continue
-        count = 0
-        for variant in variants:
-            count += raw_counts.get(variant, 0)
-            count += raw_counts.get(variant.lower(), 0)
-        if count > 0:
-            grouped_counts[group_name] = count
+        grouped_counts = Counter()
     
     return raw_counts, grouped_counts
 
@@ -541,19 +1351,205 @@ TAG_KEYWORDS = {
     "average": ["average", "okay", "fine", "decent", "ok"]
 }
 
-def extract_tags(text, tag_keywords):
-    """Extract tags from text based on keyword matching"""
+def extract_tags(text, tag_keywords, matcher=None):
+    """Extract tags from text based on keyword matching
+    
+    With a FuzzyKeywordMatcher, misspelled words are corrected to the nearest
+    keyword word first and the keywords are also matched against the
+    corrected text.
+    """
     text = clean_text(text)
+    texts = [text]
+    if matcher is not None:
+        corrected = matcher.correct(text)
+        if corrected != text:
+            texts.append(corrected)
+    
     found_tags = []
     
     for tag, keywords in tag_keywords.items():
         for keyword in keywords:
-            if keyword.lower() in text:
+            keyword = keyword.lower()
+            if any(keyword in candidate for candidate in texts):
                 found_tags.append(tag)
                 break
     
     return found_tags
 
+def max_edit_distance(length):
+    """Edit distance allowed for a word of the given length"""
+    if length <= 3:
+        return 0
+    if length <= 7:
+        return 1
+    return 2
+
+def edit_distance(a, b, max_distance):
+    """Damerau-Levenshtein (optimal string alignment) distance, or None if above max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else None
+
+def deletes(word, distance):
+    """All strings obtained by deleting up to distance characters from word"""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+class FuzzyKeywordMatcher:
+    """SymSpell-style deletion index over the words used in tag keywords.
+    
+    Every keyword word is stored under all of its deletions (up to the
+    distance allowed for its length), so looking up a token only needs the
+    token's own deletions - a bounded number of dictionary probes that does
+    not grow with the vocabulary. Candidates are then verified with a real
+    edit distance. Only tokens that are not keyword words, stopwords or
+    known English words are corrected.
+    """
+    
+    def __init__(self, tag_keywords):
+        self.vocabulary = []
+        for keywords in tag_keywords.values():
+            for keyword in keywords:
+                for word in re.findall(r'\w+', keyword.lower()):
+                    if word not in self.vocabulary:
+                        self.vocabulary.append(word)
+        self.known = set(self.vocabulary)
+        
+        self.index = defaultdict(list)
+        for word in self.vocabulary:
+            for variant in deletes(word, max_edit_distance(len(word))):
+                self.index[variant].append(word)
+        
+        self.cache = {}
+        self.use_wordnet = True
+    
+    def is_english_word(self, token):
+        """True if the token is a stopword or a WordNet lemma"""
+        if token in stop_words:
+            return True
+        if not self.use_wordnet:
+            return False
+        try:
+            return bool(wordnet.synsets(token))
+        except LookupError:
+            self.use_wordnet = False
+            return False
+    
+    def lookup(self, token):
+        """Return the closest keyword word for a misspelled token, or None"""
+        if token in self.cache:
+            return self.cache[token]
+        
+        best = None
+        distance_limit = max_edit_distance(len(token))
+        if token not in self.known and distance_limit > 0 and not token.isdigit() \
+                and not self.is_english_word(token):
+            best_distance = distance_limit + 1
+            seen = set()
+            for variant in deletes(token, distance_limit):
+                for word in self.index.get(variant, ()):
+                    if word in seen:
+                        continue
+                    seen.add(word)
+                    limit = min(distance_limit, max_edit_distance(len(word)))
+                    distance = edit_distance(token, word, limit)
+                    if distance is not None and (distance < best_distance or
+                            (distance == best_distance and
+                             self.vocabulary.index(word) < self.vocabulary.index(best))):
+                        best, best_distance = word, distance
+        
+        self.cache[token] = best
+        return best
+    
+    def correct(self, text):
+        """Replace misspelled words in cleaned text with their keyword words"""
+        return re.sub(r'\w+', lambda m: self.lookup(m.group(0)) or m.group(0), text)
+
+def benchmark_tag_matching(texts, tag_keywords=None, repeats=3):
+    """Time exact, indexed fuzzy and brute-force fuzzy tag matching over texts.
+    
+    The brute-force variant compares every token against every keyword word
+    with edit_distance, which is what the deletion index avoids.
+    """
+    tag_keywords = tag_keywords or TAG_KEYWORDS
+    texts = [text for text in texts if isinstance(text, str) and text.strip()]
+    if not texts:
+        print("No text to benchmark")
+        return {}
+    
+    matcher = FuzzyKeywordMatcher(tag_keywords)
+    
+    def brute_force_correct(text):
+        def closest(match):
+            token = match.group(0)
+            if token in matcher.known or matcher.is_english_word(token):
+                return token
+            best, best_distance = None, None
+            for word in matcher.vocabulary:
+                limit = min(max_edit_distance(len(token)), max_edit_distance(len(word)))
+                distance = edit_distance(token, word, limit)
+                if distance is not None and (best_distance is None or distance < best_distance):
+                    best, best_distance = word, distance
+            return best or token
+        return re.sub(r'\w+', closest, text)
+    
+    class BruteForceMatcher:
+        correct = staticmethod(brute_force_correct)
+    
+    modes = [
+        ('exact', None),
+        ('fuzzy (deletion index)', matcher),
+        ('fuzzy (brute force)', BruteForceMatcher()),
+    ]
+    
+    print("\n" + "=" * 80)
+    print(f"TAG MATCHING BENCHMARK ({len(texts)} texts, {len(matcher.vocabulary)} keyword words, "
+          f"{len(matcher.index)} index entries)")
+    print("=" * 80)
+    
+    timings = {}
+    tag_totals = {}
+    for name, mode_matcher in modes:
+        best_time = None
+        for _ in range(repeats):
+            if mode_matcher is matcher:
+                matcher.cache.clear()
+            start = time.perf_counter()
+            tag_total = sum(len(extract_tags(text, tag_keywords, mode_matcher)) for text in texts)
+            elapsed = time.perf_counter() - start
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+        timings[name] = best_time
+        tag_totals[name] = tag_total
+        rate = len(texts) / best_time if best_time > 0 else float('inf')
+        print(f"  {name:<24} {best_time * 1000:9.1f} ms  {rate:12,.0f} texts/s  {tag_total} tags")
+    
+    corrections = {token: word for token, word in matcher.cache.items() if word}
+    if corrections:
+        print("\nCorrections:")
+        for token, word in sorted(corrections.items())[:20]:
+            print(f"  {token} -> {word}")
+    
+    return {'timings': timings, 'tags': tag_totals, 'corrections': corrections}
+
 def count_tags(tag_series):
     """Count frequency of all tags"""
     all_tags = []
@@ -578,6 +1574,8 @@ def calculate_tag_ratings(df, variant):
             taste_value = float(taste_rating)
         except (TypeError, ValueError):
             continue
+        if np.isnan(taste_value):
+            continue
         
         for tag in tags:
             tag_ratings[tag].append(taste_value)
@@ -585,6 +1583,140 @@ def calculate_tag_ratings(df, variant):
     tag_avg = {tag: np.mean(ratings) for tag, ratings in tag_ratings.items() if ratings}
     return tag_avg
 
+# ============================================================================
+# CHECKBOX QUESTIONS (MULTI-HOT ENCODING)
+# ============================================================================
+
+# Used when src/lib/questions.ts cannot be found
+DEFAULT_CHECKBOX_QUESTIONS = {
+    'consumer': ['Myself', 'My Kids', 'My Partner', 'Other'],
+    'occasion': ['Breakfast', 'Lunch', 'Dinner', 'Snack'],
+}
+
+def load_checkbox_questions():
+    """Read the checkbox-type questions and their options from questions.ts"""
+    possible_paths = [
+        Path('src/lib/questions.ts'),
+        Path('../src/lib/questions.ts'),
+        Path('../../src/lib/questions.ts'),
+        Path(__file__).parent / 'src' / 'lib' / 'questions.ts',
+    ]
+    
+    for p in possible_paths:
+        if not p.exists():
+            continue
+        
+        with open(p, encoding='utf-8') as f:
+            source = f.read()
+        
+        checkbox_questions = {}
+        for block in re.finditer(r'\{([^{}]*)\}', source):
+            body = block.group(1)
+            id_match = re.search(r"id:\s*'([^']+)'", body)
+            type_match = re.search(r"type:\s*'([^']+)'", body)
+            options_match = re.search(r"options:\s*\[([^\]]*)\]", body)
+            if id_match and type_match and type_match.group(1) == 'checkbox' and options_match:
+                checkbox_questions[id_match.group(1)] = re.findall(r"'([^']*)'", options_match.group(1))
+        
+        if checkbox_questions:
+            return checkbox_questions
+    
+    return dict(DEFAULT_CHECKBOX_QUESTIONS)
+
+def multi_hot_encode(values, options):
+    """Encode list-valued answers as a sparse (responses x options) 0/1 matrix.
+    
+    Values that are not in options (e.g. free-text "Other" entries) are ignored.
+    """
+    option_index = {option: i for i, option in enumerate(options)}
+    rows = []
+    cols = []
+    
+    for row_idx, answer in enumerate(values):
+        if isinstance(answer, str):
+            answer = [answer]
+        if not isinstance(answer, (list, tuple, set)):
+            continue
+        for option in set(answer):
+            col_idx = option_index.get(option)
+            if col_idx is not None:
+                rows.append(row_idx)
+                cols.append(col_idx)
+    
+    data = np.ones(len(rows), dtype=np.float64)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(values), len(options)))
+
+def rating_vectors(df, column):
+    """Return (values with NaN replaced by 0, 1/0 mask of present values) for a rating column"""
+    if column not in df.columns:
+        zeros = np.zeros(len(df))
+        return zeros, zeros
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(values)
+    return np.where(present, values, 0.0), present.astype(np.float64)
+
+def checkbox_breakdowns(df, checkbox_questions=None, tag_keywords=None):
+    """Compute option counts, co-occurrence matrices and per-option rating sums.
+    
+    Everything is a sparse matrix product over multi-hot encodings, and every
+    result is a sum, so breakdowns from separate batches can simply be added.
+    """
+    if checkbox_questions is None:
+        checkbox_questions = load_checkbox_questions()
+    if tag_keywords is None:
+        tag_keywords = TAG_KEYWORDS
+    
+    tags = list(tag_keywords)
+    tag_matrices = {}
+    for variant in ['A', 'B']:
+        tag_col = f'{variant}_all_tags'
+        tag_values = df[tag_col] if tag_col in df.columns else [[] for _ in range(len(df))]
+        tag_matrices[variant] = multi_hot_encode(tag_values, tags)
+    
+    rating_columns = [col for pair in COMPARISON_METRICS.values() for col in pair]
+    ratings = {col: rating_vectors(df, col) for col in rating_columns}
+    
+    breakdowns = {}
+    for question_id, options in checkbox_questions.items():
+        answers = df[question_id] if question_id in df.columns else [None] * len(df)
+        X = multi_hot_encode(answers, options)
+        XT = X.T.tocsr()
+        
+        breakdowns[question_id] = {
+            'options': list(options),
+            'tags': tags,
+            'counts': np.asarray(X.sum(axis=0)).ravel(),
+            'cooccurrence': (XT @ X).toarray(),
+            'tag_cooccurrence': {variant: (XT @ T).toarray() for variant, T in tag_matrices.items()},
+            'rating_sums': {col: XT @ values for col, (values, present) in ratings.items()},
+            'rating_counts': {col: XT @ present for col, (values, present) in ratings.items()},
+        }
+    
+    return breakdowns
+
+def checkbox_breakdown_frames(breakdowns):
+    """Build Excel-ready DataFrames (indexed by option) from checkbox_breakdowns output"""
+    frames = {}
+    for question_id, breakdown in breakdowns.items():
+        options = breakdown['options']
+        
+        frames[f'{question_id}_Cooccurrence'] = pd.DataFrame(
+            breakdown['cooccurrence'].astype(int), index=options, columns=options
+        )
+        
+        for variant, matrix in breakdown['tag_cooccurrence'].items():
+            tag_frame = pd.DataFrame(matrix.astype(int), index=options, columns=breakdown['tags'])
+            frames[f'{question_id}_Tags_{variant}'] = tag_frame.loc[:, tag_frame.sum(axis=0) > 0]
+        
+        ratings_frame = pd.DataFrame({'Count': breakdown['counts'].astype(int)}, index=options)
+        for col, sums in breakdown['rating_sums'].items():
+            counts = breakdown['rating_counts'][col]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ratings_frame[f'{col}_mean'] = np.where(counts > 0, sums / counts, np.nan)
+        frames[f'{question_id}_Ratings'] = ratings_frame
+    
+    return frames
+
 # ============================================================================
 # COOKING METHOD NORMALIZATION
 # ============================================================================
@@ -654,420 +1786,3517 @@ def calculate_sentiment(likes, dislikes):
     else:
         return "Neutral"
 
-# ============================================================================
-# MAIN ANALYSIS
-# ============================================================================
+# Free-text columns scored sentence by sentence with VADER
+SENTENCE_SENTIMENT_COLUMNS = ['A_likes', 'A_dislikes', 'A_Feedback', 'B_likes', 'B_dislikes', 'B_Feedback']
+
+# Unique sentences scored per batch
+SENTENCE_BATCH_SIZE = 5000
+
+# Sentences kept in the score memo; the least recently used are dropped beyond this
+SENTENCE_CACHE_LIMIT = 200_000
+
+# Whether prepare_responses adds the sentence-level scores (set by main and serve)
+_sentence_sentiment = False
+
+# VADER compound score of recently scored sentences (whitespace-normalized
+# sentence -> score), least recently used first
+_sentence_scores = {}
+_sentence_scores_lock = threading.Lock()
 
-def main():
-    """Main analysis function"""
+# Scores not yet handed back by a pipeline worker process (see process_chunk_in_worker)
+_new_sentence_scores = None
+
+def split_sentences(text):
+    """Split an answer into whitespace-normalized sentences"""
+    text = normalize_text(text)
+    if not text:
+        return []
+    try:
+        sentences = sent_tokenize(text)
+    except LookupError:
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+    return [' '.join(sentence.split()) for sentence in sentences if sentence.strip()]
+
+def remember_sentence_scores(scores):
+    """Add scores to the memo as most recently used, dropping the least recently used over the limit"""
+    with _sentence_scores_lock:
+        _sentence_scores.update(scores)
+        excess = len(_sentence_scores) - SENTENCE_CACHE_LIMIT
+        if excess > 0:
+            for sentence in list(itertools.islice(_sentence_scores, excess)):
+                del _sentence_scores[sentence]
+
+def score_sentences(sentences, batch_size=SENTENCE_BATCH_SIZE):
+    """Compound scores of sentences, scoring only those not memoized; returns (scores, newly scored)"""
+    scores = {}
+    missing = []
+    with _sentence_scores_lock:
+        for sentence in sentences:
+            # Popped and remembered again below, which marks the sentence as recently used
+            score = _sentence_scores.pop(sentence, None)
+            if score is None:
+                missing.append(sentence)
+            else:
+                scores[sentence] = score
     
-    # Load data
-    data = load_data()
-    df = pd.DataFrame(data)
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        scores.update((sentence, sia.polarity_scores(sentence)['compound']) for sentence in batch)
     
-    print("\n" + "=" * 80)
-    print("DATASET OVERVIEW")
-    print("=" * 80)
-    print(f"Total responses: {len(df)}")
-    print(f"Columns: {list(df.columns)}")
+    remember_sentence_scores(scores)
+    if _new_sentence_scores is not None:
+        _new_sentence_scores.update((sentence, scores[sentence]) for sentence in missing)
+    return scores, len(missing)
+
+def load_sentence_scores(path):
+    """Load memoized sentence scores written by save_sentence_scores"""
+    if not Path(path).exists():
+        return 0
+    with open(path, encoding='utf-8') as f:
+        remember_sentence_scores(json.load(f))
+    return len(_sentence_scores)
+
+def save_sentence_scores(path):
+    """Persist the sentence score memo so later runs only score new sentences"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        with _sentence_scores_lock:
+            json.dump(_sentence_scores, f)
+    os.replace(temp_path, path)
+
+def add_sentence_sentiment(df):
+    """Add continuous sentence-level VADER scores to df in place.
     
-    # Clean text fields
-    text_columns = ['A_likes', 'A_dislikes', 'A_Feedback', 'B_likes', 'B_dislikes', 'B_Feedback']
-    for col in text_columns:
-        if col in df.columns:
-            df[f'{col}_clean'] = df[col].apply(clean_text)
+    Each answer is split with sent_tokenize; identical answers are split once
+    and identical sentences across the whole corpus are scored once (and
+    memoized across chunks and runs). Adds {column}_sentence_score (mean
+    compound score of the answer's sentences) for every free-text column and
+    {variant}_sentence_sentiment (mean over all sentences of the variant's
+    likes, dislikes and feedback). Returns (unique sentences, newly scored).
+    """
+    columns = [col for col in SENTENCE_SENTIMENT_COLUMNS if col in df.columns]
     
-    # ========================================================================
-    # ADJECTIVE EXTRACTION
-    # ========================================================================
+    split_cache = {}
+    sentences_by_column = {}
+    for col in columns:
+        column_sentences = []
+        for text in df[col]:
+            key = normalize_text(text)
+            if key not in split_cache:
+                split_cache[key] = split_sentences(key)
+            column_sentences.append(split_cache[key])
+        sentences_by_column[col] = column_sentences
     
-    print("\n" + "=" * 80)
-    print("EXTRACTING ADJECTIVES USING NLTK")
-    print("=" * 80)
+    unique_sentences = list(dict.fromkeys(s for sentences in split_cache.values() for s in sentences))
+    scores, scored = score_sentences(unique_sentences)
     
     for variant in ['A', 'B']:
-        likes_col = f'{variant}_likes'
-        dislikes_col = f'{variant}_dislikes'
-        
-        # Extract adjectives
-        if likes_col in df.columns:
-            df[f'{variant}_likes_adjectives'] = df[likes_col].apply(extract_adjectives)
-        else:
-            df[f'{variant}_likes_adjectives'] = [[] for _ in range(len(df))]
-        
-        if dislikes_col in df.columns:
-            df[f'{variant}_dislikes_adjectives'] = df[dislikes_col].apply(extract_adjectives)
-        else:
-            df[f'{variant}_dislikes_adjectives'] = [[] for _ in range(len(df))]
-        
-        # Combine adjectives
-        def combine_adjectives(row):
-            likes_adj = row.get(f'{variant}_likes_adjectives', [])
-            dislikes_adj = row.get(f'{variant}_dislikes_adjectives', [])
-            if not isinstance(likes_adj, list):
-                likes_adj = []
-            if not isinstance(dislikes_adj, list):
-                dislikes_adj = []
-            return likes_adj + dislikes_adj
-        
-        df[f'{variant}_all_adjectives'] = df.apply(combine_adjectives, axis=1)
-        
-        # Summary
-        total_likes_adj = sum(len(adj_list) for adj_list in df[f'{variant}_likes_adjectives'] if isinstance(adj_list, list))
-        total_dislikes_adj = sum(len(adj_list) for adj_list in df[f'{variant}_dislikes_adjectives'] if isinstance(adj_list, list))
-        print(f"\n{variant} Summary: {total_likes_adj} adjectives from likes, {total_dislikes_adj} from dislikes")
+        sums = np.zeros(len(df))
+        counts = np.zeros(len(df))
+        for col in [col for col in columns if col.startswith(f'{variant}_')]:
+            column_sums = np.array([sum(scores[s] for s in sentences)
+                                    for sentences in sentences_by_column[col]], dtype=float)
+            column_counts = np.array([len(sentences) for sentences in sentences_by_column[col]], dtype=float)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                df[f'{col}_sentence_score'] = np.where(column_counts > 0, column_sums / column_counts, np.nan)
+            sums += column_sums
+            counts += column_counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df[f'{variant}_sentence_sentiment'] = np.where(counts > 0, sums / counts, np.nan)
     
-    # ========================================================================
-    # ADJECTIVE SENTIMENT ANALYSIS
-    # ========================================================================
+    return len(unique_sentences), scored
+
+def sentence_sentiment_columns(df):
+    """Score columns added by add_sentence_sentiment that are present in df"""
+    candidates = [f'{col}_sentence_score' for col in SENTENCE_SENTIMENT_COLUMNS]
+    candidates += ['A_sentence_sentiment', 'B_sentence_sentiment']
+    return [col for col in candidates if col in df.columns]
+
+# ============================================================================
+# SEGMENT CUBE
+# ============================================================================
+
+# Rating metrics compared between the two products (metric name -> (A column, B column))
+COMPARISON_METRICS = {
+    'Taste': ('A_taste', 'B_taste'),
+    'Appearance': ('A_appearance', 'B_appearance'),
+    'Self Relevance': ('A_selfRelevance', 'B_selfRelevance'),
+    'Met Expectations': ('A_expectation', 'B_expectation'),
+}
+
+# Dimensions the cube is built over; checkbox answers (consumer, occasion) are multi-valued
+SEGMENT_DIMENSIONS = ['age_bucket', 'hasChildren', 'cookingMethod_normalized', 'consumer', 'occasion']
+
+# Label used in a cube key for "any value" of a dimension (the rolled-up total)
+SEGMENT_ALL = '*'
+
+AGE_BUCKETS = [
+    (0, 25, '<25'),
+    (25, 35, '25-34'),
+    (35, 45, '35-44'),
+    (45, 55, '45-54'),
+    (55, None, '55+'),
+]
+
+def age_bucket(age):
+    """Map an age to one of the AGE_BUCKETS labels"""
+    try:
+        age_value = float(age)
+    except (TypeError, ValueError):
+        return "Unknown"
     
-    print("\n" + "=" * 80)
-    print("ADJECTIVE SENTIMENT ANALYSIS")
-    print("=" * 80)
+    if np.isnan(age_value):
+        return "Unknown"
     
-    for variant in ['A', 'B']:
-        df[f'{variant}_likes_adj_analysis'] = df[f'{variant}_likes_adjectives'].apply(
-            lambda x: analyze_adjectives_by_sentiment(x, context='likes')
-        )
-        
-        df[f'{variant}_dislikes_adj_analysis'] = df[f'{variant}_dislikes_adjectives'].apply(
-            lambda x: analyze_adjectives_by_sentiment(x, context='dislikes')
-        )
-        
-        df[f'{variant}_positive_adjectives'] = df.apply(
-            lambda row: row[f'{variant}_likes_adj_analysis']['positive'] + 
-                        row[f'{variant}_dislikes_adj_analysis']['positive'],
-            axis=1
-        )
-        
-        df[f'{variant}_negative_adjectives'] = df.apply(
-            lambda row: row[f'{variant}_likes_adj_analysis']['negative'] + 
-                        row[f'{variant}_dislikes_adj_analysis']['negative'],
-            axis=1
-        )
+    for low, high, label in AGE_BUCKETS:
+        if age_value >= low and (high is None or age_value < high):
+            return label
+    return "Unknown"
+
+def segment_values(value):
+    """Return the segment labels a single answer belongs to"""
+    if isinstance(value, (list, tuple, set)):
+        labels = sorted({str(v).strip() for v in value if v is not None and str(v).strip()})
+        return labels or ['None']
     
-    # Collect and group adjectives
-    all_positive_A = []
-    all_negative_A = []
-    all_positive_B = []
-    all_negative_B = []
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ['Unknown']
     
-    for idx, row in df.iterrows():
-        try:
-            pos_A = row.get('A_positive_adjectives', [])
-            if isinstance(pos_A, list):
-                all_positive_A.extend(pos_A)
-        except Exception:
-            pass
-        
-        try:
-            neg_A = row.get('A_negative_adjectives', [])
-            if isinstance(neg_A, list):
-                all_negative_A.extend(neg_A)
-        except Exception:
-            pass
-        
-        try:
-            pos_B = row.get('B_positive_adjectives', [])
-            if isinstance(pos_B, list):
-                all_positive_B.extend(pos_B)
-        except Exception:
-            pass
-        
-        try:
-            neg_B = row.get('B_negative_adjectives', [])
-            if isinstance(neg_B, list):
-                all_negative_B.extend(neg_B)
-        except Exception:
-            pass
+    label = str(value).strip()
+    return [label] if label else ['Unknown']
+
+def new_segment_cell(top_k_capacity=None):
+    """Create an empty cube cell holding mergeable sums, counts and counters
     
-    # Group and count
-    pos_A_raw, pos_A_grouped = group_and_count_adjectives(all_positive_A)
-    neg_A_raw, neg_A_grouped = group_and_count_adjectives(all_negative_A)
-    pos_B_raw, pos_B_grouped = group_and_count_adjectives(all_positive_B)
-    neg_B_raw, neg_B_grouped = group_and_count_adjectives(all_negative_B)
+    With top_k_capacity, tag and adjective counts are SpaceSaving summaries
+    of that size instead of Counters (see new_aggregates).
+    """
+    def counts():
+        return SpaceSaving(top_k_capacity) if top_k_capacity else Counter()
     
-    print("\n" + "=" * 80)
-    print("PRODUCT A - ADJECTIVE ANALYSIS")
-    print("=" * 80)
-    print("\nPositive Adjectives (Grouped):")
-    for adj, count in pos_A_grouped.most_common(15):
-        print(f"  {adj}: {count} ({count/len(df)*100:.1f}%)")
+    return {
+        'count': 0,
+        'rating_sums': Counter(),
+        'rating_counts': Counter(),
+        'tags': {'A': counts(), 'B': counts()},
+        'positive_adjectives': {'A': counts(), 'B': counts()},
+        'negative_adjectives': {'A': counts(), 'B': counts()},
+    }
+
+def add_segment_cell(target, cell):
+    """Add the sums, counts and counters of one cube cell into another"""
+    target['count'] += cell['count']
+    target['rating_sums'].update(cell['rating_sums'])
+    target['rating_counts'].update(cell['rating_counts'])
+    for field in ['tags', 'positive_adjectives', 'negative_adjectives']:
+        for variant, counts in cell[field].items():
+            if counts:
+                target[field][variant].update(counts)
+
+def build_segment_cube(df, dimensions=None):
+    """Aggregate ratings, tags and adjectives for every combination of segment values.
     
-    print("\nNegative Adjectives (Grouped):")
-    for adj, count in neg_A_grouped.most_common(15):
-        print(f"  {adj}: {count} ({count/len(df)*100:.1f}%)")
+    Each response is counted once in every cell it belongs to, including the
+    rolled-up cells where one or more dimensions are SEGMENT_ALL, so any slice
+    can later be answered by a single dictionary lookup.
     
-    print("\n" + "=" * 80)
-    print("PRODUCT B - ADJECTIVE ANALYSIS")
-    print("=" * 80)
-    print("\nPositive Adjectives (Grouped):")
-    for adj, count in pos_B_grouped.most_common(15):
-        print(f"  {adj}: {count} ({count/len(df)*100:.1f}%)")
+    Responses are first grouped with pandas into base cells, one per distinct
+    combination of answers (a checkbox answer keeps its whole set of labels).
+    The roll-ups are then derived from those cells one dimension at a time:
+    a base cell is added to each of its labels and to SEGMENT_ALL, so a
+    response with several checkbox labels is still counted once in the total.
+    """
+    if dimensions is None:
+        dimensions = SEGMENT_DIMENSIONS
     
-    print("\nNegative Adjectives (Grouped):")
-    for adj, count in neg_B_grouped.most_common(15):
-        print(f"  {adj}: {count} ({count/len(df)*100:.1f}%)")
+    labels = [
+        [tuple(segment_values(value)) for value in df[dim]] if dim in df.columns
+        else [tuple(segment_values(None))] * len(df)
+        for dim in dimensions
+    ]
+    codes, combinations = pd.factorize(pd.Series(list(zip(*labels)), dtype=object))
+    base = [new_segment_cell() for _ in range(len(combinations))]
     
-    # ========================================================================
-    # TAG EXTRACTION
-    # ========================================================================
+    for cell, count in zip(base, np.bincount(codes, minlength=len(base)).tolist()):
+        cell['count'] = count
     
-    print("\n" + "=" * 80)
-    print("TAG EXTRACTION")
-    print("=" * 80)
+    for pair in COMPARISON_METRICS.values():
+        for col in pair:
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce').astype('float64').groupby(codes)
+            for code, total, count in zip(values.sum().index, values.sum().tolist(), values.count().tolist()):
+                if count:
+                    base[code]['rating_sums'][col] += total
+                    base[code]['rating_counts'][col] += count
     
-    for variant in ['A', 'B']:
-        likes_col = f'{variant}_likes'
-        dislikes_col = f'{variant}_dislikes'
-        feedback_col = f'{variant}_Feedback'
-        
-        if likes_col in df.columns:
-            df[f'{variant}_likes_tags'] = df[likes_col].apply(lambda x: extract_tags(x, TAG_KEYWORDS))
-        else:
-            df[f'{variant}_likes_tags'] = [[] for _ in range(len(df))]
-        
-        if dislikes_col in df.columns:
-            df[f'{variant}_dislikes_tags'] = df[dislikes_col].apply(lambda x: extract_tags(x, TAG_KEYWORDS))
-        else:
-            df[f'{variant}_dislikes_tags'] = [[] for _ in range(len(df))]
-        
-        if feedback_col in df.columns:
-            df[f'{variant}_feedback_tags'] = df[feedback_col].apply(lambda x: extract_tags(x, TAG_KEYWORDS))
-        else:
-            df[f'{variant}_feedback_tags'] = [[] for _ in range(len(df))]
-        
-        df[f'{variant}_all_tags'] = df.apply(
-            lambda row: list(set(
-                row[f'{variant}_likes_tags'] + 
-                row[f'{variant}_dislikes_tags'] + 
-                row[f'{variant}_feedback_tags']
-            )), axis=1
-        )
+    for field, column in [('tags', 'all_tags'), ('positive_adjectives', 'positive_adjectives'),
+                          ('negative_adjectives', 'negative_adjectives')]:
+        for variant in ['A', 'B']:
+            col = f'{variant}_{column}'
+            if col not in df.columns:
+                continue
+            lists = [value if isinstance(value, list) else [] for value in df[col]]
+            exploded = pd.DataFrame({
+                'code': np.repeat(codes, [len(value) for value in lists]),
+                'value': list(itertools.chain.from_iterable(lists)),
+            })
+            for (code, value), count in exploded.value_counts(sort=False).items():
+                base[code][field][variant][value] += int(count)
     
-    tag_freq_A = count_tags(df['A_all_tags'])
-    tag_freq_B = count_tags(df['B_all_tags'])
+    cells = dict(zip(combinations, base))
+    # Dimensions with the most distinct answer sets first: they collapse the most cells early
+    distinct = [len(set(values)) for values in labels]
+    for position in sorted(range(len(dimensions)), key=lambda position: -distinct[position]):
+        rolled = {}
+        for key, cell in cells.items():
+            for label in list(key[position]) + [SEGMENT_ALL]:
+                target_key = key[:position] + (label,) + key[position + 1:]
+                target = rolled.get(target_key)
+                if target is None:
+                    target = rolled[target_key] = new_segment_cell()
+                add_segment_cell(target, cell)
+        cells = rolled
     
-    print("\nProduct A - Top Tags:")
-    for tag, count in tag_freq_A.most_common(10):
-        print(f"  {tag}: {count} ({count/len(df)*100:.1f}%)")
+    return {'dimensions': list(dimensions), 'cells': cells}
+
+def summarize_segment_cell(cell):
+    """Turn a cube cell into rating means, counts, tag and adjective frequencies"""
+    if cell is None:
+        cell = new_segment_cell()
     
-    print("\nProduct B - Top Tags:")
-    for tag, count in tag_freq_B.most_common(10):
-        print(f"  {tag}: {count} ({count/len(df)*100:.1f}%)")
+    rating_means = {
+        col: cell['rating_sums'][col] / count
+        for col, count in cell['rating_counts'].items() if count
+    }
+    return {
+        'count': cell['count'],
+        'rating_means': rating_means,
+        'rating_counts': dict(cell['rating_counts']),
+        'tags': {variant: dict(counts.items()) for variant, counts in cell['tags'].items()},
+        'positive_adjectives': {variant: dict(counts.items())
+                                for variant, counts in cell['positive_adjectives'].items()},
+        'negative_adjectives': {variant: dict(counts.items())
+                                for variant, counts in cell['negative_adjectives'].items()},
+    }
+
+def query_segment_cube(cube, **filters):
+    """Look up a slice of the cube, e.g. query_segment_cube(cube, hasChildren='Yes', occasion='Dinner')"""
+    dimensions = cube['dimensions']
+    unknown = [dim for dim in filters if dim not in dimensions]
+    if unknown:
+        raise ValueError(f"Unknown segment dimension(s): {', '.join(unknown)}")
     
-    # ========================================================================
-    # TAG-RATING CORRELATION
-    # ========================================================================
+    key = tuple(str(filters[dim]) if dim in filters else SEGMENT_ALL for dim in dimensions)
+    return summarize_segment_cell(cube['cells'].get(key))
+
+def segment_dimension_values(cube, dimension):
+    """List the values seen for one dimension of the cube"""
+    position = cube['dimensions'].index(dimension)
+    values = {key[position] for key in cube['cells']}
+    values.discard(SEGMENT_ALL)
+    return sorted(values)
+
+def segment_cube_to_frame(cube):
+    """Flatten the cube into one row per cell for the Excel export"""
+    dimensions = cube['dimensions']
+    rating_columns = [col for pair in COMPARISON_METRICS.values() for col in pair]
+    rows = []
     
-    tag_ratings_A = calculate_tag_ratings(df, 'A')
-    tag_ratings_B = calculate_tag_ratings(df, 'B')
+    for key, cell in cube['cells'].items():
+        summary = summarize_segment_cell(cell)
+        row = dict(zip(dimensions, key))
+        row['Count'] = summary['count']
+        for col in rating_columns:
+            row[f'{col}_mean'] = summary['rating_means'].get(col, np.nan)
+        for variant in ['A', 'B']:
+            # Ties broken by tag so merge order (e.g. pipelined batches) cannot change the cell
+            top_tags = sorted(summary['tags'][variant].items(), key=lambda item: (-item[1], item[0]))[:5]
+            row[f'Top_Tags_{variant}'] = ', '.join(f"{tag} ({count})" for tag, count in top_tags)
+        rows.append(row)
     
-    print("\n" + "=" * 80)
-    print("TAG vs RATING CORRELATION")
-    print("=" * 80)
+    frame = pd.DataFrame(rows)
+    if not frame.empty:
+        # Ties ordered by segment so the row order does not depend on merge order
+        frame = frame.sort_values(['Count'] + list(dimensions), ascending=[False] + [True] * len(dimensions),
+                                  kind='stable').reset_index(drop=True)
+    return frame
+
+def save_segment_cube(cube, path):
+    """Write the cube to a JSON file so slices can be looked up without rerunning the analysis"""
+    cells = []
+    for key, cell in cube['cells'].items():
+        cells.append({'key': list(key), **summarize_segment_cell(cell), 'rating_sums': dict(cell['rating_sums'])})
     
-    print("\nProduct A - Tags with Highest Taste Ratings:")
-    sorted_A = sorted(tag_ratings_A.items(), key=lambda x: x[1], reverse=True)[:10]
-    for tag, rating in sorted_A:
-        print(f"  {tag}: {rating:.2f}")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'dimensions': cube['dimensions'], 'cells': cells}, f)
+
+def load_segment_cube(path):
+    """Read a cube written by save_segment_cube"""
+    with open(path, encoding='utf-8') as f:
+        stored = json.load(f)
     
-    print("\nProduct B - Tags with Highest Taste Ratings:")
-    sorted_B = sorted(tag_ratings_B.items(), key=lambda x: x[1], reverse=True)[:10]
-    for tag, rating in sorted_B:
-        print(f"  {tag}: {rating:.2f}")
+    cells = {}
+    for stored_cell in stored['cells']:
+        cell = new_segment_cell()
+        cell['count'] = stored_cell['count']
+        cell['rating_sums'].update(stored_cell['rating_sums'])
+        cell['rating_counts'].update(stored_cell['rating_counts'])
+        for field in ['tags', 'positive_adjectives', 'negative_adjectives']:
+            for variant, counts in stored_cell[field].items():
+                cell[field][variant].update(counts)
+        cells[tuple(stored_cell['key'])] = cell
     
-    # ========================================================================
-    # COOKING METHOD ANALYSIS
-    # ========================================================================
+    return {'dimensions': stored['dimensions'], 'cells': cells}
+
+# ============================================================================
+# TIME TRENDS
+# ============================================================================
+
+# Metrics whose daily/weekly means are tracked
+TREND_METRICS = [col for pair in COMPARISON_METRICS.values() for col in pair]
+
+# Days in the rolling window of the daily trend table
+TREND_WINDOW_DAYS = 7
+
+# Responses submitted up to this long before the newest stored one are read
+# again by every trend store update, to pick up answers inserted after their
+# response row; their earlier contribution is replaced, not added twice
+TREND_OVERLAP = pd.Timedelta(days=2)
+
+def response_time(response):
+    """Submission time of a response dict (submitted_at, else timestamp) in UTC, or None"""
+    for field in ['submitted_at', 'timestamp']:
+        value = response.get(field)
+        if value:
+            parsed = pd.to_datetime(value, errors='coerce', utc=True)
+            if not pd.isna(parsed):
+                return parsed
+    return None
+
+def is_after(time_value, since):
+    """True if time_value is known and later than since (naive times are UTC)"""
+    return time_value is not None and time_value > pd.to_datetime(since, utc=True)
+
+def response_days(df):
+    """Submission day (YYYY-MM-DD, UTC) of every response; NaN when unknown"""
+    times = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns, UTC]')
+    for field in ['submitted_at', 'timestamp']:
+        if field in df.columns:
+            parsed = pd.to_datetime(df[field].astype(object), errors='coerce', utc=True, format='ISO8601')
+            times = times.fillna(parsed)
+    return times.dt.strftime('%Y-%m-%d'), times
+
+def new_trend_bucket():
+    """Create an empty per-day bucket of mergeable counts and sums"""
+    return {
+        'responses': 0,
+        'metric_sums': Counter(),
+        'metric_counts': Counter(),
+        'tags': {'A': Counter(), 'B': Counter()},
+    }
+
+def new_trends():
+    """Create empty trend aggregates: one bucket per submission day"""
+    return {'days': {}, 'undated': 0, 'last_submitted_at': None}
+
+def trend_buckets(df):
+    """Per-day buckets for a prepared batch of responses"""
+    trends = new_trends()
+    days, times = response_days(df)
+    trends['undated'] = int(days.isna().sum())
+    if times.notna().any():
+        trends['last_submitted_at'] = times.max().isoformat()
     
-    if 'cookingMethod' in df.columns:
-        df['cookingMethod_normalized'] = df['cookingMethod'].apply(normalize_cooking_method)
-        
-        print("\n" + "=" * 80)
-        print("COOKING METHOD ANALYSIS")
-        print("=" * 80)
-        
-        cooking_summary = df.groupby('cookingMethod_normalized').agg({
-            'A_taste': 'mean',
-            'B_taste': 'mean',
-            'fullName': 'count'
-        }).round(2)
-        cooking_summary.columns = ['A Avg Taste', 'B Avg Taste', 'Count']
-        cooking_summary = cooking_summary.sort_values('Count', ascending=False)
-        print("\n", cooking_summary)
+    for day, group in df.groupby(days):
+        bucket = new_trend_bucket()
+        bucket['responses'] = len(group)
+        for col in TREND_METRICS:
+            if col in group.columns:
+                values = pd.to_numeric(group[col], errors='coerce')
+                bucket['metric_sums'][col] += float(values.sum())
+                bucket['metric_counts'][col] += int(values.count())
+        for variant in ['A', 'B']:
+            tags_col = f'{variant}_all_tags'
+            if tags_col in group.columns:
+                bucket['tags'][variant] = count_tags(group[tags_col])
+        trends['days'][day] = bucket
     
-    # ========================================================================
-    # SENTIMENT ANALYSIS
-    # ========================================================================
+    return trends
+
+def response_trend_bucket(response):
+    """What a single prepared response dict adds to its day bucket"""
+    bucket = new_trend_bucket()
+    bucket['responses'] = 1
+    for col in TREND_METRICS:
+        value = to_float(response.get(col))
+        if not np.isnan(value):
+            bucket['metric_sums'][col] += value
+            bucket['metric_counts'][col] += 1
+    for variant in ['A', 'B']:
+        tags = response.get(f'{variant}_all_tags')
+        if isinstance(tags, list):
+            bucket['tags'][variant].update(tags)
+    return bucket
+
+def add_trend_bucket(target, bucket, sign=1):
+    """Add (sign=1) or remove (sign=-1) one bucket's counts and sums from another"""
+    target['responses'] += sign * bucket['responses']
+    for field in ['metric_sums', 'metric_counts']:
+        for col, value in bucket[field].items():
+            target[field][col] += sign * value
+    for variant, counts in bucket['tags'].items():
+        for tag, count in counts.items():
+            target['tags'][variant][tag] += sign * count
+    if sign < 0:
+        for col in [col for col, count in target['metric_counts'].items() if count <= 0]:
+            del target['metric_counts'][col]
+            target['metric_sums'].pop(col, None)
+        for counts in target['tags'].values():
+            for tag in [tag for tag, count in counts.items() if count <= 0]:
+                del counts[tag]
+
+def merge_trends(total, partial):
+    """Add per-day buckets into a running total; only the days in partial are touched"""
+    for day, bucket in partial['days'].items():
+        target = total['days'].get(day)
+        if target is None:
+            total['days'][day] = bucket
+            continue
+        target['responses'] += bucket['responses']
+        target['metric_sums'].update(bucket['metric_sums'])
+        target['metric_counts'].update(bucket['metric_counts'])
+        for variant, counts in bucket['tags'].items():
+            target['tags'][variant].update(counts)
     
-    df['A_sentiment'] = df.apply(lambda x: calculate_sentiment(x.get('A_likes', ''), x.get('A_dislikes', '')), axis=1)
-    df['B_sentiment'] = df.apply(lambda x: calculate_sentiment(x.get('B_likes', ''), x.get('B_dislikes', '')), axis=1)
+    total['undated'] += partial['undated']
+    latest = [t for t in [total['last_submitted_at'], partial['last_submitted_at']] if t]
+    total['last_submitted_at'] = max(latest, key=lambda t: pd.to_datetime(t, utc=True)) if latest else None
+    return total
+
+def trend_sums_frame(trends):
+    """Calendar-day frame of bucket sums (empty days are zero rows)"""
+    if not trends['days']:
+        return pd.DataFrame()
     
-    print("\n" + "=" * 80)
-    print("SENTIMENT DISTRIBUTION")
-    print("=" * 80)
-    print("\nProduct A:")
-    print(df['A_sentiment'].value_counts())
-    print("\nProduct B:")
-    print(df['B_sentiment'].value_counts())
+    rows = {}
+    for day, bucket in trends['days'].items():
+        row = {'responses': bucket['responses']}
+        for col in TREND_METRICS:
+            row[f'sum:{col}'] = bucket['metric_sums'][col]
+            row[f'n:{col}'] = bucket['metric_counts'][col]
+        for variant, counts in bucket['tags'].items():
+            for tag, count in counts.items():
+                row[f'tag:{variant}_{tag}'] = count
+        rows[pd.Timestamp(day)] = row
     
-    # ========================================================================
-    # COMPARISON METRICS
-    # ========================================================================
+    sums = pd.DataFrame.from_dict(rows, orient='index').fillna(0).sort_index()
+    calendar = pd.date_range(sums.index.min(), sums.index.max(), freq='D')
+    return sums.reindex(calendar, fill_value=0)
+
+def trend_table(sums):
+    """Means and tag rates from (possibly windowed) bucket sums"""
+    table = pd.DataFrame(index=sums.index)
+    table['Responses'] = sums['responses'].astype(int)
+    responses = sums['responses'].replace(0, np.nan)
+    for col in TREND_METRICS:
+        if f'n:{col}' in sums.columns:
+            table[col] = sums[f'sum:{col}'] / sums[f'n:{col}'].replace(0, np.nan)
+    for col in sorted(c for c in sums.columns if c.startswith('tag:')):
+        table[f"{col[4:]}_rate"] = sums[col] / responses
+    return table.dropna(axis=1, how='all')
+
+def trend_frames(trends, window=TREND_WINDOW_DAYS):
+    """Daily (with rolling window) and weekly trend tables from per-day buckets.
     
-    print("\n" + "=" * 80)
-    print("A vs B COMPARISON")
-    print("=" * 80)
+    Rolling and weekly figures are sums of the daily buckets divided
+    afterwards, so they are exact response-weighted means, and they only
+    depend on the buckets - no response is revisited.
+    """
+    sums = trend_sums_frame(trends)
+    if sums.empty:
+        return {'daily': pd.DataFrame(), 'weekly': pd.DataFrame()}
     
-    comparison_metrics = {
-        'Taste': ('A_taste', 'B_taste'),
-        'Appearance': ('A_appearance', 'B_appearance'),
-        'Self Relevance': ('A_selfRelevance', 'B_selfRelevance'),
-        'Met Expectations': ('A_expectation', 'B_expectation'),
-    }
+    daily = trend_table(sums)
+    rolling = trend_table(sums.rolling(window, min_periods=1).sum())
+    for col in ['A_taste', 'B_taste', 'Responses']:
+        if col in rolling.columns:
+            daily[f'{col}_{window}d'] = rolling[col]
+    rate_columns = [col for col in rolling.columns if col.endswith('_rate')]
+    daily = daily.join(rolling[rate_columns].add_suffix(f'_{window}d'))
+    daily.index.name = 'Day'
     
-    comparison_df = pd.DataFrame()
-    for metric_name, (col_a, col_b) in comparison_metrics.items():
-        if col_a in df.columns and col_b in df.columns:
-            comparison_df[metric_name] = [
-                df[col_a].mean(),
-                df[col_b].mean(),
-                df[col_b].mean() - df[col_a].mean()
-            ]
+    weekly = trend_table(sums.resample('W-MON', label='left', closed='left').sum())
+    weekly.index.name = 'Week starting'
     
-    if not comparison_df.empty:
-        comparison_df.index = ['Product A', 'Product B', 'Difference (B-A)']
-        print("\n", comparison_df.round(2))
+    return {'daily': daily, 'weekly': weekly}
+
+def trend_bucket_to_json(bucket):
+    """JSON-serializable form of one day bucket"""
+    return {
+        'responses': bucket['responses'],
+        'metric_sums': dict(bucket['metric_sums']),
+        'metric_counts': dict(bucket['metric_counts']),
+        'tags': {variant: dict(counts) for variant, counts in bucket['tags'].items()},
+    }
+
+def trend_bucket_from_json(data):
+    """Inverse of trend_bucket_to_json"""
+    return {
+        'responses': data['responses'],
+        'metric_sums': Counter(data['metric_sums']),
+        'metric_counts': Counter(data['metric_counts']),
+        'tags': {variant: Counter(counts) for variant, counts in data['tags'].items()},
+    }
+
+def trends_to_json(trends):
+    """JSON-serializable form of trend aggregates"""
+    return {
+        'days': {day: trend_bucket_to_json(bucket) for day, bucket in sorted(trends['days'].items())},
+        'undated': trends['undated'],
+        'last_submitted_at': trends['last_submitted_at'],
+    }
+
+def trends_from_json(data):
+    """Inverse of trends_to_json"""
+    trends = new_trends()
+    trends['undated'] = data.get('undated', 0)
+    trends['last_submitted_at'] = data.get('last_submitted_at')
+    for day, bucket in data.get('days', {}).items():
+        trends['days'][day] = trend_bucket_from_json(bucket)
+    return trends
+
+def update_trend_store(path, chunk_size=1000, input_path=None, use_documents=False, tag_matcher=None):
+    """Add responses submitted since the store's last update to its day buckets.
     
-    # ========================================================================
-    # VISUALIZATIONS
-    # ========================================================================
+    Only responses newer than last_submitted_at minus TREND_OVERLAP are
+    fetched (the database query filters on submitted_at), only their tags
+    are extracted, and only the buckets of their days change. The store
+    keeps what each response of that overlap window contributed, keyed by
+    response_key, so a response read again is only counted once; if its
+    answers changed meanwhile, its old contribution is replaced. Undated
+    responses cannot be placed incrementally and are only counted.
+    """
+    store = Path(path)
+    data = {}
+    if store.exists():
+        with open(store, encoding='utf-8') as f:
+            data = json.load(f)
+    trends = trends_from_json(data)
+    # response_key -> (day, submission time, bucket) for the overlap window of the last update
+    stored_recent = {key: (entry['day'], pd.to_datetime(entry['submitted_at'], utc=True),
+                           trend_bucket_from_json(entry['bucket']))
+                     for key, entry in data.get('recent', {}).items()}
+    # ... and for the responses read by this update
+    recent = {}
     
+    latest = pd.to_datetime(trends['last_submitted_at'], utc=True) if trends['last_submitted_at'] else None
+    since = None
+    if latest is not None:
+        # Naive UTC, matching how naive submitted_at values are read
+        since = (latest - TREND_OVERLAP).tz_convert(None).isoformat()
+    print(f"Updating trend store {path} with responses submitted after {since or 'the beginning'}")
+    
+    touched = set()
+    added = updated = 0
+    for records in iter_response_chunks(chunk_size, input_path, use_documents, since=since):
+        chunk = records_to_frame(records)
+        add_tag_columns(chunk, tag_matcher=tag_matcher)
+        days, times = response_days(chunk)
+        
+        for key, day, time_value, response in zip(frame_response_keys(chunk), days, times,
+                                                  chunk.to_dict('records')):
+            if pd.isna(time_value):
+                trends['undated'] += 1
+                added += 1
+                continue
+            
+            bucket = response_trend_bucket(response)
+            previous = stored_recent.pop(key, None)
+            if previous is not None:
+                previous_day, _, previous_bucket = previous
+                if previous_day == day and previous_bucket == bucket:
+                    recent[key] = previous
+                    continue
+                add_trend_bucket(trends['days'][previous_day], previous_bucket, sign=-1)
+                touched.add(previous_day)
+                updated += 1
+            else:
+                added += 1
+            
+            add_trend_bucket(trends['days'].setdefault(day, new_trend_bucket()), bucket)
+            touched.add(day)
+            recent[key] = (day, time_value, bucket)
+            if latest is None or time_value > latest:
+                latest = time_value
+        
+        # A response is read once per update, so only the next update's overlap window is kept
+        if latest is not None:
+            cutoff = latest - TREND_OVERLAP
+            recent = {key: entry for key, entry in recent.items() if entry[1] > cutoff}
+    
+    if latest is not None:
+        cutoff = latest - TREND_OVERLAP
+        recent.update((key, entry) for key, entry in stored_recent.items() if entry[1] > cutoff)
+    trends['last_submitted_at'] = latest.isoformat() if latest is not None else None
+    stored = trends_to_json(trends)
+    stored['recent'] = {key: {'day': day, 'submitted_at': time_value.isoformat(),
+                              'bucket': trend_bucket_to_json(bucket)}
+                        for key, (day, time_value, bucket) in recent.items()}
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(stored, f)
+    os.replace(temp_path, path)
+    
+    print(f"[OK] {added} new and {updated} changed responses, {len(touched)} day buckets updated "
+          f"({len(trends['days'])} days stored, {trends['undated']} undated responses)")
+    return trends
+
+def report_trends(trends, weeks=12):
+    """Print the most recent weekly trend rows"""
+    weekly = trends['weekly']
+    print("\n" + "=" * 80)
+    print("WEEKLY TRENDS")
+    print("=" * 80)
+    if weekly.empty:
+        print("No dated responses")
+        return
+    columns = [col for col in ['Responses', 'A_taste', 'B_taste'] if col in weekly.columns]
+    rates = weekly[[col for col in weekly.columns if col.endswith('_rate')]]
+    top_rates = rates.mean().sort_values(ascending=False).index[:4].tolist()
+    print(weekly[columns + top_rates].tail(weeks).round(2).to_string())
+
+# ============================================================================
+# FEEDBACK TOPIC CLUSTERING
+# ============================================================================
+
+FEEDBACK_COLUMNS = ['A_Feedback', 'B_Feedback']
+
+# Rows fed to the topic model per partial_fit when the whole dataset is in memory
+TOPIC_BATCH_SIZE = 10000
+
+class FeedbackTopicModel:
+    """Incremental TF-IDF + mini-batch k-means over free-text feedback.
+    
+    Terms (words and word pairs) are hashed into a fixed number of features,
+    document frequencies are counted as batches arrive, and each batch is
+    weighted with the IDF known so far before updating the clusters with
+    MiniBatchKMeans.partial_fit. The model itself is bounded by n_features
+    and n_clusters, not by the number of comments, so it can be updated
+    with new batches (and saved/loaded between runs) indefinitely.
+    
+    The response_key of every response fitted is kept in seen_keys, so a
+    rerun over the same source only fits the comments of new responses.
+    
+    Cluster sizes and rating sums are recorded with the cluster each comment
+    was assigned to when its batch was processed.
+    """
+    
+    def __init__(self, n_clusters=8, n_features=2 ** 17, random_state=0):
+        from sklearn.feature_extraction import FeatureHasher
+        from sklearn.cluster import MiniBatchKMeans
+        
+        self.n_clusters = n_clusters
+        self.n_features = n_features
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string', alternate_sign=False)
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+        self.document_frequencies = np.zeros(n_features, dtype=np.int64)
+        self.documents = 0
+        self.fitted = False
+        # Name of one term per hashed feature, for reporting top terms
+        self.feature_terms = {}
+        # Comments held back until there are enough to initialise n_clusters
+        self.pending = []
+        self.seen_keys = set()
+        # Occurrences of each response_key in this run, to tell identical file records apart
+        self.occurrences = Counter()
+        self.reset_cluster_stats()
+    
+    def reset_cluster_stats(self):
+        """Zero the per-cluster comment counts and rating sums"""
+        self.cluster_counts = np.zeros(self.n_clusters, dtype=np.int64)
+        self.variant_counts = {variant: np.zeros(self.n_clusters, dtype=np.int64) for variant in ['A', 'B']}
+        self.rating_sums = {metric: np.zeros(self.n_clusters) for metric in COMPARISON_METRICS}
+        self.rating_counts = {metric: np.zeros(self.n_clusters, dtype=np.int64) for metric in COMPARISON_METRICS}
+    
+    @staticmethod
+    def analyze(text):
+        """Split cleaned text into content words and adjacent word pairs"""
+        words = [w for w in clean_text(text).split()
+                 if len(w) > 2 and w not in stop_words and not w.isdigit()]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    
+    def name_features(self, term_lists):
+        """Remember a readable term for each feature seen in the batch"""
+        terms = list({term for terms in term_lists for term in terms})
+        if not terms:
+            return
+        hashed = self.hasher.transform([[term] for term in terms]).tocsr()
+        for term, feature in zip(terms, hashed.indices):
+            self.feature_terms.setdefault(int(feature), term)
+    
+    def tfidf(self, counts):
+        """Weight a hashed count matrix with the current IDF and L2-normalise rows"""
+        idf = np.log((1 + self.documents) / (1 + self.document_frequencies)) + 1
+        weighted = counts.multiply(idf).tocsr()
+        weighted.data = weighted.data.astype(np.float64)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ weighted
+    
+    def partial_fit(self, comments):
+        """Update the model with a batch of (text, variant, {metric: rating}) comments"""
+        comments = self.pending + [c for c in comments if self.analyze(c[0])]
+        if not comments or (len(comments) < self.n_clusters and not self.fitted):
+            self.pending = comments
+            return
+        self.pending = []
+        
+        term_lists = [self.analyze(text) for text, _, _ in comments]
+        self.name_features(term_lists)
+        counts = self.hasher.transform(term_lists).tocsr()
+        
+        present = counts.copy()
+        present.data[:] = 1
+        self.document_frequencies += np.asarray(present.sum(axis=0)).ravel().astype(np.int64)
+        self.documents += counts.shape[0]
+        
+        matrix = self.tfidf(counts)
+        self.kmeans.partial_fit(matrix)
+        self.fitted = True
+        
+        labels = self.kmeans.predict(matrix)
+        for label, (_, variant, ratings) in zip(labels, comments):
+            self.cluster_counts[label] += 1
+            self.variant_counts[variant][label] += 1
+            for metric, value in ratings.items():
+                if not np.isnan(value):
+                    self.rating_sums[metric][label] += float(value)
+                    self.rating_counts[metric][label] += 1
+    
+    def new_rows(self, df):
+        """Mask of the rows whose response the model has not been fitted with yet"""
+        new = np.zeros(len(df), dtype=bool)
+        for position, base_key in enumerate(frame_response_keys(df)):
+            key = f"{base_key}#{self.occurrences[base_key]}"
+            self.occurrences[base_key] += 1
+            if key not in self.seen_keys:
+                self.seen_keys.add(key)
+                new[position] = True
+        return new
+    
+    def partial_fit_frame(self, df):
+        """Update the model with the feedback comments of the new responses of a DataFrame"""
+        df = df[self.new_rows(df)]
+        comments = []
+        for variant, feedback_col in zip(['A', 'B'], FEEDBACK_COLUMNS):
+            if feedback_col not in df.columns:
+                continue
+            rating_cols = {metric: cols[0 if variant == 'A' else 1]
+                           for metric, cols in COMPARISON_METRICS.items()}
+            rating_cols = {metric: col for metric, col in rating_cols.items() if col in df.columns}
+            for idx, text in df[feedback_col].items():
+                if not isinstance(text, str) or not text.strip():
+                    continue
+                ratings = {metric: to_float(df.at[idx, col]) for metric, col in rating_cols.items()}
+                comments.append((text, variant, ratings))
+        self.partial_fit(comments)
+    
+    def finish(self):
+        """Fit whatever is still pending, shrinking the cluster count if there were too few comments"""
+        if self.fitted or not self.pending:
+            return
+        if len(self.pending) < self.n_clusters:
+            from sklearn.cluster import MiniBatchKMeans
+            self.n_clusters = len(self.pending)
+            self.kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=self.kmeans.random_state, n_init=3)
+            self.reset_cluster_stats()
+        self.partial_fit([])
+    
+    def top_terms(self, cluster, n=8):
+        """Highest-weighted named terms of a cluster centre"""
+        centre = self.kmeans.cluster_centers_[cluster]
+        terms = []
+        for feature in np.argsort(centre)[::-1]:
+            if centre[feature] <= 0 or len(terms) >= n:
+                break
+            term = self.feature_terms.get(int(feature))
+            if term is not None:
+                terms.append(term)
+        return terms
+    
+    def summary_frame(self, n_terms=8):
+        """One row per cluster: size, size per product, top terms and mean ratings"""
+        self.finish()
+        if not self.fitted:
+            return pd.DataFrame()
+        
+        rows = []
+        for cluster in range(self.n_clusters):
+            row = {
+                'Cluster': cluster,
+                'Comments': int(self.cluster_counts[cluster]),
+                'Comments_A': int(self.variant_counts['A'][cluster]),
+                'Comments_B': int(self.variant_counts['B'][cluster]),
+                'Top_Terms': ', '.join(self.top_terms(cluster, n_terms)),
+            }
+            for metric in COMPARISON_METRICS:
+                count = self.rating_counts[metric][cluster]
+                row[f'Mean_{metric}'] = self.rating_sums[metric][cluster] / count if count else np.nan
+            rows.append(row)
+        
+        return pd.DataFrame(rows).sort_values('Comments', ascending=False).reset_index(drop=True)
+    
+    def save(self, path):
+        """Pickle the model so later runs can keep updating it"""
+        import pickle
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+    
+    @staticmethod
+    def load(path):
+        """Load a model written by save"""
+        import pickle
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        model.occurrences = Counter()
+        return model
+
+def report_topics(topics):
+    """Print the feedback topic clusters"""
+    print("\n" + "=" * 80)
+    print("FEEDBACK TOPICS")
+    print("=" * 80)
+    
+    if topics.empty:
+        print("Not enough feedback to cluster")
+        return
+    
+    for _, row in topics.iterrows():
+        ratings = ', '.join(f"{metric} {row[f'Mean_{metric}']:.2f}"
+                            for metric in COMPARISON_METRICS if not pd.isna(row[f'Mean_{metric}']))
+        print(f"\nTopic {row['Cluster']} ({row['Comments']} comments: {row['Comments_A']} A, {row['Comments_B']} B)")
+        print(f"  Terms: {row['Top_Terms']}")
+        if ratings:
+            print(f"  Mean ratings: {ratings}")
+
+# ============================================================================
+# DUPLICATE / SPAM DETECTION
+# ============================================================================
+
+# Free-text answers compared when looking for copy-pasted submissions
+DUPLICATE_COLUMNS = ['fullName', 'A_likes', 'A_dislikes', 'A_Feedback', 'B_likes', 'B_dislikes', 'B_Feedback']
+
+class DuplicateDetector:
+    """Flag near-duplicate submissions with MinHash signatures and LSH banding.
+    
+    Each submission's free text (plus name) is shingled into character
+    5-grams and summarised by num_perm MinHash values. The signature is cut
+    into bands; submissions sharing any band land in the same bucket and
+    become candidate pairs, so candidates are found in roughly linear time
+    instead of comparing all pairs. Candidates are confirmed when their
+    estimated Jaccard similarity reaches threshold.
+    
+    The oldest submission of a group is kept; later ones get is_duplicate.
+    Each call handles its rows in submission-time order, and state is kept
+    between calls, so duplicates are also found across chunks as long as the
+    chunks arrive oldest first (as the database queries return them).
+    Submissions with less than min_chars of text are never flagged.
+    """
+    
+    MERSENNE_PRIME = (1 << 61) - 1
+    
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=5, min_chars=20, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_chars = min_chars
+        
+        rng = np.random.default_rng(seed)
+        # Kept below 2**31 so a * hash + b stays inside uint64 for 32-bit hashes
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = {}
+        self.group_of = {}
+        self.position = 0
+    
+    def submission_texts(self, df):
+        """Cleaned text of the compared columns, one string per response"""
+        columns = [df[col].map(clean_text) for col in DUPLICATE_COLUMNS if col in df.columns]
+        if not columns:
+            return [''] * len(df)
+        return [' | '.join(parts) for parts in zip(*columns)]
+    
+    def signature(self, text):
+        """MinHash signature of the character shingles of text"""
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % np.uint64(self.MERSENNE_PRIME)
+        return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    
+    def band_keys(self, signature):
+        """One hashable key per LSH band"""
+        r = self.rows_per_band
+        return [signature[band * r:(band + 1) * r].tobytes() for band in range(self.bands)]
+    
+    def flag(self, df):
+        """Add is_duplicate and duplicate_group columns to df in place.
+        
+        duplicate_group is the position (in submission order) of the first
+        submission of the group, or NaN when the row has no near-duplicate.
+        When that first submission was in an earlier chunk, its membership is
+        recorded in group_of and counted by group_sizes.
+        """
+        is_duplicate = np.zeros(len(df), dtype=bool)
+        duplicate_group = np.full(len(df), np.nan)
+        first_position = self.position
+        
+        _, times = response_days(df)
+        order = times.reset_index(drop=True).sort_values(kind='stable', na_position='last').index.to_numpy()
+        texts = self.submission_texts(df)
+        
+        for i in order:
+            text = texts[i]
+            position = self.position
+            self.position += 1
+            
+            if len(text.replace('|', '').replace(' ', '')) < self.min_chars:
+                continue
+            
+            signature = self.signature(text)
+            keys = self.band_keys(signature)
+            
+            best, best_similarity = None, self.threshold
+            for band, key in enumerate(keys):
+                for candidate in self.buckets[band].get(key, ()):
+                    similarity = float(np.mean(self.signatures[candidate] == signature))
+                    if similarity >= best_similarity and (best is None or similarity > best_similarity):
+                        best, best_similarity = candidate, similarity
+            
+            if best is not None:
+                group = self.group_of.get(best, best)
+                self.group_of[group] = group
+                self.group_of[position] = group
+                is_duplicate[i] = True
+                duplicate_group[i] = group
+                if group >= first_position:
+                    duplicate_group[order[group - first_position]] = group
+                # The group's first submission is already in the buckets
+                continue
+            
+            self.signatures[position] = signature
+            for band, key in enumerate(keys):
+                self.buckets[band][key].append(position)
+        
+        df['is_duplicate'] = is_duplicate
+        df['duplicate_group'] = pd.Series(duplicate_group, index=df.index).astype('Int64')
+        return int(is_duplicate.sum())
+    
+    def group_sizes(self):
+        """Submissions per duplicate group seen so far, first submissions included"""
+        return Counter(self.group_of.values())
+
+def report_duplicate_groups(duplicate_detector):
+    """Print the duplicate groups found while streaming, when there are any"""
+    sizes = duplicate_detector.group_sizes()
+    if sizes:
+        print(f"  Duplicate groups: {len(sizes)} (largest has {max(sizes.values())} submissions)")
+
+def report_duplicates(df, flagged):
+    """Print how many rows were flagged and how they shift the taste ratings"""
+    print("\n" + "=" * 80)
+    print("DUPLICATE DETECTION")
+    print("=" * 80)
+    print(f"Near-duplicate submissions flagged: {flagged} of {len(df)}")
+    
+    if not flagged:
+        return
+    
+    groups = df.loc[df['duplicate_group'].notna(), 'duplicate_group'].value_counts()
+    print(f"Duplicate groups: {len(groups)} (largest has {groups.iloc[0]} submissions)")
+    
+    kept = df[~df['is_duplicate']]
+    for col in ['A_taste', 'B_taste']:
+        if col in df.columns:
+            all_mean = pd.to_numeric(df[col], errors='coerce').mean()
+            kept_mean = pd.to_numeric(kept[col], errors='coerce').mean()
+            print(f"  {col}: {all_mean:.2f} with duplicates, {kept_mean:.2f} without")
+
+# ============================================================================
+# APPROXIMATE TOP-K COUNTING
+# ============================================================================
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary holding at most capacity items.
+    
+    Counts arrive as (exact) Counters, e.g. one chunk's aggregates, and are
+    merged into the summary; only the capacity largest counts are kept.
+    Error bounds, with N the total number of occurrences added:
+    
+    - every stored count overestimates the true count by at most its
+      recorded error, and every error is at most N / capacity;
+    - an item that is not stored occurred at most min_count times
+      (min_count <= N / capacity);
+    - so every item occurring more than N / capacity times is stored.
+    
+    Memory stays at capacity items however many responses are processed.
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+    
+    def min_count(self):
+        """Largest possible count of an item that is not stored"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+    
+    def update(self, counts):
+        """Merge a Counter (or iterable of items) into the summary"""
+        if not isinstance(counts, dict):
+            counts = Counter(counts)
+        
+        floor = self.min_count()
+        for item, count in counts.items():
+            if count <= 0:
+                continue
+            self.total += count
+            if item in self.counts:
+                self.counts[item] += count
+            else:
+                # The item may have been evicted earlier with up to floor occurrences
+                self.counts[item] = count + floor
+                self.errors[item] = floor
+        
+        if len(self.counts) > self.capacity:
+            kept = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:self.capacity]
+            self.counts = dict(kept)
+            self.errors = {item: self.errors.get(item, 0) for item in self.counts}
+    
+    def items(self):
+        return self.counts.items()
+    
+    def most_common(self, n=None):
+        return Counter(self.counts).most_common(n)
+    
+    def to_counter(self):
+        """Estimated counts as a Counter"""
+        return Counter(self.counts)
+    
+    def guaranteed_top(self, k):
+        """How many of the top k items are certain to be the true top items, in order"""
+        ranked = self.most_common()
+        guaranteed = 0
+        for i, (item, count) in enumerate(ranked[:k]):
+            next_count = ranked[i + 1][1] if i + 1 < len(ranked) else self.min_count()
+            if count - self.errors.get(item, 0) < next_count:
+                break
+            guaranteed += 1
+        return guaranteed
+    
+    def bounds(self, k=10):
+        """Error bounds of the summary, for reporting"""
+        return {
+            'capacity': self.capacity,
+            'stored': len(self.counts),
+            'occurrences': self.total,
+            'max_error': max(self.errors.values(), default=0),
+            'error_bound': self.total / self.capacity if self.capacity else 0,
+            'unstored_max': self.min_count(),
+            'guaranteed_top': self.guaranteed_top(k),
+            'top_k': k,
+        }
+
+# ============================================================================
+# MEMORY MANAGEMENT (LOW-MEMORY MODE)
+# ============================================================================
+
+# Rating questions (1-9 or 1-5 scales) asked for both products
+RATING_QUESTIONS = ['taste', 'appearance', 'selfRelevance', 'kidsRelevance', 'expectation', 'SelfRelevance']
+
+# Columns holding a small set of repeated strings
+CATEGORICAL_COLUMNS = ['hasChildren', 'cookingMethod', 'cookingMethod_normalized', 'age_bucket',
+                       'A_sentiment', 'B_sentiment']
+
+def dataframe_memory_mb(df):
+    """Deep memory usage of a DataFrame in megabytes"""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def report_memory(df, label):
+    """Print the current memory footprint of the DataFrame"""
+    memory_mb = dataframe_memory_mb(df)
+    print(f"[MEMORY] {label}: {memory_mb:.3f} MB ({len(df.columns)} columns)")
+    return memory_mb
+
+def downcast_ratings(df):
+    """Store rating columns as nullable int8 (ratings are small whole numbers)"""
+    for variant in ['A', 'B']:
+        for question in RATING_QUESTIONS:
+            col = f'{variant}_{question}'
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors='coerce')
+            present = values.dropna()
+            if present.empty or ((present == present.round()) & present.between(-128, 127)).all():
+                df[col] = values.astype('Int8')
+    return df
+
+def categorize_columns(df, columns=None):
+    """Store repeated string columns as pandas categoricals"""
+    if columns is None:
+        columns = CATEGORICAL_COLUMNS
+    for col in columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+def evict_columns(df, columns):
+    """Drop intermediate columns in place once their aggregates have been computed"""
+    present = [col for col in columns if col in df.columns]
+    if present:
+        df.drop(columns=present, inplace=True)
+    return present
+
+
+# ============================================================================
+# PIPELINE STAGES
+# ============================================================================
+
+TEXT_COLUMNS = ['A_likes', 'A_dislikes', 'A_Feedback', 'B_likes', 'B_dislikes', 'B_Feedback']
+
+# Derived columns that are only needed until aggregate_responses has run
+AGGREGATED_COLUMNS = [
+    f'{variant}_{field}'
+    for variant in ['A', 'B']
+    for field in ['likes_adjectives', 'dislikes_adjectives', 'positive_adjectives',
+                  'negative_adjectives', 'all_tags']
+]
+
+def add_tag_columns(df, low_memory=False, tag_matcher=None):
+    """Add the {variant}_*_tags and {variant}_all_tags columns to df in place"""
+    for variant in ['A', 'B']:
+        likes_col = f'{variant}_likes'
+        dislikes_col = f'{variant}_dislikes'
+        feedback_col = f'{variant}_Feedback'
+        
+        if likes_col in df.columns:
+            df[f'{variant}_likes_tags'] = df[likes_col].apply(lambda x: extract_tags(x, TAG_KEYWORDS, tag_matcher))
+        else:
+            df[f'{variant}_likes_tags'] = [[] for _ in range(len(df))]
+        
+        if dislikes_col in df.columns:
+            df[f'{variant}_dislikes_tags'] = df[dislikes_col].apply(lambda x: extract_tags(x, TAG_KEYWORDS, tag_matcher))
+        else:
+            df[f'{variant}_dislikes_tags'] = [[] for _ in range(len(df))]
+        
+        if feedback_col in df.columns:
+            df[f'{variant}_feedback_tags'] = df[feedback_col].apply(lambda x: extract_tags(x, TAG_KEYWORDS, tag_matcher))
+        else:
+            df[f'{variant}_feedback_tags'] = [[] for _ in range(len(df))]
+        
+        df[f'{variant}_all_tags'] = df.apply(
+            lambda row: list(set(
+                row[f'{variant}_likes_tags'] + 
+                row[f'{variant}_dislikes_tags'] + 
+                row[f'{variant}_feedback_tags']
+            )), axis=1
+        )
+        
+        if low_memory:
+            evict_columns(df, [f'{variant}_likes_tags', f'{variant}_dislikes_tags', f'{variant}_feedback_tags'])
+
+def prepare_responses(df, low_memory=False, tag_matcher=None):
+    """Add the derived text columns (adjectives, tags, sentiment, segments) in place.
+    
+    Works on the whole dataset or on one chunk of it; nothing here depends on
+    other rows, so chunks can be prepared independently.
+    
+    With low_memory=True, the per-answer tag and adjective analysis columns
+    are dropped once combined. The adjective and tag columns in
+    AGGREGATED_COLUMNS are still needed by aggregate_responses and are left
+    for the caller to evict after it.
+    """
+    if low_memory:
+        downcast_ratings(df)
+        categorize_columns(df)
+    else:
+        # Cleaned text is only kept for the Raw_Data export
+        for col in TEXT_COLUMNS:
+            if col in df.columns:
+                df[f'{col}_clean'] = df[col].apply(clean_text)
+    
+    # Adjective extraction
+    extract = adjective_extractor()
+    for variant in ['A', 'B']:
+        likes_col = f'{variant}_likes'
+        dislikes_col = f'{variant}_dislikes'
+        
+        if likes_col in df.columns:
+            df[f'{variant}_likes_adjectives'] = df[likes_col].apply(extract)
+        else:
+            df[f'{variant}_likes_adjectives'] = [[] for _ in range(len(df))]
+        
+        if dislikes_col in df.columns:
+            df[f'{variant}_dislikes_adjectives'] = df[dislikes_col].apply(extract)
+        else:
+            df[f'{variant}_dislikes_adjectives'] = [[] for _ in range(len(df))]
+        
+        # Combine adjectives
+        def combine_adjectives(row):
+            likes_adj = row.get(f'{variant}_likes_adjectives', [])
+            dislikes_adj = row.get(f'{variant}_dislikes_adjectives', [])
+            if not isinstance(likes_adj, list):
+                likes_adj = []
+            if not isinstance(dislikes_adj, list):
+                dislikes_adj = []
+            return likes_adj + dislikes_adj
+        
+        if not low_memory:
+            df[f'{variant}_all_adjectives'] = df.apply(combine_adjectives, axis=1)
+    
+    # Adjective sentiment
+    for variant in ['A', 'B']:
+        df[f'{variant}_likes_adj_analysis'] = df[f'{variant}_likes_adjectives'].apply(
+            lambda x: analyze_adjectives_by_sentiment(x, context='likes')
+        )
+        
+        df[f'{variant}_dislikes_adj_analysis'] = df[f'{variant}_dislikes_adjectives'].apply(
+            lambda x: analyze_adjectives_by_sentiment(x, context='dislikes')
+        )
+        
+        df[f'{variant}_positive_adjectives'] = df.apply(
+            lambda row: row[f'{variant}_likes_adj_analysis']['positive'] + 
+                        row[f'{variant}_dislikes_adj_analysis']['positive'],
+            axis=1
+        )
+        
+        df[f'{variant}_negative_adjectives'] = df.apply(
+            lambda row: row[f'{variant}_likes_adj_analysis']['negative'] + 
+                        row[f'{variant}_dislikes_adj_analysis']['negative'],
+            axis=1
+        )
+        
+        if low_memory:
+            evict_columns(df, [f'{variant}_likes_adj_analysis', f'{variant}_dislikes_adj_analysis'])
+    
+    # Tag extraction
+    add_tag_columns(df, low_memory=low_memory, tag_matcher=tag_matcher)
+    
+    # Cooking method and segment columns
+    if 'cookingMethod' in df.columns:
+        df['cookingMethod_normalized'] = df['cookingMethod'].apply(normalize_cooking_method)
+    
+    if 'age' in df.columns:
+        df['age_bucket'] = df['age'].apply(age_bucket)
+    
+    # Sentiment
+    df['A_sentiment'] = df.apply(lambda x: calculate_sentiment(x.get('A_likes', ''), x.get('A_dislikes', '')), axis=1)
+    df['B_sentiment'] = df.apply(lambda x: calculate_sentiment(x.get('B_likes', ''), x.get('B_dislikes', '')), axis=1)
+    if _sentence_sentiment:
+        add_sentence_sentiment(df)
+    
+    if low_memory:
+        categorize_columns(df, ['cookingMethod_normalized', 'age_bucket', 'A_sentiment', 'B_sentiment'])
+    
+    return df
+
+def new_aggregates(top_k_capacity=None):
+    """Create an empty set of aggregates.
+    
+    Every field is a count, a sum or a Counter, so aggregates from separate
+    chunks can be combined with merge_aggregates without losing anything.
+    
+    With top_k_capacity, adjective and tag counts are kept in SpaceSaving
+    summaries of that size instead, both overall and in every segment cube
+    cell, so a running total stays bounded in memory at the cost of
+    approximate counts.
+    """
+    aggregates = {
+        'responses': 0,
+        'columns': [],
+        'adjective_totals': Counter(),
+        'adjectives': {f'{variant}_{polarity}': Counter()
+                       for variant in ['A', 'B'] for polarity in ['positive', 'negative']},
+        'tags': {'A': Counter(), 'B': Counter()},
+        'tag_rating_sums': {'A': Counter(), 'B': Counter()},
+        'tag_rating_counts': {'A': Counter(), 'B': Counter()},
+        'metric_sums': Counter(),
+        'metric_counts': Counter(),
+        'taste_values': {'A': Counter(), 'B': Counter()},
+        'cooking_methods': {},
+        'sentiment': {'A': Counter(), 'B': Counter()},
+        'sentence_sentiment_sums': Counter(),
+        'sentence_sentiment_counts': Counter(),
+        'trends': new_trends(),
+        'segment_cube': None,
+        'checkbox': None,
+    }
+    
+    if top_k_capacity:
+        for key in aggregates['adjectives']:
+            aggregates['adjectives'][key] = SpaceSaving(top_k_capacity)
+        for variant in aggregates['tags']:
+            aggregates['tags'][variant] = SpaceSaving(top_k_capacity)
+        # Chunk cubes are merged into this one, whose cells summarize instead of counting exactly
+        aggregates['segment_cube'] = {'dimensions': list(SEGMENT_DIMENSIONS), 'cells': {},
+                                      'top_k_capacity': top_k_capacity}
+    
+    return aggregates
+
+def tag_rating_totals(df, variant):
+    """Sum and count of taste ratings per tag (the mergeable form of calculate_tag_ratings)"""
+    sums = Counter()
+    counts = Counter()
+    taste_col = f'{variant}_taste'
+    tags_col = f'{variant}_all_tags'
+    
+    if taste_col not in df.columns or tags_col not in df.columns:
+        return sums, counts
+    
+    for tags, taste_rating in zip(df[tags_col], df[taste_col]):
+        try:
+            taste_value = float(taste_rating)
+        except (TypeError, ValueError):
+            continue
+        if np.isnan(taste_value):
+            continue
+        
+        for tag in tags:
+            sums[tag] += taste_value
+            counts[tag] += 1
+    
+    return sums, counts
+
+def aggregate_responses(df):
+    """Reduce a prepared batch of responses to mergeable aggregates"""
+    aggregates = new_aggregates()
+    aggregates['responses'] = len(df)
+    aggregates['columns'] = list(df.columns)
+    
+    for variant in ['A', 'B']:
+        for source in ['likes', 'dislikes']:
+            aggregates['adjective_totals'][f'{variant}_{source}'] += sum(
+                len(adj_list) for adj_list in df[f'{variant}_{source}_adjectives'] if isinstance(adj_list, list)
+            )
+        
+        for polarity in ['positive', 'negative']:
+            counter = aggregates['adjectives'][f'{variant}_{polarity}']
+            for adj_list in df[f'{variant}_{polarity}_adjectives']:
+                if isinstance(adj_list, list):
+                    counter.update(adj_list)
+        
+        aggregates['tags'][variant] = count_tags(df[f'{variant}_all_tags'])
+        sums, counts = tag_rating_totals(df, variant)
+        aggregates['tag_rating_sums'][variant] = sums
+        aggregates['tag_rating_counts'][variant] = counts
+        
+        taste_col = f'{variant}_taste'
+        if taste_col in df.columns:
+            aggregates['taste_values'][variant].update(pd.to_numeric(df[taste_col], errors='coerce').dropna())
+        
+        aggregates['sentiment'][variant].update(df[f'{variant}_sentiment'])
+    
+    for col in [col for pair in COMPARISON_METRICS.values() for col in pair]:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce')
+            aggregates['metric_sums'][col] += float(values.sum())
+            aggregates['metric_counts'][col] += int(values.count())
+    
+    for col in sentence_sentiment_columns(df):
+        aggregates['sentence_sentiment_sums'][col] += float(df[col].sum())
+        aggregates['sentence_sentiment_counts'][col] += int(df[col].count())
+    
+    if 'cookingMethod_normalized' in df.columns:
+        for method, group in df.groupby('cookingMethod_normalized', observed=True):
+            stats = aggregates['cooking_methods'].setdefault(method, {'sums': Counter(), 'counts': Counter()})
+            for col in ['A_taste', 'B_taste']:
+                if col in group.columns:
+                    values = pd.to_numeric(group[col], errors='coerce')
+                    stats['sums'][col] += float(values.sum())
+                    stats['counts'][col] += int(values.count())
+            if 'fullName' in group.columns:
+                stats['counts']['fullName'] += int(group['fullName'].count())
+    
+    aggregates['segment_cube'] = build_segment_cube(df)
+    aggregates['checkbox'] = checkbox_breakdowns(df)
+    aggregates['trends'] = trend_buckets(df)
+    
+    return aggregates
+
+def merge_segment_cubes(total, partial):
+    """Add the cells of one segment cube into another"""
+    if total is None:
+        return partial
+    if partial is None:
+        return total
+    
+    capacity = total.get('top_k_capacity')
+    for key, cell in partial['cells'].items():
+        target = total['cells'].get(key)
+        if target is None:
+            if not capacity:
+                total['cells'][key] = cell
+                continue
+            target = total['cells'][key] = new_segment_cell(capacity)
+        add_segment_cell(target, cell)
+    
+    return total
+
+def merge_checkbox_breakdowns(total, partial):
+    """Add one set of checkbox breakdowns into another"""
+    if total is None:
+        return partial
+    if partial is None:
+        return total
+    
+    for question_id, breakdown in partial.items():
+        target = total.get(question_id)
+        if target is None:
+            total[question_id] = breakdown
+            continue
+        target['counts'] = target['counts'] + breakdown['counts']
+        target['cooccurrence'] = target['cooccurrence'] + breakdown['cooccurrence']
+        for variant, matrix in breakdown['tag_cooccurrence'].items():
+            target['tag_cooccurrence'][variant] = target['tag_cooccurrence'][variant] + matrix
+        for col in breakdown['rating_sums']:
+            target['rating_sums'][col] = target['rating_sums'][col] + breakdown['rating_sums'][col]
+            target['rating_counts'][col] = target['rating_counts'][col] + breakdown['rating_counts'][col]
+    
+    return total
+
+def merge_aggregates(total, partial):
+    """Merge the aggregates of one chunk into a running total (in place)"""
+    total['responses'] += partial['responses']
+    for col in partial['columns']:
+        if col not in total['columns']:
+            total['columns'].append(col)
+    
+    total['adjective_totals'].update(partial['adjective_totals'])
+    for key, counter in partial['adjectives'].items():
+        total['adjectives'][key].update(counter)
+    
+    for field in ['tags', 'tag_rating_sums', 'tag_rating_counts', 'taste_values', 'sentiment']:
+        for variant, counter in partial[field].items():
+            total[field][variant].update(counter)
+    
+    total['metric_sums'].update(partial['metric_sums'])
+    total['metric_counts'].update(partial['metric_counts'])
+    total['sentence_sentiment_sums'].update(partial['sentence_sentiment_sums'])
+    total['sentence_sentiment_counts'].update(partial['sentence_sentiment_counts'])
+    
+    for method, stats in partial['cooking_methods'].items():
+        target = total['cooking_methods'].setdefault(method, {'sums': Counter(), 'counts': Counter()})
+        target['sums'].update(stats['sums'])
+        target['counts'].update(stats['counts'])
+    
+    total['segment_cube'] = merge_segment_cubes(total['segment_cube'], partial['segment_cube'])
+    total['checkbox'] = merge_checkbox_breakdowns(total['checkbox'], partial['checkbox'])
+    merge_trends(total['trends'], partial['trends'])
+    
+    return total
+
+def finalize_aggregates(aggregates):
+    """Turn (merged) aggregates into the tables, counters and means used for reporting"""
+    columns = aggregates['columns']
+    results = {
+        'responses': aggregates['responses'],
+        'columns': columns,
+        'adjective_totals': aggregates['adjective_totals'],
+        'adjectives_raw': {},
+        'adjectives': {},
+        'tag_freq': {},
+        'tag_ratings': {},
+        'taste_values': aggregates['taste_values'],
+        'segment_cube': aggregates['segment_cube'],
+        'checkbox': aggregates['checkbox'],
+        'checkbox_frames': checkbox_breakdown_frames(aggregates['checkbox'] or {}),
+    }
+    
+    # Approximate (SpaceSaving) counts become Counters of their estimates
+    results['approximate'] = {}
+    for variant, counter in aggregates['tags'].items():
+        if isinstance(counter, SpaceSaving):
+            results['approximate'][f'{variant} tags'] = counter.bounds()
+            counter = counter.to_counter()
+        results['tag_freq'][variant] = counter
+    
+    # Group and count
+    for key, counter in aggregates['adjectives'].items():
+        if isinstance(counter, SpaceSaving):
+            results['approximate'][f'{key} adjectives'] = counter.bounds()
+            counter = counter.to_counter()
+        raw_counts = normalize_adjective_counts(counter)
+        results['adjectives_raw'][key] = raw_counts
+        results['adjectives'][key] = group_adjective_counts(raw_counts)
+    
+    for variant in ['A', 'B']:
+        sums = aggregates['tag_rating_sums'][variant]
+        counts = aggregates['tag_rating_counts'][variant]
+        results['tag_ratings'][variant] = {tag: sums[tag] / count for tag, count in counts.items() if count}
+    
+    # Cooking methods
+    cooking_summary = None
+    if 'cookingMethod' in columns and aggregates['cooking_methods']:
+        rows = {}
+        for method in sorted(aggregates['cooking_methods']):
+            stats = aggregates['cooking_methods'][method]
+            rows[method] = {
+                'A Avg Taste': stats['sums']['A_taste'] / stats['counts']['A_taste'] if stats['counts']['A_taste'] else np.nan,
+                'B Avg Taste': stats['sums']['B_taste'] / stats['counts']['B_taste'] if stats['counts']['B_taste'] else np.nan,
+                'Count': stats['counts']['fullName'],
+            }
+        cooking_summary = pd.DataFrame.from_dict(rows, orient='index').round(2)
+        cooking_summary.index.name = 'cookingMethod_normalized'
+        cooking_summary = cooking_summary.sort_values('Count', ascending=False)
+    results['cooking_summary'] = cooking_summary
+    
+    # Sentiment
+    results['sentiment'] = {
+        variant: pd.Series(dict(counter.most_common()), name='count', dtype='int64').rename_axis(f'{variant}_sentiment')
+        for variant, counter in aggregates['sentiment'].items()
+    }
+    
+    # Sentence-level sentiment (mean of per-response scores)
+    sentence_means = {
+        col: aggregates['sentence_sentiment_sums'][col] / count
+        for col, count in aggregates['sentence_sentiment_counts'].items() if count
+    }
+    sentence_sentiment = pd.DataFrame({
+        label: [sentence_means.get(f'{variant}_{source}', np.nan) for variant in ['A', 'B']]
+        for label, source in [('Likes', 'likes_sentence_score'), ('Dislikes', 'dislikes_sentence_score'),
+                              ('Feedback', 'Feedback_sentence_score'), ('Overall', 'sentence_sentiment')]
+    }, index=['Product A', 'Product B'])
+    results['sentence_sentiment'] = sentence_sentiment.dropna(axis=1, how='all')
+    
+    results['trends'] = trend_frames(aggregates['trends'])
+    
+    # Comparison metrics
+    metric_means = {
+        col: aggregates['metric_sums'][col] / count
+        for col, count in aggregates['metric_counts'].items() if count
+    }
+    results['metric_means'] = metric_means
+    
+    comparison_df = pd.DataFrame()
+    for metric_name, (col_a, col_b) in COMPARISON_METRICS.items():
+        if col_a in columns and col_b in columns:
+            mean_a = metric_means.get(col_a, np.nan)
+            mean_b = metric_means.get(col_b, np.nan)
+            comparison_df[metric_name] = [mean_a, mean_b, mean_b - mean_a]
+    
+    if not comparison_df.empty:
+        comparison_df.index = ['Product A', 'Product B', 'Difference (B-A)']
+    results['comparison_df'] = comparison_df
+    
+    return results
+
+def top_tag_ratings(results, variant, n=10):
+    """Tags with the highest average taste rating (all of them when n is None)"""
+    return sorted(results['tag_ratings'][variant].items(), key=lambda x: x[1], reverse=True)[:n]
+
+def report_results(results):
+    """Print the analysis sections to the console"""
+    total = results['responses']
+    
+    # ========================================================================
+    # ADJECTIVE EXTRACTION
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("EXTRACTING ADJECTIVES USING NLTK")
+    print("=" * 80)
+    
+    for variant in ['A', 'B']:
+        total_likes_adj = results['adjective_totals'][f'{variant}_likes']
+        total_dislikes_adj = results['adjective_totals'][f'{variant}_dislikes']
+        print(f"\n{variant} Summary: {total_likes_adj} adjectives from likes, {total_dislikes_adj} from dislikes")
+    
+    # ========================================================================
+    # ADJECTIVE SENTIMENT ANALYSIS
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("ADJECTIVE SENTIMENT ANALYSIS")
+    print("=" * 80)
+    
+    for variant in ['A', 'B']:
+        print("\n" + "=" * 80)
+        print(f"PRODUCT {variant} - ADJECTIVE ANALYSIS")
+        print("=" * 80)
+        print("\nPositive Adjectives (Grouped):")
+        for adj, count in results['adjectives'][f'{variant}_positive'].most_common(15):
+            print(f"  {adj}: {count} ({count/total*100:.1f}%)")
+        
+        print("\nNegative Adjectives (Grouped):")
+        for adj, count in results['adjectives'][f'{variant}_negative'].most_common(15):
+            print(f"  {adj}: {count} ({count/total*100:.1f}%)")
+    
+    # ========================================================================
+    # TAG EXTRACTION
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("TAG EXTRACTION")
+    print("=" * 80)
+    
+    for variant in ['A', 'B']:
+        print(f"\nProduct {variant} - Top Tags:")
+        for tag, count in results['tag_freq'][variant].most_common(10):
+            print(f"  {tag}: {count} ({count/total*100:.1f}%)")
+    
+    # ========================================================================
+    # TAG-RATING CORRELATION
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("TAG vs RATING CORRELATION")
+    print("=" * 80)
+    
+    for variant in ['A', 'B']:
+        print(f"\nProduct {variant} - Tags with Highest Taste Ratings:")
+        for tag, rating in top_tag_ratings(results, variant):
+            print(f"  {tag}: {rating:.2f}")
+    
+    # ========================================================================
+    # CHECKBOX QUESTION BREAKDOWN
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("CHECKBOX QUESTION BREAKDOWN")
+    print("=" * 80)
+    
+    checkbox_frames = results['checkbox_frames']
+    for question_id in results['checkbox'] or {}:
+        ratings_frame = checkbox_frames[f'{question_id}_Ratings']
+        print(f"\n{question_id}:")
+        print(ratings_frame[['Count', 'A_taste_mean', 'B_taste_mean']].round(2))
+        print(f"\n{question_id} co-occurrence:")
+        print(checkbox_frames[f'{question_id}_Cooccurrence'])
+    
+    # ========================================================================
+    # COOKING METHOD ANALYSIS
+    # ========================================================================
+    
+    if results['cooking_summary'] is not None:
+        print("\n" + "=" * 80)
+        print("COOKING METHOD ANALYSIS")
+        print("=" * 80)
+        print("\n", results['cooking_summary'])
+    
+    # ========================================================================
+    # SEGMENT CUBE
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("SEGMENT CUBE")
+    print("=" * 80)
+    
+    segment_cube = results['segment_cube']
+    print(f"\nBuilt {len(segment_cube['cells'])} segment cells over: {', '.join(segment_cube['dimensions'])}")
+    
+    for dimension in segment_cube['dimensions']:
+        print(f"\nBy {dimension}:")
+        for value in segment_dimension_values(segment_cube, dimension):
+            summary = query_segment_cube(segment_cube, **{dimension: value})
+            means = summary['rating_means']
+            print(f"  {value}: n={summary['count']}, "
+                  f"A taste {means.get('A_taste', float('nan')):.2f}, "
+                  f"B taste {means.get('B_taste', float('nan')):.2f}")
+    
+    # ========================================================================
+    # SENTIMENT ANALYSIS
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("SENTIMENT DISTRIBUTION")
+    print("=" * 80)
+    print("\nProduct A:")
+    print(results['sentiment']['A'])
+    print("\nProduct B:")
+    print(results['sentiment']['B'])
+    
+    if not results['sentence_sentiment'].empty:
+        print("\nSentence-level VADER compound score (mean per response, -1 to 1):")
+        print(results['sentence_sentiment'].round(3))
+    
+    # ========================================================================
+    # COMPARISON METRICS
+    # ========================================================================
+    
+    print("\n" + "=" * 80)
+    print("A vs B COMPARISON")
+    print("=" * 80)
+    
+    if not results['comparison_df'].empty:
+        print("\n", results['comparison_df'].round(2))
+    
+    if not results['trends']['weekly'].empty:
+        report_trends(results['trends'])
+    
+    # ========================================================================
+    # APPROXIMATE COUNT BOUNDS
+    # ========================================================================
+    
+    if results.get('approximate'):
+        print("\n" + "=" * 80)
+        print("APPROXIMATE COUNTS (SPACE-SAVING)")
+        print("=" * 80)
+        print("Counts above are upper estimates; each is at most max error above the true count.")
+        for name, bounds in results['approximate'].items():
+            print(f"  {name}: {bounds['occurrences']} occurrences, {bounds['stored']}/{bounds['capacity']} stored, "
+                  f"max error {bounds['max_error']} (bound N/capacity = {bounds['error_bound']:.1f}), "
+                  f"unstored items <= {bounds['unstored_max']}, "
+                  f"top {bounds['guaranteed_top']} of {bounds['top_k']} certain")
+
+def plot_results(results):
+    """Save the adjective and survey charts"""
+    print("\n" + "=" * 80)
+    print("GENERATING VISUALIZATIONS")
+    print("=" * 80)
+    
+    # Adjective visualization
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    
+    panels = [
+        ((0, 0), 'A_positive', 'green', 'Product A - Top 10 Positive Adjectives'),
+        ((0, 1), 'A_negative', 'red', 'Product A - Top 10 Negative Adjectives'),
+        ((1, 0), 'B_positive', 'green', 'Product B - Top 10 Positive Adjectives'),
+        ((1, 1), 'B_negative', 'red', 'Product B - Top 10 Negative Adjectives'),
+    ]
+    for position, key, color, title in panels:
+        top_adjectives = dict(results['adjectives'][key].most_common(10))
+        if top_adjectives:
+            ax = axes[position]
+            ax.barh(list(top_adjectives.keys()), list(top_adjectives.values()), color=color, alpha=0.7)
+            ax.set_xlabel('Frequency')
+            ax.set_title(title)
+            ax.invert_yaxis()
+            ax.grid(axis='x', alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig('adjective_analysis.png', dpi=300, bbox_inches='tight')
+    print("[OK] Saved: adjective_analysis.png")
+    
+    # Tag and rating comparison
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    
+    top_tags_A = dict(results['tag_freq']['A'].most_common(10))
+    if top_tags_A:
+        axes[0, 0].barh(list(top_tags_A.keys()), list(top_tags_A.values()), color='steelblue')
+        axes[0, 0].set_xlabel('Frequency')
+        axes[0, 0].set_title('Product A - Top 10 Tags')
+        axes[0, 0].invert_yaxis()
+    
+    top_tags_B = dict(results['tag_freq']['B'].most_common(10))
+    if top_tags_B:
+        axes[0, 1].barh(list(top_tags_B.keys()), list(top_tags_B.values()), color='coral')
+        axes[0, 1].set_xlabel('Frequency')
+        axes[0, 1].set_title('Product B - Top 10 Tags')
+        axes[0, 1].invert_yaxis()
+    
+    comparison_df = results['comparison_df']
+    if 'A_taste' in results['columns'] and 'B_taste' in results['columns']:
+        if not comparison_df.empty:
+            metrics = list(comparison_df.columns)
+            a_scores = comparison_df.loc['Product A'].values
+            b_scores = comparison_df.loc['Product B'].values
+            
+            x = np.arange(len(metrics))
+            width = 0.35
+            axes[1, 0].bar(x - width/2, a_scores, width, label='Product A', color='steelblue')
+            axes[1, 0].bar(x + width/2, b_scores, width, label='Product B', color='coral')
+            axes[1, 0].set_ylabel('Average Rating')
+            axes[1, 0].set_title('A vs B - Key Metrics Comparison')
+            axes[1, 0].set_xticks(x)
+            axes[1, 0].set_xticklabels(metrics, rotation=45, ha='right')
+            axes[1, 0].legend()
+            axes[1, 0].grid(axis='y', alpha=0.3)
+        
+        # Ratings are kept as value counts, so the histogram is drawn with weights
+        taste_A = results['taste_values']['A']
+        taste_B = results['taste_values']['B']
+        if taste_A and taste_B:
+            axes[1, 1].hist([list(taste_A.keys()), list(taste_B.keys())], bins=9,
+                            weights=[list(taste_A.values()), list(taste_B.values())],
+                            label=['Product A', 'Product B'],
+                            color=['steelblue', 'coral'], alpha=0.7)
+            axes[1, 1].set_xlabel('Taste Rating')
+            axes[1, 1].set_ylabel('Frequency')
+            axes[1, 1].set_title('Taste Rating Distribution')
+            axes[1, 1].legend()
+            axes[1, 1].grid(axis='y', alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig('survey_analysis.png', dpi=300, bbox_inches='tight')
+    print("[OK] Saved: survey_analysis.png")
+
+def build_summary_sheets(results):
+    """Build the summary DataFrames written to the Excel report"""
+    adjectives = results['adjectives']
+    summary_results = {
+        'Tag_Frequency_A': pd.DataFrame(results['tag_freq']['A'].most_common(), columns=['Tag', 'Count_A']),
+        'Tag_Frequency_B': pd.DataFrame(results['tag_freq']['B'].most_common(), columns=['Tag', 'Count_B']),
+        'Tag_Ratings_A': pd.DataFrame(top_tag_ratings(results, 'A'), columns=['Tag', 'Avg_Rating_A']),
+        'Tag_Ratings_B': pd.DataFrame(top_tag_ratings(results, 'B'), columns=['Tag', 'Avg_Rating_B']),
+        'Positive_Adj_A': pd.DataFrame(adjectives['A_positive'].most_common(), columns=['Adjective', 'Count']),
+        'Negative_Adj_A': pd.DataFrame(adjectives['A_negative'].most_common(), columns=['Adjective', 'Count']),
+        'Positive_Adj_B': pd.DataFrame(adjectives['B_positive'].most_common(), columns=['Adjective', 'Count']),
+        'Negative_Adj_B': pd.DataFrame(adjectives['B_negative'].most_common(), columns=['Adjective', 'Count']),
+    }
+    
+    if not results['comparison_df'].empty:
+        summary_results['Metrics_Comparison'] = results['comparison_df']
+    
+    if not results['sentence_sentiment'].empty:
+        summary_results['Sentence_Sentiment'] = results['sentence_sentiment']
+    
+    summary_results['Trends_Daily'] = results['trends']['daily']
+    summary_results['Trends_Weekly'] = results['trends']['weekly']
+    
+    summary_results['Segment_Cube'] = segment_cube_to_frame(results['segment_cube'])
+    summary_results.update(results['checkbox_frames'])
+    
+    if results.get('feedback_topics') is not None:
+        summary_results['Feedback_Topics'] = results['feedback_topics']
+    
+    return summary_results
+
+def export_results(results, df=None):
+    """Write the Excel report and segment cube; returns the generated file names"""
+    print("\n" + "=" * 80)
+    print("EXPORTING RESULTS")
+    print("=" * 80)
+    
+    summary_results = build_summary_sheets(results)
+    
+    # Sheets whose row labels carry meaning and must be written out
+    indexed_sheets = {'Metrics_Comparison', 'Sentence_Sentiment', 'Trends_Daily', 'Trends_Weekly',
+                      *results['checkbox_frames']}
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    excel_filename = f'survey_analysis_results_{timestamp}.xlsx'
+    cube_filename = f'segment_cube_{timestamp}.json'
+    
+    save_segment_cube(results['segment_cube'], cube_filename)
+    print(f"[OK] Saved: {cube_filename}")
+    
+    with pd.ExcelWriter(excel_filename) as writer:
+        for sheet_name, data in summary_results.items():
+            if isinstance(data, pd.DataFrame) and not data.empty:
+                data.to_excel(writer, sheet_name=sheet_name, 
+                             index=sheet_name in indexed_sheets)
+        
+        # Add raw data (not available when responses were processed in chunks)
+        if df is not None:
+            df.to_excel(writer, sheet_name='Raw_Data', index=False)
+        else:
+            print("Raw_Data sheet skipped (responses were processed in chunks)")
+    
+    print(f"[OK] Saved: {excel_filename}")
+    return [excel_filename, cube_filename]
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+SYNTHETIC_PHRASES = {
+    'likes': ["juicy chicken", "nice flavour", "crispy pastry", "good portion", "smoky taste",
+              "tasty and flavorful", "kids liked it", "kid friendly", "sweet sauce", "well cooked",
+              "flavourfull", "juciy and crsipy", "Good size, would buy again!", "Quick to prepare",
+              "Très bon 👍", "nothing really", "none", ""],
+    'dislikes': ["too salty", "dry chicken", "soggy pastry", "bland taste", "too much sauce",
+                 "not enough salt", "greasy", "not filling", "pastry was a bit dry", "too smoky for kids",
+                 "sogy and to salty", "needs more sauce", "N/A", "nothing", ""],
+    'Feedback': ["would buy", "wouldn't buy", "would definitely buy", "it was okay", "average at best",
+                 "buy again", "decent but needs more filling", "skip", "Better than A", "ok",
+                 "it was good, i enjoyed it", "", None],
+}
+
+SYNTHETIC_FIRST_NAMES = ['Alex', 'Sam', 'Priya', 'Mark', 'Ana', 'Chen', 'Ishta', 'Tom', 'Lee', 'Noor']
+SYNTHETIC_COOKING_METHODS = ['Oven', 'Air Fryer', 'Air fryer', 'Air fried', 'Microwave', 'Deep Fried', 'Pan', None]
+SYNTHETIC_CONSUMERS = ['Myself', 'My Kids', 'My Partner']
+SYNTHETIC_OCCASIONS = ['Breakfast', 'Lunch', 'Dinner', 'Snack']
+
+# Generated submissions are spread over SYNTHETIC_DAYS days from SYNTHETIC_START
+SYNTHETIC_START = pd.Timestamp('2026-01-01')
+SYNTHETIC_DAYS = 60
+
+def generate_synthetic_responses(count, seed=0):
+    """Generate responses in the responses.json format, including awkward cases.
+    
+    Answers mix tag keywords, misspellings, punctuation, non-ASCII text,
+    blanks, None and missing ratings, so code paths that treat edge cases
+    differently show up when outputs are compared.
+    """
+    rng = np.random.default_rng(seed)
+    
+    def pick(options):
+        return options[rng.integers(len(options))]
+    
+    def text(kind):
+        parts = [pick(SYNTHETIC_PHRASES[kind]) for _ in range(rng.integers(1, 3))]
+        if None in parts:
+            return None
+        return pick([', ', ' and ', '. ']).join(part for part in parts if part) if any(parts) else ''
+    
+    def rating(missing_rate=0.05):
+        return None if rng.random() < missing_rate else int(rng.integers(1, 8))
+    
+    responses = []
+    for i in range(count):
+        has_children = pick(['Yes', 'No'])
+        response = {
+            'fullName': f"{pick(SYNTHETIC_FIRST_NAMES)} {i}",
+            'age': None if rng.random() < 0.03 else int(rng.integers(16, 80)),
+            'hasChildren': has_children,
+            'cookingMethod': pick(SYNTHETIC_COOKING_METHODS),
+            'consumer': sorted(set(pick(SYNTHETIC_CONSUMERS) for _ in range(rng.integers(1, 3)))),
+            'occasion': sorted(set(pick(SYNTHETIC_OCCASIONS) for _ in range(rng.integers(1, 3)))),
+        }
+        for variant in ['A', 'B']:
+            response.update({
+                f'{variant}_taste': rating(),
+                f'{variant}_likes': text('likes'),
+                f'{variant}_dislikes': text('dislikes'),
+                f'{variant}_appearance': rating(),
+                f'{variant}_selfRelevance': rating(),
+                f'{variant}_kidsRelevance': rating() if has_children == 'Yes' else None,
+                f'{variant}_expectation': rating(),
+                f'{variant}_SelfRelevance': rating(),
+                f'{variant}_Feedback': text('Feedback'),
+            })
+        response['timestamp'] = None
+        submitted = SYNTHETIC_START + pd.Timedelta(minutes=int(rng.integers(0, 60 * 24 * SYNTHETIC_DAYS)))
+        response['submitted_at'] = None if rng.random() < 0.02 else submitted.isoformat()
+        responses.append(response)
+    
+    return responses
+
+def write_synthetic_responses(path, count, seed=0):
+    """Write generated responses as JSON Lines (gzip when path ends in .gz)"""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for response in generate_synthetic_responses(count, seed):
+            f.write(json.dumps(response) + '\n')
+    print(f"[OK] Wrote {count} synthetic responses to {path}")
+    return path
+
+# ============================================================================
+# CHUNKED (OUT-OF-CORE) PROCESSING
+# ============================================================================
+
+def run_chunked(chunk_size, low_memory=False, input_path=None, use_documents=False,
+                tag_matcher=None, topic_model=None, duplicate_detector=None, exclude_duplicates=False,
+                top_k_capacity=None):
+    """Prepare and aggregate responses chunk by chunk, keeping only merged aggregates.
+    
+    Only one chunk of responses is held as a DataFrame at a time; everything
+    carried between chunks is a count, sum or Counter, so the merged result is
+    the same as processing all responses at once.
+    
+    A duplicate_detector keeps its LSH buckets across chunks, so copies of a
+    submission from an earlier chunk are still flagged.
+    
+    top_k_capacity keeps the running adjective and tag counts in bounded
+    SpaceSaving summaries (see new_aggregates).
+    """
+    aggregates = new_aggregates(top_k_capacity)
+    flagged_total = 0
+    
+    print("\n" + "=" * 80)
+    print(f"PROCESSING RESPONSES IN CHUNKS OF {chunk_size}")
+    print("=" * 80)
+    
+    for chunk_number, records in enumerate(iter_response_chunks(chunk_size, input_path, use_documents), start=1):
+        chunk = records_to_frame(records)
+        del records
+        
+        if duplicate_detector is not None:
+            flagged = duplicate_detector.flag(chunk)
+            flagged_total += flagged
+            if exclude_duplicates and flagged:
+                chunk = chunk[~chunk['is_duplicate']].reset_index(drop=True)
+        
+        if topic_model is not None:
+            topic_model.partial_fit_frame(chunk)
+        prepare_responses(chunk, low_memory=low_memory, tag_matcher=tag_matcher)
+        merge_aggregates(aggregates, aggregate_responses(chunk))
+        print(f"  Chunk {chunk_number}: {len(chunk)} responses ({aggregates['responses']} total)")
+        del chunk
+    
+    if duplicate_detector is not None:
+        action = "excluded" if exclude_duplicates else "flagged"
+        print(f"  Near-duplicate submissions {action}: {flagged_total}")
+        report_duplicate_groups(duplicate_detector)
+    
+    return aggregates
+
+# ============================================================================
+# STRATIFIED PREVIEW
+# ============================================================================
+
+# Default time budget for a preview run, in seconds
+PREVIEW_TARGET_SECONDS = 30
+
+# Responses processed first to measure the per-response cost
+PREVIEW_PILOT_SIZE = 50
+
+# Responses prepared (untimed) before the pilot, so lazy loading of the NLTK
+# models is not counted as per-response cost
+PREVIEW_WARMUP_SIZE = 5
+
+# Smallest sample per stratum (when the stratum has that many responses), so
+# every stratum gets a variance estimate
+PREVIEW_MIN_PER_STRATUM = 2
+
+# Normal quantile for the 95% confidence intervals
+CONFIDENCE_Z = 1.96
+
+def response_stratum(response):
+    """Preview stratum of a response dict: (normalized cooking method, hasChildren)"""
+    has_children = response.get('hasChildren')
+    return normalize_cooking_method(response.get('cookingMethod')), str(has_children) if has_children else 'Unknown'
+
+def allocate_sample(stratum_sizes, sample_size):
+    """Split sample_size over strata in proportion to their size (largest remainder)"""
+    total = sum(stratum_sizes.values())
+    sample_size = min(sample_size, total)
+    allocation = {h: min(size, PREVIEW_MIN_PER_STRATUM) for h, size in stratum_sizes.items()}
+    remaining = sample_size - sum(allocation.values())
+    if remaining <= 0:
+        return allocation
+    
+    quotas = {h: sample_size * size / total for h, size in stratum_sizes.items()}
+    for h in allocation:
+        allocation[h] = min(stratum_sizes[h], max(allocation[h], int(quotas[h])))
+    by_remainder = sorted(stratum_sizes, key=lambda h: quotas[h] - int(quotas[h]), reverse=True)
+    shortfall = sample_size - sum(allocation.values())
+    while shortfall > 0:
+        grew = False
+        for h in by_remainder:
+            if shortfall > 0 and allocation[h] < stratum_sizes[h]:
+                allocation[h] += 1
+                shortfall -= 1
+                grew = True
+        if not grew:
+            break
+    return allocation
+
+def stratified_estimate(values, strata, stratum_sizes):
+    """Stratified mean of values and its 95% half-width.
+    
+    values and strata are aligned Series over the sampled responses; missing
+    values are left out of their stratum. The variance includes the finite
+    population correction, so a full census has zero width. Strata with a
+    single value borrow the pooled sample variance.
+    """
+    values = pd.to_numeric(values, errors='coerce')
+    pooled_variance = values.var(ddof=1) if values.count() > 1 else 0.0
+    sampled = strata.value_counts()
+    
+    parts = []
+    for h, group in values.groupby(strata):
+        group = group.dropna()
+        if group.empty:
+            continue
+        variance = group.var(ddof=1) if len(group) > 1 else pooled_variance
+        fpc = max(0.0, 1 - sampled[h] / stratum_sizes[h])
+        parts.append((stratum_sizes[h], group.mean(), fpc * variance / len(group)))
+    
+    if not parts:
+        return np.nan, np.nan
+    total = sum(size for size, _, _ in parts)
+    mean = sum(size / total * part_mean for size, part_mean, _ in parts)
+    variance = sum((size / total) ** 2 * part_variance for size, _, part_variance in parts)
+    return mean, CONFIDENCE_Z * np.sqrt(variance)
+
+def preview_sample(chunks, target_seconds=PREVIEW_TARGET_SECONDS, seed=0, tag_matcher=None):
+    """Draw and prepare a stratified random sample sized to finish within target_seconds.
+    
+    The first batch warms up the text stages and then times a pilot of
+    PREVIEW_PILOT_SIZE responses, which bounds how many responses the budget
+    can pay for. While the rest of the batches stream past, every stratum
+    keeps only the responses with the smallest random keys up to that bound
+    (a bottom-k reservoir), so memory does not grow with the population. The
+    budget left after streaming is then allocated over the strata and the
+    chosen responses are prepared. Returns the prepared sample (with a
+    stratum column), the population size of every stratum and the timing
+    figures; the sample is None when there are no responses.
+    """
+    started = time.time()
+    rng = np.random.default_rng(seed)
+    reservoirs = defaultdict(list)  # stratum -> heap of (-key, position, record)
+    stratum_sizes = Counter()
+    capacity = None
+    per_response = 0.0
+    pilot_size = 0
+    position = 0
+    
+    for records in chunks:
+        if capacity is None:
+            prepare_responses(records_to_frame(records[:PREVIEW_WARMUP_SIZE]), tag_matcher=tag_matcher)
+            pilot = [records[p] for p in rng.permutation(len(records))[:PREVIEW_PILOT_SIZE]]
+            pilot_started = time.time()
+            prepare_responses(records_to_frame(pilot), tag_matcher=tag_matcher)
+            pilot_size = len(pilot)
+            per_response = (time.time() - pilot_started) / pilot_size
+            remaining = target_seconds - (time.time() - started)
+            capacity = int(remaining / per_response) if per_response > 0 else np.inf
+            capacity = max(capacity, PREVIEW_MIN_PER_STRATUM)
+        
+        for record, key in zip(records, rng.random(len(records))):
+            h = response_stratum(record)
+            stratum_sizes[h] += 1
+            reservoir = reservoirs[h]
+            if len(reservoir) < capacity:
+                heapq.heappush(reservoir, (-key, position, record))
+            elif key < -reservoir[0][0]:
+                heapq.heapreplace(reservoir, (-key, position, record))
+            position += 1
+    
+    timing = {'pilot_size': pilot_size, 'seconds_per_response': per_response}
+    if not stratum_sizes:
+        timing['elapsed'] = time.time() - started
+        return None, {}, timing
+    
+    remaining = target_seconds - (time.time() - started)
+    sample_size = max(0, int(remaining / per_response)) if per_response > 0 else position
+    allocation = allocate_sample(dict(stratum_sizes), sample_size)
+    
+    # The smallest keys of a stratum are a uniform random sample of it
+    chosen = [(h, record) for h, size in allocation.items()
+              for _, _, record in sorted(reservoirs[h], reverse=True)[:size]]
+    del reservoirs
+    sample = records_to_frame(record for _, record in chosen)
+    prepare_responses(sample, tag_matcher=tag_matcher)
+    sample['stratum'] = [h for h, _ in chosen]
+    
+    timing['elapsed'] = time.time() - started
+    return sample, dict(stratum_sizes), timing
+
+def preview_results(sample, stratum_sizes, top_tags=10):
+    """Metric means, tag frequencies and the taste winner with 95% intervals"""
+    strata = sample['stratum']
+    population = sum(stratum_sizes.values())
+    
+    metric_rows = []
+    for metric_name, (col_a, col_b) in COMPARISON_METRICS.items():
+        if col_a not in sample.columns or col_b not in sample.columns:
+            continue
+        a = pd.to_numeric(sample[col_a], errors='coerce')
+        b = pd.to_numeric(sample[col_b], errors='coerce')
+        mean_a, ci_a = stratified_estimate(a, strata, stratum_sizes)
+        mean_b, ci_b = stratified_estimate(b, strata, stratum_sizes)
+        # Every respondent rates both products, so the difference is estimated per response
+        diff, ci_diff = stratified_estimate(b - a, strata, stratum_sizes)
+        metric_rows.append({
+            'Metric': metric_name,
+            'Product A': mean_a, 'A ±': ci_a,
+            'Product B': mean_b, 'B ±': ci_b,
+            'Difference (B-A)': diff, 'Difference ±': ci_diff,
+        })
+    metrics = pd.DataFrame(metric_rows)
+    
+    tags = {}
+    for variant in ['A', 'B']:
+        tags_col = f'{variant}_all_tags'
+        rows = []
+        for tag in TAG_KEYWORDS:
+            has_tag = sample[tags_col].apply(lambda tags, tag=tag: tag in tags).astype(float)
+            share, ci = stratified_estimate(has_tag, strata, stratum_sizes)
+            rows.append({'Tag': tag, 'Share': share, 'Share ±': ci,
+                         'Estimated count': share * population, 'Count ±': ci * population})
+        tags[variant] = (pd.DataFrame(rows).sort_values(['Share', 'Tag'], ascending=[False, True])
+                         .head(top_tags).reset_index(drop=True))
+    
+    winner = None
+    taste = metrics[metrics['Metric'] == 'Taste'] if not metrics.empty else metrics
+    if not taste.empty:
+        diff = taste['Difference (B-A)'].iloc[0]
+        ci = taste['Difference ±'].iloc[0]
+        if diff - ci > 0:
+            winner = 'B'
+        elif diff + ci < 0:
+            winner = 'A'
+    
+    return {'metrics': metrics, 'tags': tags, 'winner': winner,
+            'sample_size': len(sample), 'population': population}
+
+def report_preview(preview, timing):
+    """Print the preview estimates"""
     print("\n" + "=" * 80)
-    print("GENERATING VISUALIZATIONS")
+    print(f"PREVIEW: STRATIFIED SAMPLE OF {preview['sample_size']} / {preview['population']} RESPONSES")
     print("=" * 80)
+    print(f"Pilot of {timing['pilot_size']} responses: {timing['seconds_per_response'] * 1000:.1f} ms per response; "
+          f"finished in {timing['elapsed']:.1f}s")
+    print("Estimates are stratified by cooking method and hasChildren; ± is a 95% confidence interval\n")
     
-    # Adjective visualization
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    for _, row in preview['metrics'].iterrows():
+        print(f"  {row['Metric']}: A {row['Product A']:.2f} ± {row['A ±']:.2f}, "
+              f"B {row['Product B']:.2f} ± {row['B ±']:.2f}, "
+              f"B-A {row['Difference (B-A)']:+.2f} ± {row['Difference ±']:.2f}")
     
-    top_pos_A = dict(pos_A_grouped.most_common(10))
-    if top_pos_A:
-        axes[0, 0].barh(list(top_pos_A.keys()), list(top_pos_A.values()), color='green', alpha=0.7)
-        axes[0, 0].set_xlabel('Frequency')
-        axes[0, 0].set_title('Product A - Top 10 Positive Adjectives')
-        axes[0, 0].invert_yaxis()
-        axes[0, 0].grid(axis='x', alpha=0.3)
+    for variant, frame in preview['tags'].items():
+        print(f"\nTop tags for Product {variant} (share of responses):")
+        for _, row in frame.iterrows():
+            print(f"  {row['Tag']}: {row['Share']:.1%} ± {row['Share ±']:.1%} "
+                  f"(~{row['Estimated count']:.0f} ± {row['Count ±']:.0f} responses)")
     
-    top_neg_A = dict(neg_A_grouped.most_common(10))
-    if top_neg_A:
-        axes[0, 1].barh(list(top_neg_A.keys()), list(top_neg_A.values()), color='red', alpha=0.7)
-        axes[0, 1].set_xlabel('Frequency')
-        axes[0, 1].set_title('Product A - Top 10 Negative Adjectives')
-        axes[0, 1].invert_yaxis()
-        axes[0, 1].grid(axis='x', alpha=0.3)
-    
-    top_pos_B = dict(pos_B_grouped.most_common(10))
-    if top_pos_B:
-        axes[1, 0].barh(list(top_pos_B.keys()), list(top_pos_B.values()), color='green', alpha=0.7)
-        axes[1, 0].set_xlabel('Frequency')
-        axes[1, 0].set_title('Product B - Top 10 Positive Adjectives')
-        axes[1, 0].invert_yaxis()
-        axes[1, 0].grid(axis='x', alpha=0.3)
-    
-    top_neg_B = dict(neg_B_grouped.most_common(10))
-    if top_neg_B:
-        axes[1, 1].barh(list(top_neg_B.keys()), list(top_neg_B.values()), color='red', alpha=0.7)
-        axes[1, 1].set_xlabel('Frequency')
-        axes[1, 1].set_title('Product B - Top 10 Negative Adjectives')
-        axes[1, 1].invert_yaxis()
-        axes[1, 1].grid(axis='x', alpha=0.3)
+    if preview['winner']:
+        print(f"\nWinner (taste): Product {preview['winner']} - the 95% interval of B-A excludes zero")
+    else:
+        print("\nWinner (taste): too close to call - the 95% interval of B-A includes zero")
+
+def run_preview(target_seconds=PREVIEW_TARGET_SECONDS, input_path=None, use_documents=False, seed=0,
+                tag_matcher=None):
+    """Estimate the headline results from a stratified sample within target_seconds"""
+    chunks = iter_response_chunks(PIPELINE_CHUNK_SIZE, input_path, use_documents)
+    sample, stratum_sizes, timing = preview_sample(chunks, target_seconds, seed=seed, tag_matcher=tag_matcher)
+    if sample is None:
+        print("No responses to preview")
+        return None
+    print(f"[OK] Streamed {sum(stratum_sizes.values())} responses and prepared a sample of {len(sample)}")
     
-    plt.tight_layout()
-    plt.savefig('adjective_analysis.png', dpi=300, bbox_inches='tight')
-    print("[OK] Saved: adjective_analysis.png")
+    preview = preview_results(sample, stratum_sizes)
+    report_preview(preview, timing)
+    return preview
+
+# ============================================================================
+# PIPELINED PROCESSING (FETCH AND NLP OVERLAPPED)
+# ============================================================================
+
+# Batch size used by the pipelined mode when --chunk-size is not given
+PIPELINE_CHUNK_SIZE = 1000
+
+def process_chunk(records, low_memory=False, tag_matcher=None):
+    """Prepare and aggregate one batch of responses; runs on a pipeline worker"""
+    chunk = records_to_frame(records)
+    del records
+    prepare_responses(chunk, low_memory=low_memory, tag_matcher=tag_matcher)
+    return aggregate_responses(chunk)
+
+def init_worker_process(adjective_lexicon, sentence_sentiment, sentence_scores):
+    """Give a pipeline worker process copies of the main process's lexicon and sentence memo"""
+    global _adjective_lexicon, _sentence_sentiment, _new_sentence_scores
+    _adjective_lexicon = adjective_lexicon
+    if adjective_lexicon is not None:
+        adjective_lexicon.take_updates()
+    _sentence_sentiment = sentence_sentiment
+    if sentence_scores is not _sentence_scores:
+        remember_sentence_scores(sentence_scores)
+    _new_sentence_scores = {}
+
+def process_chunk_in_worker(records, low_memory=False, tag_matcher=None):
+    """process_chunk in a worker process; also returns what its lexicon and sentence memo learned"""
+    global _new_sentence_scores
+    aggregates = process_chunk(records, low_memory, tag_matcher)
+    learned = {
+        'lexicon': _adjective_lexicon.take_updates() if _adjective_lexicon is not None else None,
+        'sentence_scores': _new_sentence_scores,
+    }
+    _new_sentence_scores = {}
+    return aggregates, learned
+
+def fetch_next_chunk(stream, duplicate_detector=None, topic_model=None, exclude_duplicates=False):
+    """Fetch the next batch and run the order-dependent stages on it.
     
-    # Tag and rating comparison
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    Duplicate detection and the topic model keep state between batches, so
+    they run here, one batch at a time in fetch order, rather than on the
+    workers. Returns (records, flagged) or None when the stream is exhausted.
+    """
+    records = next(stream, None)
+    if records is None:
+        return None
     
-    top_tags_A = dict(tag_freq_A.most_common(10))
-    if top_tags_A:
-        axes[0, 0].barh(list(top_tags_A.keys()), list(top_tags_A.values()), color='steelblue')
-        axes[0, 0].set_xlabel('Frequency')
-        axes[0, 0].set_title('Product A - Top 10 Tags')
-        axes[0, 0].invert_yaxis()
+    flagged = 0
+    if duplicate_detector is not None or topic_model is not None:
+        chunk = records_to_frame(records)
+        if duplicate_detector is not None:
+            flagged = duplicate_detector.flag(chunk)
+            if exclude_duplicates and flagged:
+                keep = (~chunk['is_duplicate']).tolist()
+                records = [record for record, kept in zip(records, keep) if kept]
+                chunk = chunk[~chunk['is_duplicate']].reset_index(drop=True)
+        if topic_model is not None:
+            topic_model.partial_fit_frame(chunk)
     
-    top_tags_B = dict(tag_freq_B.most_common(10))
-    if top_tags_B:
-        axes[0, 1].barh(list(top_tags_B.keys()), list(top_tags_B.values()), color='coral')
-        axes[0, 1].set_xlabel('Frequency')
-        axes[0, 1].set_title('Product B - Top 10 Tags')
-        axes[0, 1].invert_yaxis()
+    return records, flagged
+
+async def pipeline_async(chunk_size, workers, queue_size, low_memory, input_path, use_documents,
+                         tag_matcher, topic_model, duplicate_detector, exclude_duplicates, use_processes,
+                         top_k_capacity=None):
+    """Producer/consumer pipeline behind run_pipelined"""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    aggregates = new_aggregates(top_k_capacity)
+    stats = Counter()
+    # Partials that finished ahead of an earlier batch; merging in fetch order
+    # keeps ties in the reports ordered exactly as in run_chunked
+    finished = {}
+    next_merge = 0
     
-    if 'A_taste' in df.columns and 'B_taste' in df.columns:
-        if not comparison_df.empty:
-            metrics = list(comparison_df.columns)
-            a_scores = comparison_df.loc['Product A'].values
-            b_scores = comparison_df.loc['Product B'].values
+    fetch_executor = ThreadPoolExecutor(max_workers=1)
+    # Threads share the main process's lexicon and sentence memo; processes
+    # learn into copies whose additions are merged back after every batch
+    worker_executor = (ProcessPoolExecutor(max_workers=workers, initializer=init_worker_process,
+                                           initargs=(_adjective_lexicon, _sentence_sentiment, _sentence_scores))
+                       if use_processes else ThreadPoolExecutor(max_workers=workers))
+    
+    async def produce():
+        stream = iter_response_chunks(chunk_size, input_path, use_documents)
+        try:
+            while True:
+                start = time.perf_counter()
+                fetched = await loop.run_in_executor(fetch_executor, fetch_next_chunk, stream,
+                                                     duplicate_detector, topic_model, exclude_duplicates)
+                stats['fetch_seconds'] += time.perf_counter() - start
+                if fetched is None:
+                    break
+                records, flagged = fetched
+                stats['flagged'] += flagged
+                stats['batches_fetched'] += 1
+                # Blocks while the queue is full, so at most queue_size batches wait in memory
+                start = time.perf_counter()
+                await queue.put((stats['batches_fetched'] - 1, records))
+                stats['producer_wait_seconds'] += time.perf_counter() - start
+        finally:
+            for _ in range(workers):
+                await queue.put(None)
+    
+    async def consume(worker_number):
+        nonlocal next_merge
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            batch_number, records = item
+            start = time.perf_counter()
+            if use_processes:
+                partial, learned = await loop.run_in_executor(worker_executor, process_chunk_in_worker, records,
+                                                              low_memory, tag_matcher)
+                if learned['lexicon'] is not None:
+                    _adjective_lexicon.merge_updates(learned['lexicon'])
+                remember_sentence_scores(learned['sentence_scores'])
+            else:
+                partial = await loop.run_in_executor(worker_executor, process_chunk, records,
+                                                     low_memory, tag_matcher)
+            stats['process_seconds'] += time.perf_counter() - start
+            # Merging happens on the event loop thread, so no locking is needed
+            finished[batch_number] = partial
+            while next_merge in finished:
+                merge_aggregates(aggregates, finished.pop(next_merge))
+                next_merge += 1
+            stats['batches_processed'] += 1
+            print(f"  Worker {worker_number}: batch of {partial['responses']} responses "
+                  f"({aggregates['responses']} total, {queue.qsize()} queued)")
+    
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(produce(), *(consume(n) for n in range(1, workers + 1)))
+    finally:
+        fetch_executor.shutdown(wait=False)
+        worker_executor.shutdown(wait=True)
+    stats['wall_seconds'] = time.perf_counter() - started
+    
+    return aggregates, stats
+
+def run_pipelined(chunk_size, workers=2, queue_size=4, low_memory=False, input_path=None,
+                  use_documents=False, tag_matcher=None, topic_model=None, duplicate_detector=None,
+                  exclude_duplicates=False, use_processes=False, top_k_capacity=None):
+    """Fetch batches and run the text stages on them at the same time.
+    
+    An asyncio producer pulls batches of chunk_size responses (database
+    fetches run in a helper thread, so the event loop never blocks) and puts
+    them on a queue holding at most queue_size batches. workers consumers
+    take batches off the queue and prepare/aggregate them in an executor
+    while the next batches are still being fetched. A full queue makes the
+    producer wait, which bounds memory to roughly
+    (queue_size + workers) * chunk_size responses.
+    
+    Threads overlap network waits with NLP work; use_processes runs the
+    workers in separate processes so the NLP work itself also runs in
+    parallel. The merged aggregates are the same as with run_chunked.
+    """
+    print("\n" + "=" * 80)
+    mode = "processes" if use_processes else "threads"
+    print(f"PIPELINED PROCESSING ({workers} worker {mode}, batches of {chunk_size}, queue of {queue_size})")
+    print("=" * 80)
+    
+    aggregates, stats = asyncio.run(pipeline_async(
+        chunk_size, workers, queue_size, low_memory, input_path, use_documents,
+        tag_matcher, topic_model, duplicate_detector, exclude_duplicates, use_processes, top_k_capacity))
+    
+    wall = stats['wall_seconds']
+    busy = stats['fetch_seconds'] + stats['process_seconds']
+    print(f"\n  Batches: {stats['batches_processed']} processed")
+    print(f"  Fetching: {stats['fetch_seconds']:.2f}s, processing: {stats['process_seconds']:.2f}s, "
+          f"wall clock: {wall:.2f}s")
+    if wall > 0:
+        print(f"  Overlap: {max(busy - wall, 0):.2f}s of fetch/processing time ran concurrently")
+    print(f"  Producer blocked on a full queue for {stats['producer_wait_seconds']:.2f}s")
+    if duplicate_detector is not None:
+        action = "excluded" if exclude_duplicates else "flagged"
+        print(f"  Near-duplicate submissions {action}: {stats['flagged']}")
+        report_duplicate_groups(duplicate_detector)
+    
+    return aggregates
+
+# ============================================================================
+# TOKEN CORPUS (INTERNED, MEMORY-MAPPED)
+# ============================================================================
+
+# Single-valued answers stored per response so corpus counts can be sliced by segment
+CORPUS_SEGMENT_COLUMNS = ['age_bucket', 'hasChildren', 'cookingMethod_normalized']
+
+CORPUS_RATING_COLUMNS = [col for pair in COMPARISON_METRICS.values() for col in pair]
+
+class TokenCorpusWriter:
+    """Tokenize, tag and lemmatize responses into an interned, array-backed corpus.
+    
+    Tokens and lemmas share one string vocabulary and POS tags have their own;
+    every token is stored as integer IDs in typed arrays (token, lemma, POS,
+    source column) with per-response offsets, so nothing is kept as Python
+    strings per token. Responses can be added a chunk at a time; close()
+    writes the arrays as .npy files that TokenCorpus memory-maps.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.vocabulary = {}
+        self.pos_vocabulary = {}
+        self.segment_vocabularies = {col: {} for col in CORPUS_SEGMENT_COLUMNS}
+        self.lemma_cache = {}
+        self.token_ids = array.array('i')
+        self.lemma_ids = array.array('i')
+        self.pos_ids = array.array('B')
+        self.field_ids = array.array('B')
+        self.offsets = array.array('q', [0])
+        self.segment_codes = {col: array.array('i') for col in CORPUS_SEGMENT_COLUMNS}
+        self.ratings = {col: array.array('f') for col in CORPUS_RATING_COLUMNS}
+    
+    @staticmethod
+    def intern(vocabulary, value):
+        """ID of value in vocabulary, adding it if needed"""
+        identifier = vocabulary.get(value)
+        if identifier is None:
+            identifier = vocabulary[value] = len(vocabulary)
+        return identifier
+    
+    def lemma(self, token, tag):
+        """Lemma of a lowercase token for its treebank tag (memoized)"""
+        key = (token, tag[:1])
+        lemma = self.lemma_cache.get(key)
+        if lemma is None:
+            try:
+                lemma = lemmatizer.lemmatize(token, pos=get_wordnet_pos(tag)) or token
+            except Exception:
+                lemma = token
+            self.lemma_cache[key] = lemma
+        return lemma
+    
+    def add_frame(self, df):
+        """Append every response of df to the corpus"""
+        fields = [col for col in TEXT_COLUMNS if col in df.columns]
+        segments = {
+            'age_bucket': df['age'].map(age_bucket) if 'age' in df.columns else None,
+            'hasChildren': df['hasChildren'] if 'hasChildren' in df.columns else None,
+            'cookingMethod_normalized': (df['cookingMethod'].map(normalize_cooking_method)
+                                         if 'cookingMethod' in df.columns else None),
+        }
+        
+        for position in range(len(df)):
+            for field_id, col in enumerate(TEXT_COLUMNS):
+                if col not in fields:
+                    continue
+                text = normalize_text(df[col].iat[position])
+                if not text:
+                    continue
+                try:
+                    tagged = pos_tag(word_tokenize(text))
+                except Exception:
+                    tagged = [(token, 'NN') for token in text.split()]
+                for token, tag in tagged:
+                    token = token.lower()
+                    self.token_ids.append(self.intern(self.vocabulary, token))
+                    self.lemma_ids.append(self.intern(self.vocabulary, self.lemma(token, tag)))
+                    self.pos_ids.append(self.intern(self.pos_vocabulary, tag))
+                    self.field_ids.append(field_id)
+            self.offsets.append(len(self.token_ids))
             
-            x = np.arange(len(metrics))
-            width = 0.35
-            axes[1, 0].bar(x - width/2, a_scores, width, label='Product A', color='steelblue')
-            axes[1, 0].bar(x + width/2, b_scores, width, label='Product B', color='coral')
-            axes[1, 0].set_ylabel('Average Rating')
-            axes[1, 0].set_title('A vs B - Key Metrics Comparison')
-            axes[1, 0].set_xticks(x)
-            axes[1, 0].set_xticklabels(metrics, rotation=45, ha='right')
-            axes[1, 0].legend()
-            axes[1, 0].grid(axis='y', alpha=0.3)
+            for col, values in segments.items():
+                value = 'Unknown' if values is None else values.iat[position]
+                value = 'Unknown' if value is None or (not isinstance(value, str) and pd.isna(value)) else str(value)
+                self.segment_codes[col].append(self.intern(self.segment_vocabularies[col], value))
+            for col in CORPUS_RATING_COLUMNS:
+                value = to_float(df[col].iat[position]) if col in df.columns else np.nan
+                self.ratings[col].append(value)
+    
+    def close(self):
+        """Write the arrays and vocabularies to the corpus directory"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            'token_ids': np.frombuffer(self.token_ids, dtype=np.int32),
+            'lemma_ids': np.frombuffer(self.lemma_ids, dtype=np.int32),
+            'pos_ids': np.frombuffer(self.pos_ids, dtype=np.uint8),
+            'field_ids': np.frombuffer(self.field_ids, dtype=np.uint8),
+            'offsets': np.frombuffer(self.offsets, dtype=np.int64),
+        }
+        for col, codes in self.segment_codes.items():
+            arrays[f'segment_{col}'] = np.frombuffer(codes, dtype=np.int32)
+        for col, values in self.ratings.items():
+            arrays[f'rating_{col}'] = np.frombuffer(values, dtype=np.float32)
         
-        axes[1, 1].hist([df['A_taste'], df['B_taste']], bins=9, label=['Product A', 'Product B'], 
-                        color=['steelblue', 'coral'], alpha=0.7)
-        axes[1, 1].set_xlabel('Taste Rating')
-        axes[1, 1].set_ylabel('Frequency')
-        axes[1, 1].set_title('Taste Rating Distribution')
-        axes[1, 1].legend()
-        axes[1, 1].grid(axis='y', alpha=0.3)
+        for name, values in arrays.items():
+            np.save(self.path / f'{name}.npy', values)
+        
+        meta = {
+            'responses': len(self.offsets) - 1,
+            'tokens': len(self.token_ids),
+            'vocabulary': list(self.vocabulary),
+            'pos_tags': list(self.pos_vocabulary),
+            'fields': TEXT_COLUMNS,
+            'segments': {col: list(values) for col, values in self.segment_vocabularies.items()},
+            'ratings': CORPUS_RATING_COLUMNS,
+        }
+        with open(self.path / 'corpus.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        
+        return meta
+
+class TokenCorpus:
+    """Read side of a corpus written by TokenCorpusWriter.
     
-    plt.tight_layout()
-    plt.savefig('survey_analysis.png', dpi=300, bbox_inches='tight')
-    print("[OK] Saved: survey_analysis.png")
+    Arrays are opened with mmap_mode='r', so opening is instant and only the
+    pages a query touches are read. Counts are np.bincount over ID arrays;
+    filters are boolean masks over responses expanded to tokens.
+    """
     
-    # ========================================================================
-    # EXPORT TO EXCEL
-    # ========================================================================
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'corpus.json', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.vocabulary = self.meta['vocabulary']
+        self.pos_tags = self.meta['pos_tags']
+        self.fields = self.meta['fields']
+        
+        def load(name):
+            return np.load(self.path / f'{name}.npy', mmap_mode='r')
+        
+        self.token_ids = load('token_ids')
+        self.lemma_ids = load('lemma_ids')
+        self.pos_ids = load('pos_ids')
+        self.field_ids = load('field_ids')
+        self.offsets = load('offsets')
+        self.segments = {col: load(f'segment_{col}') for col in self.meta['segments']}
+        self.ratings = {col: load(f'rating_{col}') for col in self.meta['ratings']}
+    
+    def __len__(self):
+        return self.meta['responses']
+    
+    def response_tokens(self, response):
+        """Tokens of one response, as strings"""
+        start, end = self.offsets[response], self.offsets[response + 1]
+        return [self.vocabulary[i] for i in self.token_ids[start:end]]
+    
+    def response_mask(self, **filters):
+        """Boolean mask over responses; filters are segment values or (min, max) rating ranges"""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in filters.items():
+            if name in self.segments:
+                labels = self.meta['segments'][name]
+                code = labels.index(str(value)) if str(value) in labels else -1
+                mask &= np.asarray(self.segments[name]) == code
+            elif name in self.ratings:
+                low, high = value
+                ratings = np.asarray(self.ratings[name])
+                if low is not None:
+                    mask &= ratings >= low
+                if high is not None:
+                    mask &= ratings <= high
+            else:
+                raise ValueError(f"Unknown corpus filter: {name}")
+        return mask
+    
+    def token_mask(self, response_mask=None, pos_prefix=None, field=None):
+        """Boolean mask over tokens for a response mask, POS tag prefix and source column"""
+        mask = np.ones(len(self.token_ids), dtype=bool)
+        if response_mask is not None:
+            mask &= np.repeat(response_mask, np.diff(self.offsets))
+        if pos_prefix is not None:
+            matching = [i for i, tag in enumerate(self.pos_tags) if tag.startswith(pos_prefix)]
+            mask &= np.isin(self.pos_ids, matching)
+        if field is not None:
+            mask &= np.asarray(self.field_ids) == self.fields.index(field)
+        return mask
+    
+    def counts(self, kind='lemma', pos_prefix=None, field=None, **filters):
+        """Counter of lemmas (or tokens) matching the filters"""
+        ids = self.lemma_ids if kind == 'lemma' else self.token_ids
+        response_mask = self.response_mask(**filters) if filters else None
+        selected = np.asarray(ids)[self.token_mask(response_mask, pos_prefix, field)]
+        totals = np.bincount(selected, minlength=len(self.vocabulary))
+        return Counter({self.vocabulary[i]: int(totals[i]) for i in np.flatnonzero(totals)})
+    
+    def counts_by_segment(self, dimension, kind='lemma', pos_prefix='JJ', field=None):
+        """Counters per value of a segment dimension, from one pass over the arrays.
+        
+        (segment, string) pairs are combined into one int64 key and counted
+        with np.unique, so memory follows the pairs that occur rather than
+        segments x vocabulary.
+        """
+        ids = self.lemma_ids if kind == 'lemma' else self.token_ids
+        mask = self.token_mask(None, pos_prefix, field)
+        codes = np.repeat(np.asarray(self.segments[dimension]), np.diff(self.offsets))[mask]
+        selected = np.asarray(ids)[mask]
+        vocabulary_size = len(self.vocabulary)
+        labels = self.meta['segments'][dimension]
+        keys, totals = np.unique(codes.astype(np.int64) * vocabulary_size + selected, return_counts=True)
+        key_codes, key_ids = np.divmod(keys, vocabulary_size)
+        counters = {label: Counter() for label in labels}
+        for code, identifier, total in zip(key_codes.tolist(), key_ids.tolist(), totals.tolist()):
+            counters[labels[code]][self.vocabulary[identifier]] = total
+        return counters
+
+def build_token_corpus(path, chunk_size=1000, input_path=None, use_documents=False):
+    """Stream responses into a TokenCorpusWriter and write the corpus to path"""
+    writer = TokenCorpusWriter(path)
+    for records in iter_response_chunks(chunk_size, input_path, use_documents):
+        writer.add_frame(records_to_frame(records))
+        print(f"  {len(writer.offsets) - 1} responses, {len(writer.token_ids)} tokens, "
+              f"{len(writer.vocabulary)} distinct strings")
+    meta = writer.close()
+    print(f"[OK] Saved token corpus to {path} ({meta['responses']} responses, {meta['tokens']} tokens)")
+    return meta
+
+def report_corpus(path, top=15):
+    """Print adjective counts from a token corpus, overall and per segment"""
+    started = time.perf_counter()
+    corpus = TokenCorpus(path)
+    opened = time.perf_counter()
     
     print("\n" + "=" * 80)
-    print("EXPORTING RESULTS")
+    print(f"TOKEN CORPUS: {path}")
     print("=" * 80)
+    print(f"{len(corpus)} responses, {len(corpus.token_ids)} tokens, {len(corpus.vocabulary)} distinct strings "
+          f"(opened in {(opened - started) * 1000:.1f} ms)")
     
-    summary_results = {
-        'Tag_Frequency_A': pd.DataFrame(tag_freq_A.most_common(), columns=['Tag', 'Count_A']),
-        'Tag_Frequency_B': pd.DataFrame(tag_freq_B.most_common(), columns=['Tag', 'Count_B']),
-        'Tag_Ratings_A': pd.DataFrame(sorted_A, columns=['Tag', 'Avg_Rating_A']),
-        'Tag_Ratings_B': pd.DataFrame(sorted_B, columns=['Tag', 'Avg_Rating_B']),
-        'Positive_Adj_A': pd.DataFrame(pos_A_grouped.most_common(), columns=['Adjective', 'Count']),
-        'Negative_Adj_A': pd.DataFrame(neg_A_grouped.most_common(), columns=['Adjective', 'Count']),
-        'Positive_Adj_B': pd.DataFrame(pos_B_grouped.most_common(), columns=['Adjective', 'Count']),
-        'Negative_Adj_B': pd.DataFrame(neg_B_grouped.most_common(), columns=['Adjective', 'Count']),
+    for field in corpus.fields:
+        adjectives = corpus.counts(pos_prefix='JJ', field=field)
+        if adjectives:
+            top_adjectives = ', '.join(f"{adj} ({count})" for adj, count in adjectives.most_common(top))
+            print(f"\n{field} adjectives: {top_adjectives}")
+    
+    for dimension in corpus.segments:
+        print(f"\nAdjectives by {dimension}:")
+        for label, counter in corpus.counts_by_segment(dimension).items():
+            if counter:
+                print(f"  {label}: " + ', '.join(f"{adj} ({count})" for adj, count in counter.most_common(5)))
+    
+    print(f"\nQueried in {(time.perf_counter() - opened) * 1000:.1f} ms")
+
+# ============================================================================
+# INVERTED INDEX (FREE-TEXT SEARCH)
+# ============================================================================
+
+# Ratings stored with each indexed response for query filters
+INDEX_RATING_COLUMNS = ['A_taste', 'A_appearance', 'A_selfRelevance', 'A_expectation',
+                        'B_taste', 'B_appearance', 'B_selfRelevance', 'B_expectation', 'age']
+
+def encode_varint(value, out):
+    """Append value to out as a little-endian base-128 varint"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_postings(data):
+    """Decode a delta + varint posting list into a sorted array of document numbers"""
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = (raw & 0x80) == 0
+    # Index of the varint each byte belongs to, and the byte's position within it
+    group = np.concatenate(([0], np.cumsum(ends[:-1])))
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    shift = (np.arange(len(raw)) - starts[group]) * 7
+    values = np.zeros(int(ends.sum()), dtype=np.int64)
+    np.add.at(values, group, (raw & 0x7F).astype(np.int64) << shift)
+    return np.cumsum(values)
+
+# Layout version of the index files; older indexes have to be rebuilt
+INDEX_FORMAT = 3
+
+def content_digest(record):
+    """Short hash of a response's content, to notice edits of an indexed response"""
+    return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+class InvertedIndex:
+    """Term -> response posting lists over the cleaned free-text answers.
+    
+    Every word of every likes/dislikes/Feedback answer is indexed both on its
+    own ("soggy") and qualified by its column ("b_dislikes:soggy"). Posting
+    lists hold increasing document numbers as varint-encoded gaps, so they
+    stay compact and new responses are appended without re-encoding. The
+    ratings of each response and its answer text are stored alongside so
+    queries can filter on ratings and print matches without the source data.
+    
+    Responses are identified by response_key (plus an occurrence number for
+    file records that share one), so rebuilding from the same source only
+    indexes responses that were not seen before. A known response whose
+    content changed is indexed again as a new document and its old document
+    is marked deleted, so searches only ever return its current version.
+    
+    On disk the terms are a sorted array with offsets into postings.bin, and
+    the response keys and content digests live in their own file. Opened for
+    searching, the term table, postings, ratings and document offsets are
+    memory-mapped, so a query only reads the posting lists and ratings it
+    uses; keys and digests are only loaded when the index is opened for an
+    update.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.postings = {}
+        self.last_doc = {}
+        self.keys = []
+        self.digests = []
+        self.key_docs = {}
+        self.deleted = set()
+        self.document_count = 0
+        # Occurrences of each response_key seen in this update, across chunks
+        self.occurrences = Counter()
+        self.ratings = {col: array.array('f') for col in INDEX_RATING_COLUMNS}
+        self.pending_docs = []
+        self.doc_offsets = array.array('q', [0])
+        # Memory-mapped term table and postings of an index opened for searching
+        self.terms = None
+        self.term_offsets = None
+        self.postings_data = None
+    
+    @classmethod
+    def open(cls, path, for_update=False):
+        """Open an index written by save, or return an empty one.
+        
+        for_update loads everything into memory so add_records and save can
+        rewrite it; otherwise the files are memory-mapped read-only.
+        """
+        index = cls(path)
+        meta_path = index.path / 'index.json'
+        if not meta_path.exists():
+            return index
+        
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Search index {path} uses an older layout; delete it and rebuild with --build-index")
+        index.document_count = meta['documents']
+        index.deleted = set(np.load(index.path / 'deleted.npy').tolist())
+        
+        mmap_mode = None if for_update else 'r'
+        terms = np.load(index.path / 'terms.npy', mmap_mode=mmap_mode)
+        term_offsets = np.load(index.path / 'term_offsets.npy', mmap_mode=mmap_mode)
+        last_docs = np.load(index.path / 'term_last_docs.npy', mmap_mode=mmap_mode)
+        ratings = np.load(index.path / 'ratings.npy', mmap_mode=mmap_mode)
+        doc_offsets = np.load(index.path / 'doc_offsets.npy', mmap_mode=mmap_mode)
+        postings_path = index.path / 'postings.bin'
+        postings_data = (np.memmap(postings_path, dtype=np.uint8, mode='r') if postings_path.stat().st_size
+                         else np.zeros(0, dtype=np.uint8))
+        
+        if not for_update:
+            index.terms = terms
+            index.term_offsets = term_offsets
+            index.postings_data = postings_data
+            for position, col in enumerate(meta['rating_columns']):
+                if col in index.ratings:
+                    index.ratings[col] = ratings[:, position]
+            index.doc_offsets = doc_offsets
+            return index
+        
+        for term, start, end, last in zip(terms.tolist(), term_offsets[:-1].tolist(), term_offsets[1:].tolist(),
+                                           last_docs.tolist()):
+            index.postings[term] = bytearray(postings_data[start:end])
+            index.last_doc[term] = last
+        with open(index.path / 'keys.json', encoding='utf-8') as f:
+            stored = json.load(f)
+        index.keys = stored['keys']
+        index.digests = stored['digests']
+        index.key_docs = {key: doc for doc, key in enumerate(index.keys) if doc not in index.deleted}
+        for position, col in enumerate(meta['rating_columns']):
+            if col in index.ratings:
+                index.ratings[col] = array.array('f', ratings[:, position].tolist())
+        index.doc_offsets = array.array('q', doc_offsets.tolist())
+        return index
+    
+    def __len__(self):
+        return self.document_count
+    
+    def live_count(self):
+        """Number of responses in the index (documents not superseded by an edit)"""
+        return self.document_count - len(self.deleted)
+    
+    def posting_list(self, term):
+        """Encoded posting list of a term, empty if it does not occur"""
+        if self.terms is None:
+            return self.postings.get(term, b'')
+        row = np.searchsorted(self.terms, term)
+        if row < len(self.terms) and self.terms[row] == term:
+            return self.postings_data[self.term_offsets[row]:self.term_offsets[row + 1]]
+        return b''
+    
+    def add_records(self, records):
+        """Index new or changed responses of one chunk; returns (added, updated)"""
+        added = updated = 0
+        for record in records:
+            base_key = response_key(record)
+            key = f"{base_key}#{self.occurrences[base_key]}"
+            self.occurrences[base_key] += 1
+            
+            digest = content_digest(record)
+            previous = self.key_docs.get(key)
+            if previous is not None:
+                if self.digests[previous] == digest:
+                    continue
+                self.deleted.add(previous)
+                updated += 1
+            else:
+                added += 1
+            
+            doc = self.document_count
+            self.document_count += 1
+            self.keys.append(key)
+            self.digests.append(digest)
+            self.key_docs[key] = doc
+            
+            terms = set()
+            texts = {}
+            for col in TEXT_COLUMNS:
+                text = normalize_text(record.get(col))
+                if not text:
+                    continue
+                texts[col] = text
+                for word in clean_text(text).split():
+                    terms.add(word)
+                    terms.add(f"{col.lower()}:{word}")
+            
+            for term in terms:
+                encode_varint(doc - self.last_doc.get(term, 0), self.postings.setdefault(term, bytearray()))
+                self.last_doc[term] = doc
+            
+            for col in INDEX_RATING_COLUMNS:
+                self.ratings[col].append(to_float(record.get(col)))
+            self.pending_docs.append(texts)
+        return added, updated
+    
+    def save(self):
+        """Write the index files; answer text is appended to docs.jsonl"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        
+        with open(self.path / 'docs.jsonl', 'ab') as f:
+            for texts in self.pending_docs:
+                line = (json.dumps(texts) + '\n').encode('utf-8')
+                f.write(line)
+                self.doc_offsets.append(self.doc_offsets[-1] + len(line))
+        self.pending_docs = []
+        
+        terms = sorted(self.postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        with open(self.path / 'postings.bin', 'wb') as f:
+            for row, term in enumerate(terms):
+                f.write(self.postings[term])
+                term_offsets[row + 1] = term_offsets[row] + len(self.postings[term])
+        np.save(self.path / 'terms.npy', np.array(terms, dtype=str))
+        np.save(self.path / 'term_offsets.npy', term_offsets)
+        np.save(self.path / 'term_last_docs.npy', np.array([self.last_doc[term] for term in terms], dtype=np.int64))
+        
+        ratings = np.column_stack([np.frombuffer(self.ratings[col], dtype=np.float32)
+                                   for col in INDEX_RATING_COLUMNS]) if self.keys else \
+            np.zeros((0, len(INDEX_RATING_COLUMNS)), dtype=np.float32)
+        np.save(self.path / 'ratings.npy', ratings)
+        np.save(self.path / 'doc_offsets.npy', np.frombuffer(self.doc_offsets, dtype=np.int64))
+        np.save(self.path / 'deleted.npy', np.array(sorted(self.deleted), dtype=np.int64))
+        with open(self.path / 'keys.json', 'w', encoding='utf-8') as f:
+            json.dump({'keys': self.keys, 'digests': self.digests}, f)
+        
+        # Written last: its format marks the other files as complete
+        with open(self.path / 'index.json', 'w', encoding='utf-8') as f:
+            json.dump({'format': INDEX_FORMAT, 'documents': self.document_count, 'terms': len(terms),
+                       'rating_columns': INDEX_RATING_COLUMNS}, f)
+    
+    def documents(self, docs):
+        """Stored answer text of the given document numbers"""
+        results = []
+        with open(self.path / 'docs.jsonl', 'rb') as f:
+            for doc in docs:
+                f.seek(int(self.doc_offsets[doc]))
+                results.append(json.loads(f.readline()))
+        return results
+    
+    def live_docs(self):
+        """Document numbers that are not superseded by a newer version of their response"""
+        return self.drop_deleted(np.arange(len(self), dtype=np.int64))
+    
+    def drop_deleted(self, docs):
+        """docs without the documents superseded by a newer version of their response"""
+        if not self.deleted:
+            return docs
+        return np.setdiff1d(docs, np.fromiter(self.deleted, dtype=np.int64), assume_unique=True)
+    
+    def term_docs(self, term):
+        """Sorted document numbers containing a (possibly column-qualified) term"""
+        if ':' in term:
+            col, word = term.split(':', 1)
+            words = clean_text(word).split()
+            keys = [f"{col.lower()}:{w}" for w in words]
+        else:
+            keys = clean_text(term).split()
+        
+        if not keys:
+            return self.live_docs()
+        result = decode_postings(self.posting_list(keys[0]))
+        for key in keys[1:]:
+            result = np.intersect1d(result, decode_postings(self.posting_list(key)), assume_unique=True)
+        return result
+    
+    def rating_docs(self, col, op, value):
+        """Document numbers whose rating satisfies col <op> value"""
+        ratings = np.asarray(self.ratings[col], dtype=np.float32)
+        comparisons = {
+            '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+            '=': np.equal, '==': np.equal, '!=': np.not_equal,
+        }
+        return self.drop_deleted(np.flatnonzero(comparisons[op](ratings, value)))
+    
+    def search(self, query):
+        """Evaluate a boolean query; returns sorted document numbers.
+        
+        Terms are combined with AND (implicit between terms), OR, NOT and
+        parentheses. Rating filters look like B_taste<=3; column-qualified
+        terms like B_dislikes:soggy; quoted phrases require all their words.
+        """
+        tokens = re.findall(r'"[^"]*"|\(|\)|[A-Za-z_]\w*\s*(?:<=|>=|!=|==|<|>|=)\s*-?\d+(?:\.\d+)?|[^\s()]+',
+                            query)
+        position = 0
+        
+        def peek():
+            return tokens[position] if position < len(tokens) else None
+        
+        def parse_or():
+            nonlocal position
+            result = parse_and()
+            while peek() is not None and peek().upper() == 'OR':
+                position += 1
+                result = np.union1d(result, parse_and())
+            return result
+        
+        def parse_and():
+            nonlocal position
+            result = parse_not()
+            while peek() is not None and peek() != ')' and peek().upper() != 'OR':
+                if peek().upper() == 'AND':
+                    position += 1
+                result = np.intersect1d(result, parse_not(), assume_unique=True)
+            return result
+        
+        def parse_not():
+            nonlocal position
+            token = peek()
+            if token is None:
+                raise ValueError(f"Incomplete query: {query}")
+            if token.upper() == 'NOT':
+                position += 1
+                return np.setdiff1d(self.live_docs(), parse_not(), assume_unique=True)
+            if token == '(':
+                position += 1
+                result = parse_or()
+                if peek() != ')':
+                    raise ValueError(f"Missing ')' in query: {query}")
+                position += 1
+                return result
+            position += 1
+            
+            comparison = re.fullmatch(r'([A-Za-z_]\w*)\s*(<=|>=|!=|==|<|>|=)\s*(-?\d+(?:\.\d+)?)', token)
+            if comparison:
+                col, op, value = comparison.groups()
+                if col not in self.ratings:
+                    raise ValueError(f"Unknown rating column in query: {col}")
+                return self.rating_docs(col, op, float(value))
+            return self.term_docs(token.strip('"'))
+        
+        result = parse_or()
+        if peek() is not None:
+            raise ValueError(f"Unexpected '{peek()}' in query: {query}")
+        # Postings of superseded documents are never rewritten, only filtered out
+        return self.drop_deleted(result)
+
+def build_search_index(path, chunk_size=1000, input_path=None, use_documents=False):
+    """Create or update the inverted index at path with responses it has not seen"""
+    index = InvertedIndex.open(path, for_update=True)
+    existing = index.live_count()
+    
+    added = updated = 0
+    for chunk in iter_response_chunks(chunk_size, input_path, use_documents):
+        chunk_added, chunk_updated = index.add_records(chunk)
+        added += chunk_added
+        updated += chunk_updated
+    index.save()
+    
+    print(f"[OK] Search index {path}: {existing} responses before, {added} added, {updated} updated, "
+          f"{index.live_count()} total, {len(index.postings)} terms")
+    return index
+
+def run_search(path, query, limit=20):
+    """Print the responses matching a query"""
+    started = time.perf_counter()
+    index = InvertedIndex.open(path)
+    opened = time.perf_counter()
+    docs = index.search(query)
+    searched = time.perf_counter()
+    
+    print(f"{len(docs)} of {index.live_count()} responses match: {query}")
+    
+    for doc, texts in zip(docs[:limit], index.documents(docs[:limit])):
+        ratings = ', '.join(f"{col}={index.ratings[col][doc]:g}" for col in ['A_taste', 'B_taste']
+                            if not np.isnan(index.ratings[col][doc]))
+        print(f"\n#{doc} ({ratings})")
+        for col, text in texts.items():
+            print(f"  {col}: {text}")
+    if len(docs) > limit:
+        print(f"\n... {len(docs) - limit} more")
+    finished = time.perf_counter()
+    # Total covers opening the index and reading the printed responses, not only the query
+    print(f"\n({(finished - started) * 1000:.1f} ms in total: index opened in {(opened - started) * 1000:.1f} ms, "
+          f"query ran in {(searched - opened) * 1000:.2f} ms)")
+    return docs
+
+# ============================================================================
+# HTTP QUERY SERVICE
+# ============================================================================
+
+# Seconds between checks for new responses while the service is polled
+SERVICE_CHECK_INTERVAL = 30
+
+# Response and answer counts and highest ids of a survey: new responses and
+# answers added to existing responses both change it
+FINGERPRINT_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM responses WHERE survey_id = %(survey_id)s),
+        (SELECT COALESCE(MAX(id), 0) FROM responses WHERE survey_id = %(survey_id)s),
+        (SELECT COUNT(*) FROM answers a JOIN responses r ON r.id = a.response_id
+         WHERE r.survey_id = %(survey_id)s),
+        (SELECT COALESCE(MAX(a.id), 0) FROM answers a JOIN responses r ON r.id = a.response_id
+         WHERE r.survey_id = %(survey_id)s)
+"""
+
+def data_fingerprint(input_path=None, survey_id=1):
+    """Cheap identifier of the current response data; changes when responses arrive"""
+    if input_path:
+        stat = os.stat(input_path)
+        return f"file:{input_path}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    try:
+        db_url = get_database_url()
+        if not db_url:
+            raise ValueError("No database URL found")
+        conn = psycopg2.connect(db_url)
+        try:
+            cur = conn.cursor()
+            cur.execute(FINGERPRINT_QUERY, {'survey_id': survey_id})
+            counts = cur.fetchone()
+            cur.close()
+        finally:
+            conn.close()
+        return f"db:{survey_id}:" + ':'.join(str(value) for value in counts)
+    except Exception:
+        # Same fallback as load_data
+        path = find_responses_file()
+        stat = os.stat(path)
+        return f"file:{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def compute_results(input_path=None, use_documents=False, tag_matcher=None):
+    """Run the in-memory pipeline and return finalize_aggregates results"""
+    data = load_data(input_path, use_documents=use_documents)
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    del data
+    prepare_responses(df, tag_matcher=tag_matcher)
+    return finalize_aggregates(aggregate_responses(df))
+
+def json_ready(value):
+    """Convert numpy/pandas values (NaN, timestamps) into plain JSON-serializable values"""
+    if isinstance(value, dict):
+        return {str(k): json_ready(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_ready(v) for v in value]
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+def frame_records(frame):
+    """DataFrame rows as a list of dicts, keeping the index as the first field"""
+    if frame is None or frame.empty:
+        return []
+    index_name = frame.index.name or 'index'
+    return json_ready(frame.reset_index().rename(columns={'index': index_name}).to_dict(orient='records'))
+
+def build_service_payloads(results, fingerprint):
+    """JSON payloads served by the HTTP service, keyed by endpoint path"""
+    payloads = {
+        '/api/summary': {
+            'responses': results['responses'],
+            'metric_means': results['metric_means'],
+            'fingerprint': fingerprint,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+        },
+        '/api/tags': {variant: counter.most_common() for variant, counter in results['tag_freq'].items()},
+        '/api/adjectives': {
+            'grouped': {key: counter.most_common() for key, counter in results['adjectives'].items()},
+            'raw': {key: counter.most_common() for key, counter in results['adjectives_raw'].items()},
+        },
+        '/api/tag-ratings': {variant: top_tag_ratings(results, variant, n=None) for variant in ['A', 'B']},
+        '/api/metrics': frame_records(results['comparison_df']),
+        '/api/sentence-sentiment': frame_records(results['sentence_sentiment']),
+        '/api/trends/weekly': frame_records(results['trends']['weekly']),
+        '/api/cooking-methods': frame_records(results['cooking_summary']),
     }
+    payloads['/api'] = {'endpoints': sorted(payloads)}
+    return {path: json.dumps(json_ready(payload)).encode('utf-8') for path, payload in payloads.items()}
+
+class SummaryCache:
+    """Serialized summary payloads, recomputed only when the data fingerprint changes.
     
-    if not comparison_df.empty:
-        summary_results['Metrics_Comparison'] = comparison_df
+    The fingerprint is checked at most every check_interval seconds, so
+    frequent polling neither re-runs the analysis nor queries the database
+    on every request. Each payload carries an ETag derived from its bytes.
     
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    excel_filename = f'survey_analysis_results_{timestamp}.xlsx'
+    One thread at a time recomputes, outside the lock guarding the payloads;
+    meanwhile requests keep getting the previous payloads, and only requests
+    arriving before the first computation has finished wait for it.
+    """
     
-    with pd.ExcelWriter(excel_filename) as writer:
-        for sheet_name, data in summary_results.items():
-            if isinstance(data, pd.DataFrame) and not data.empty:
-                data.to_excel(writer, sheet_name=sheet_name, 
-                             index=True if sheet_name == 'Metrics_Comparison' else False)
+    def __init__(self, input_path=None, use_documents=False, tag_matcher=None,
+                 check_interval=SERVICE_CHECK_INTERVAL):
+        self.input_path = input_path
+        self.use_documents = use_documents
+        self.tag_matcher = tag_matcher
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.compute_lock = threading.Lock()
+        self.fingerprint = None
+        self.checked_at = 0.0
+        self.payloads = {}
+        self.etags = {}
+    
+    def refresh(self, force=False):
+        """Recompute the payloads if the data changed since the last check"""
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.payloads and now - self.checked_at < self.check_interval:
+                return
+            self.checked_at = now
+            has_payloads = bool(self.payloads)
         
-        # Add raw data
-        df.to_excel(writer, sheet_name='Raw_Data', index=False)
+        # Stale payloads are served while another thread recomputes
+        if not self.compute_lock.acquire(blocking=not has_payloads):
+            return
+        try:
+            fingerprint = data_fingerprint(self.input_path)
+            if fingerprint == self.fingerprint and self.payloads:
+                return
+            
+            print(f"[SERVICE] Recomputing summaries ({fingerprint})")
+            try:
+                results = compute_results(self.input_path, self.use_documents, self.tag_matcher)
+            except Exception as e:
+                if not self.payloads:
+                    raise
+                print(f"[ERROR] Recomputing summaries failed, serving the previous ones: {e}")
+                return
+            payloads = build_service_payloads(results, fingerprint)
+            etags = {path: '"' + hashlib.sha1(body).hexdigest() + '"' for path, body in payloads.items()}
+            with self.lock:
+                self.payloads, self.etags, self.fingerprint = payloads, etags, fingerprint
+        finally:
+            self.compute_lock.release()
     
-    print(f"[OK] Saved: {excel_filename}")
+    def get(self, path):
+        """Return (body, etag) for an endpoint, or None if it does not exist"""
+        self.refresh()
+        with self.lock:
+            payloads, etags = self.payloads, self.etags
+        if path not in payloads:
+            return None
+        return payloads[path], etags[path]
+
+class SummaryRequestHandler(BaseHTTPRequestHandler):
+    """GET-only JSON handler backed by the server's SummaryCache"""
+    
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/') or '/api'
+        try:
+            entry = self.server.cache.get(path)
+        except Exception as e:
+            self.send_json(500, json.dumps({'error': str(e)}).encode('utf-8'))
+            return
+        
+        if entry is None:
+            self.send_json(404, json.dumps({'error': f'Unknown endpoint {path}'}).encode('utf-8'))
+            return
+        
+        body, etag = entry
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        
+        self.send_json(200, body, etag)
+    
+    def send_json(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        print(f"[SERVICE] {self.address_string()} {format % args}")
+
+def serve(port=8765, host='127.0.0.1', input_path=None, use_documents=False, tag_matcher=None,
+          check_interval=SERVICE_CHECK_INTERVAL, sentence_sentiment=False):
+    """Serve the summary results as JSON until interrupted"""
+    global _sentence_sentiment
+    _sentence_sentiment = sentence_sentiment
+    cache = SummaryCache(input_path, use_documents, tag_matcher, check_interval)
+    cache.refresh(force=True)
+    
+    server = ThreadingHTTPServer((host, port), SummaryRequestHandler)
+    server.cache = cache
+    print(f"\n[OK] Serving survey summaries on http://{host}:{port}/api")
+    for path in sorted(cache.payloads):
+        print(f"  - {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping service")
+    finally:
+        server.server_close()
+
+# ============================================================================
+# MAIN ANALYSIS
+# ============================================================================
+
+def main(low_memory=False, chunk_size=None, input_path=None, use_documents=False,
+         wordnet_synonyms=False, fuzzy_tags=False, topic_clusters=None, topic_model_path=None,
+         detect_duplicates=False, exclude_duplicates=False, pipeline_workers=None,
+         queue_size=4, use_processes=False, sentence_cache=None, approx_top_k=None,
+         adjective_lexicon=None, sentence_sentiment=False):
+    """Main analysis function
+    
+    With low_memory=True, ratings are downcast to int8 and repeated strings
+    are stored as categoricals. The per-answer tag and adjective analysis
+    columns are dropped by prepare_responses once they have been combined;
+    the adjective lists and combined tags (AGGREGATED_COLUMNS) are kept
+    until aggregate_responses has run and dropped after it. The Raw_Data
+    sheet then only contains the original answers and the final derived
+    columns.
+    
+    With chunk_size set, responses are streamed and processed chunk_size at a
+    time (see run_chunked) and the Raw_Data sheet is not written.
+    
+    input_path reads responses from a .json / .jsonl (optionally .gz) export
+    instead of the database; use_documents reads the denormalized
+    response_documents table instead of joining answers.
+    
+    wordnet_synonyms assigns adjectives that are not in the hand-made synonym
+    groups to a group through WordNet (cached in WORDNET_CLUSTER_CACHE).
+    
+    fuzzy_tags also matches tag keywords against misspelled words (see
+    FuzzyKeywordMatcher).
+    
+    topic_clusters clusters the free-text feedback into that many topics (see
+    FeedbackTopicModel). With topic_model_path, an existing model is loaded
+    from that file and updated with the responses it has not seen, then
+    saved back; topic_clusters must then match the model's topic count.
+    
+    detect_duplicates adds is_duplicate / duplicate_group columns (see
+    DuplicateDetector); exclude_duplicates also drops the flagged rows before
+    anything is aggregated.
+    
+    pipeline_workers overlaps fetching with processing (see run_pipelined),
+    using batches of chunk_size (default PIPELINE_CHUNK_SIZE) and a queue
+    of at most queue_size batches. Like chunked mode, it skips Raw_Data.
+    
+    sentence_sentiment adds sentence-level VADER scores (Sentence_Sentiment).
+    sentence_cache, which implies it, is a JSON file of memoized sentence
+    scores; it is loaded first and saved at the end so reruns only score
+    new sentences.
+    
+    approx_top_k keeps adjective and tag counts in SpaceSaving summaries of
+    that many items while streaming (implies chunked mode); reported counts
+    are then estimates with the error bounds printed alongside.
+    
+    adjective_lexicon is a JSON file of learned token -> adjective taggings
+    (see AdjectiveLexicon); answers made only of trusted tokens skip POS
+    tagging. It is loaded first and saved, with new taggings, at the end.
+    """
+    global _adjective_lexicon, _sentence_sentiment
+    
+    if approx_top_k and not (chunk_size or pipeline_workers):
+        chunk_size = PIPELINE_CHUNK_SIZE
+    
+    _sentence_sentiment = bool(sentence_sentiment or sentence_cache)
+    
+    if sentence_cache:
+        loaded = load_sentence_scores(sentence_cache)
+        print(f"Loaded {loaded} memoized sentence scores from {sentence_cache}")
+    
+    if adjective_lexicon:
+        _adjective_lexicon = AdjectiveLexicon.load(adjective_lexicon)
+        print(f"Loaded adjective lexicon from {adjective_lexicon} ({len(_adjective_lexicon.trusted)} trusted tokens)")
+    
+    tag_matcher = FuzzyKeywordMatcher(TAG_KEYWORDS) if fuzzy_tags else None
+    
+    topic_model = None
+    if topic_clusters or topic_model_path:
+        install_package('scikit-learn', 'sklearn')
+    if topic_model_path and Path(topic_model_path).exists():
+        topic_model = FeedbackTopicModel.load(topic_model_path)
+        print(f"Loaded feedback topic model from {topic_model_path} "
+              f"({len(topic_model.seen_keys)} responses, {topic_model.documents} comments seen)")
+        if topic_clusters and topic_clusters != topic_model.n_clusters:
+            raise ValueError(f"{topic_model_path} has {topic_model.n_clusters} topics, not {topic_clusters}; "
+                             f"delete it (or pass another --topic-model path) to cluster into {topic_clusters}")
+    elif topic_clusters:
+        topic_model = FeedbackTopicModel(n_clusters=topic_clusters)
+    
+    detect_duplicates = detect_duplicates or exclude_duplicates
+    duplicate_detector = DuplicateDetector() if detect_duplicates else None
+    
+    if pipeline_workers:
+        df = None
+        aggregates = run_pipelined(chunk_size or PIPELINE_CHUNK_SIZE, workers=pipeline_workers,
+                                   queue_size=queue_size, low_memory=low_memory, input_path=input_path,
+                                   use_documents=use_documents, tag_matcher=tag_matcher,
+                                   topic_model=topic_model, duplicate_detector=duplicate_detector,
+                                   exclude_duplicates=exclude_duplicates, use_processes=use_processes,
+                                   top_k_capacity=approx_top_k)
+        
+        print("\n" + "=" * 80)
+        print("DATASET OVERVIEW")
+        print("=" * 80)
+        print(f"Total responses: {aggregates['responses']}")
+        print(f"Columns: {aggregates['columns']}")
+    elif chunk_size:
+        df = None
+        aggregates = run_chunked(chunk_size, low_memory=low_memory, input_path=input_path,
+                                 use_documents=use_documents, tag_matcher=tag_matcher,
+                                 topic_model=topic_model, duplicate_detector=duplicate_detector,
+                                 exclude_duplicates=exclude_duplicates, top_k_capacity=approx_top_k)
+        
+        print("\n" + "=" * 80)
+        print("DATASET OVERVIEW")
+        print("=" * 80)
+        print(f"Total responses: {aggregates['responses']}")
+        print(f"Columns: {aggregates['columns']}")
+    else:
+        # Load data
+        data = load_data(input_path, use_documents=use_documents)
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        del data
+        
+        print("\n" + "=" * 80)
+        print("DATASET OVERVIEW")
+        print("=" * 80)
+        print(f"Total responses: {len(df)}")
+        print(f"Columns: {list(df.columns)}")
+        
+        if duplicate_detector is not None:
+            flagged = duplicate_detector.flag(df)
+            report_duplicates(df, flagged)
+            if exclude_duplicates and flagged:
+                df = df[~df['is_duplicate']].reset_index(drop=True)
+                print(f"Excluded {flagged} flagged submissions; analysing {len(df)} responses")
+        
+        if low_memory:
+            print("\nLow-memory mode enabled")
+            memory_before = report_memory(df, "After loading")
+            downcast_ratings(df)
+            categorize_columns(df)
+            report_memory(df, "After downcasting")
+        
+        if topic_model is not None:
+            for start in range(0, len(df), TOPIC_BATCH_SIZE):
+                topic_model.partial_fit_frame(df.iloc[start:start + TOPIC_BATCH_SIZE])
+        
+        prepare_responses(df, low_memory=low_memory, tag_matcher=tag_matcher)
+        if low_memory:
+            report_memory(df, "After text processing")
+        
+        aggregates = aggregate_responses(df)
+        if low_memory:
+            # Tags and adjective lists have now fed every aggregate that needs them
+            evict_columns(df, AGGREGATED_COLUMNS)
+            report_memory(df, "After aggregation")
+    
+    if wordnet_synonyms:
+        vocabulary = set()
+        for counter in aggregates['adjectives'].values():
+            vocabulary.update(counter)
+        added = extend_synonym_index_with_wordnet(vocabulary)
+        print(f"\nWordNet clustering assigned {added} additional adjectives to synonym groups")
+    
+    if sentence_cache:
+        save_sentence_scores(sentence_cache)
+        print(f"[OK] Saved {len(_sentence_scores)} sentence scores to {sentence_cache}")
+    
+    if _adjective_lexicon is not None:
+        _adjective_lexicon.report()
+        _adjective_lexicon.save(adjective_lexicon)
+        print(f"[OK] Saved adjective lexicon to {adjective_lexicon}")
+        _adjective_lexicon = None
+    
+    results = finalize_aggregates(aggregates)
+    report_results(results)
+    
+    if topic_model is not None:
+        results['feedback_topics'] = topic_model.summary_frame()
+        report_topics(results['feedback_topics'])
+        if topic_model_path:
+            topic_model.save(topic_model_path)
+            print(f"[OK] Saved: {topic_model_path}")
+    
+    # ========================================================================
+    # VISUALIZATIONS
+    # ========================================================================
+    
+    plot_results(results)
+    
+    # ========================================================================
+    # EXPORT TO EXCEL
+    # ========================================================================
+    
+    generated_files = export_results(results, df)
+    
+    if low_memory and df is not None:
+        memory_after = report_memory(df, "At export")
+        print(f"[MEMORY] DataFrame memory: {memory_before:.3f} MB after loading -> {memory_after:.3f} MB at export")
     
     # ========================================================================
     # FINAL SUMMARY
@@ -1079,13 +5308,17 @@ def main():
     print("\nFiles generated:")
     print("  - adjective_analysis.png")
     print("  - survey_analysis.png")
-    print(f"  - {excel_filename}")
+    for filename in generated_files:
+        print(f"  - {filename}")
     
-    if 'A_taste' in df.columns and 'B_taste' in df.columns:
+    metric_means = results['metric_means']
+    if 'A_taste' in metric_means and 'B_taste' in metric_means:
+        tag_freq_A = results['tag_freq']['A']
+        tag_freq_B = results['tag_freq']['B']
         print("\nKey Findings:")
-        print(f"  - Product A average taste: {df['A_taste'].mean():.2f}")
-        print(f"  - Product B average taste: {df['B_taste'].mean():.2f}")
-        winner = "B" if df['B_taste'].mean() > df['A_taste'].mean() else "A"
+        print(f"  - Product A average taste: {metric_means['A_taste']:.2f}")
+        print(f"  - Product B average taste: {metric_means['B_taste']:.2f}")
+        winner = "B" if metric_means['B_taste'] > metric_means['A_taste'] else "A"
         print(f"  - Winner: Product {winner}")
         
         if tag_freq_A:
@@ -1095,11 +5328,131 @@ def main():
     
     print("\n" + "=" * 80)
 
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="RCL survey analysis")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="downcast ratings, use categoricals and drop intermediate columns early")
+    parser.add_argument('--chunk-size', type=int, default=None, metavar='N',
+                        help="stream responses and process them N at a time instead of all at once")
+    parser.add_argument('--input', dest='input_path', default=None, metavar='PATH',
+                        help="read responses from a .json/.jsonl export (optionally .gz) instead of the database")
+    parser.add_argument('--from-documents', dest='use_documents', action='store_true',
+                        help="read the denormalized response_documents table instead of joining answers")
+    parser.add_argument('--wordnet-synonyms', action='store_true',
+                        help="group adjectives missing from the synonym list via WordNet (cached on disk)")
+    parser.add_argument('--fuzzy-tags', action='store_true',
+                        help="also match tag keywords against misspelled words")
+    parser.add_argument('--topics', dest='topic_clusters', type=int, default=None, metavar='K',
+                        help="cluster the free-text feedback into K topics")
+    parser.add_argument('--topic-model', dest='topic_model_path', default=None, metavar='PATH',
+                        help="load/update/save the feedback topic model at PATH across runs")
+    parser.add_argument('--detect-duplicates', action='store_true',
+                        help="flag near-duplicate submissions (is_duplicate / duplicate_group columns)")
+    parser.add_argument('--exclude-duplicates', action='store_true',
+                        help="flag near-duplicate submissions and leave them out of the analysis")
+    parser.add_argument('--pipeline', dest='pipeline_workers', type=int, default=None, metavar='WORKERS',
+                        help="fetch batches and run the text stages on WORKERS workers at the same time")
+    parser.add_argument('--queue-size', type=int, default=4, metavar='N',
+                        help="batches the pipelined mode may hold before fetching pauses (default 4)")
+    parser.add_argument('--pipeline-processes', dest='use_processes', action='store_true',
+                        help="run pipeline workers in separate processes instead of threads")
+    parser.add_argument('--serve', dest='serve_port', type=int, nargs='?', const=8765, default=None,
+                        metavar='PORT', help="serve the summaries as JSON on PORT (default 8765) instead of exporting")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="interface for --serve to listen on (default 127.0.0.1)")
+    parser.add_argument('--sentence-sentiment', action='store_true',
+                        help="add sentence-level VADER scores per answer (Sentence_Sentiment sheet)")
+    parser.add_argument('--sentence-cache', default=None, metavar='PATH',
+                        help="like --sentence-sentiment, memoizing the scores in PATH so reruns only score new sentences")
+    parser.add_argument('--adjective-lexicon', nargs='?', const=ADJECTIVE_LEXICON_FILE, default=None, metavar='PATH',
+                        help="skip POS tagging for answers whose words a learned lexicon covers "
+                             f"(kept in PATH, default {ADJECTIVE_LEXICON_FILE})")
+    parser.add_argument('--build-nlp-bundle', nargs='?', const=NLP_BUNDLE_DIR, default=None, metavar='DIR',
+                        help="serialize the tagger weights, adjective lemmas, VADER lexicon and stopwords into DIR "
+                             f"(default {NLP_BUNDLE_DIR}; ANALYTICS_NLP_BUNDLE overrides it) for fast startup and exit")
+    parser.add_argument('--build-corpus', default=None, metavar='DIR',
+                        help="tokenize, tag and lemmatize responses into a memory-mapped corpus in DIR and exit")
+    parser.add_argument('--corpus', default=None, metavar='DIR',
+                        help="report adjective counts from a corpus built with --build-corpus and exit")
+    parser.add_argument('--build-index', default=None, metavar='DIR',
+                        help="create or update the free-text search index in DIR and exit")
+    parser.add_argument('--search', default=None, metavar='QUERY',
+                        help="search the index, e.g. 'soggy AND B_taste<=3' (use with --index)")
+    parser.add_argument('--index', default='search_index', metavar='DIR',
+                        help="search index directory used by --search (default search_index)")
+    parser.add_argument('--generate-synthetic', type=int, default=None, metavar='N',
+                        help="write N generated responses to synthetic_responses_N.jsonl.gz and exit; "
+                             "pass that file to --input to analyze it")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="random seed for --generate-synthetic and --preview (default 0)")
+    parser.add_argument('--approx-top-k', type=int, default=None, metavar='CAPACITY',
+                        help="stream with adjective/tag counts kept in bounded Space-Saving summaries of CAPACITY items")
+    parser.add_argument('--preview', type=float, nargs='?', const=PREVIEW_TARGET_SECONDS, default=None,
+                        metavar='SECONDS',
+                        help="estimate metric means, tag frequencies and the winner with 95%% intervals from a "
+                             f"stratified sample sized to finish in SECONDS (default {PREVIEW_TARGET_SECONDS}) and exit")
+    parser.add_argument('--update-trends', default=None, metavar='PATH',
+                        help="add responses submitted since the last update to the day buckets in PATH and exit")
+    parser.add_argument('--benchmark-tags', action='store_true',
+                        help="time exact vs fuzzy tag matching on the response text and exit")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        main()
+        if args.benchmark_tags:
+            data = load_data(args.input_path, use_documents=args.use_documents)
+            df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+            texts = [text for col in TEXT_COLUMNS if col in df.columns for text in df[col]]
+            benchmark_tag_matching(texts)
+            sys.exit(0)
+        if args.build_corpus:
+            build_token_corpus(args.build_corpus, chunk_size=args.chunk_size or PIPELINE_CHUNK_SIZE,
+                               input_path=args.input_path, use_documents=args.use_documents)
+            sys.exit(0)
+        if args.build_nlp_bundle:
+            build_nlp_bundle(args.build_nlp_bundle)
+            sys.exit(0)
+        if args.generate_synthetic:
+            write_synthetic_responses(f'synthetic_responses_{args.generate_synthetic}.jsonl.gz',
+                                      args.generate_synthetic, seed=args.seed)
+            sys.exit(0)
+        if args.preview is not None:
+            run_preview(args.preview, input_path=args.input_path, use_documents=args.use_documents, seed=args.seed,
+                        tag_matcher=FuzzyKeywordMatcher(TAG_KEYWORDS) if args.fuzzy_tags else None)
+            sys.exit(0)
+        if args.update_trends:
+            trends = update_trend_store(args.update_trends, chunk_size=args.chunk_size or PIPELINE_CHUNK_SIZE,
+                                        input_path=args.input_path, use_documents=args.use_documents,
+                                        tag_matcher=FuzzyKeywordMatcher(TAG_KEYWORDS) if args.fuzzy_tags else None)
+            report_trends(trend_frames(trends))
+            sys.exit(0)
+        if args.build_index:
+            build_search_index(args.build_index, chunk_size=args.chunk_size or PIPELINE_CHUNK_SIZE,
+                               input_path=args.input_path, use_documents=args.use_documents)
+            sys.exit(0)
+        if args.search:
+            run_search(args.index, args.search)
+            sys.exit(0)
+        if args.corpus:
+            report_corpus(args.corpus)
+            sys.exit(0)
+        if args.serve_port is not None:
+            serve(args.serve_port, args.host, input_path=args.input_path, use_documents=args.use_documents,
+                  tag_matcher=FuzzyKeywordMatcher(TAG_KEYWORDS) if args.fuzzy_tags else None,
+                  sentence_sentiment=args.sentence_sentiment)
+            sys.exit(0)
+        main(low_memory=args.low_memory, chunk_size=args.chunk_size, input_path=args.input_path,
+             use_documents=args.use_documents, wordnet_synonyms=args.wordnet_synonyms,
+             fuzzy_tags=args.fuzzy_tags, topic_clusters=args.topic_clusters,
+             topic_model_path=args.topic_model_path, detect_duplicates=args.detect_duplicates,
+             exclude_duplicates=args.exclude_duplicates, pipeline_workers=args.pipeline_workers,
+             queue_size=args.queue_size, use_processes=args.use_processes,
+             sentence_cache=args.sentence_cache, approx_top_k=args.approx_top_k,
+             adjective_lexicon=args.adjective_lexicon, sentence_sentiment=args.sentence_sentiment)
     except Exception as e:
         print(f"\n[ERROR] Error: {str(e)}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -52,6 +52,111 @@ CREATE INDEX IF NOT EXISTS idx_responses_submitted_at ON responses(submitted_at)
 CREATE INDEX IF NOT EXISTS idx_answers_response_id ON answers(response_id);
 CREATE INDEX IF NOT EXISTS idx_answers_question_id ON answers(question_id);
 
+-- Denormalized analytics documents: one JSONB document per response
+-- ({question_id: {"value": answer_value, "data": answer_data}}), kept in sync by
+-- the triggers below so analytics reads don't re-join and re-aggregate answers
+CREATE TABLE IF NOT EXISTS response_documents (
+  response_id INTEGER PRIMARY KEY REFERENCES responses(id) ON DELETE CASCADE,
+  survey_id INTEGER NOT NULL,
+  submitted_at TIMESTAMP,
+  document JSONB NOT NULL DEFAULT '{}'::jsonb
+);
+
+CREATE INDEX IF NOT EXISTS idx_response_documents_survey_submitted ON response_documents(survey_id, submitted_at);
+
+-- New responses get an empty document (once per statement, so bulk COPYs
+-- insert all of their documents in one go)
+CREATE OR REPLACE FUNCTION create_response_documents() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO response_documents (response_id, survey_id, submitted_at)
+  SELECT id, survey_id, submitted_at
+  FROM new_responses
+  ON CONFLICT (response_id) DO NOTHING;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS responses_create_document ON responses;
+DROP FUNCTION IF EXISTS create_response_document();
+
+CREATE TRIGGER responses_create_document
+  AFTER INSERT ON responses
+  REFERENCING NEW TABLE AS new_responses
+  FOR EACH STATEMENT EXECUTE FUNCTION create_response_documents();
+
+-- After each statement on answers, the documents of every response it touched
+-- are rebuilt from that response's answers: one write per response instead
+-- of one per answer, and deleted answers or a changed question_id/response_id
+-- leave no stale keys behind
+CREATE OR REPLACE FUNCTION sync_response_documents() RETURNS trigger AS $$
+DECLARE
+  affected INTEGER[];
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(DISTINCT response_id) INTO affected FROM new_answers;
+  ELSIF TG_OP = 'UPDATE' THEN
+    SELECT array_agg(DISTINCT response_id) INTO affected
+    FROM (SELECT response_id FROM new_answers UNION SELECT response_id FROM old_answers) changed;
+  ELSE
+    SELECT array_agg(DISTINCT response_id) INTO affected FROM old_answers;
+  END IF;
+
+  IF affected IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  -- Same statement as the backfill below, limited to the affected responses
+  INSERT INTO response_documents (response_id, survey_id, submitted_at, document)
+  SELECT r.id, r.survey_id, r.submitted_at,
+         COALESCE(
+           jsonb_object_agg(a.question_id, jsonb_build_object('value', a.answer_value, 'data', a.answer_data))
+             FILTER (WHERE a.question_id IS NOT NULL),
+           '{}'::jsonb
+         )
+  FROM responses r
+  LEFT JOIN answers a ON a.response_id = r.id
+  WHERE r.id = ANY(affected)
+  GROUP BY r.id, r.survey_id, r.submitted_at
+  ON CONFLICT (response_id) DO UPDATE SET document = EXCLUDED.document;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need one trigger per event
+DROP TRIGGER IF EXISTS answers_sync_document ON answers;
+DROP TRIGGER IF EXISTS answers_sync_documents_insert ON answers;
+DROP TRIGGER IF EXISTS answers_sync_documents_update ON answers;
+DROP TRIGGER IF EXISTS answers_sync_documents_delete ON answers;
+DROP FUNCTION IF EXISTS sync_response_document();
+
+CREATE TRIGGER answers_sync_documents_insert
+  AFTER INSERT ON answers
+  REFERENCING NEW TABLE AS new_answers
+  FOR EACH STATEMENT EXECUTE FUNCTION sync_response_documents();
+
+CREATE TRIGGER answers_sync_documents_update
+  AFTER UPDATE ON answers
+  REFERENCING OLD TABLE AS old_answers NEW TABLE AS new_answers
+  FOR EACH STATEMENT EXECUTE FUNCTION sync_response_documents();
+
+CREATE TRIGGER answers_sync_documents_delete
+  AFTER DELETE ON answers
+  REFERENCING OLD TABLE AS old_answers
+  FOR EACH STATEMENT EXECUTE FUNCTION sync_response_documents();
+
+-- Backfill documents for responses stored before the triggers existed
+INSERT INTO response_documents (response_id, survey_id, submitted_at, document)
+SELECT r.id, r.survey_id, r.submitted_at,
+       COALESCE(
+         jsonb_object_agg(a.question_id, jsonb_build_object('value', a.answer_value, 'data', a.answer_data))
+           FILTER (WHERE a.question_id IS NOT NULL),
+         '{}'::jsonb
+       )
+FROM responses r
+LEFT JOIN answers a ON a.response_id = r.id
+GROUP BY r.id, r.survey_id, r.submitted_at
+ON CONFLICT (response_id) DO NOTHING;
+
 -- Insert default survey
 INSERT INTO surveys (id, title, description) 
 VALUES (1, 'RCL Questionnaire', 'BBQ Chicken Pocket Product Survey')
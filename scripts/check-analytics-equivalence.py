@@ -0,0 +1,892 @@
+"""
+Golden-output harness for analytics.py
+
+The reference is a frozen copy of analytics.py's original row-by-row code
+(the per-response loops of main() and the helpers they call), kept in this
+file so it cannot change along with the code it checks. It runs next to the
+optimized paths over the same responses and the harness diffs what they
+produce: tag and adjective Counters, tag ratings, metric means, the
+comparison and cooking-method tables, and - between the optimized paths -
+the contents of every summary sheet. Any speed-up should leave this harness
+reporting no differences.
+
+Deliberate behaviour changes since that code are applied to the reference
+as named adjustments (see BASELINE_ADJUSTMENTS) rather than by editing the
+frozen copy.
+
+    python scripts/check-analytics-equivalence.py
+    python scripts/check-analytics-equivalence.py --synthetic 5000 --seed 3
+    python scripts/check-analytics-equivalence.py --chunk-sizes 1 7 1000
+    python scripts/check-analytics-equivalence.py --save-golden golden/responses.json
+    python scripts/check-analytics-equivalence.py --golden golden/responses.json
+
+Exits with status 1 when any difference is found.
+"""
+
+import re
+import sys
+import json
+import math
+import argparse
+import tempfile
+from pathlib import Path
+from collections import Counter, defaultdict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import analytics
+
+# Imported after analytics, which downloads the NLTK data. The baseline used
+# NLTK directly, so the reference does too, whatever analytics.py rebinds.
+from nltk.tokenize import word_tokenize
+from nltk.tag import pos_tag
+from nltk.stem import WordNetLemmatizer
+from nltk.corpus import wordnet, stopwords
+from nltk.sentiment import SentimentIntensityAnalyzer
+
+# Relative tolerance for float comparisons (sums in a different order round differently)
+FLOAT_TOLERANCE = 1e-9
+
+# Differences printed per check before truncating
+MAX_REPORTED = 10
+
+# ============================================================================
+# FROZEN BASELINE
+# ============================================================================
+# Copied from analytics.py before the optimization series. Do not edit these
+# to follow analytics.py: they are what every path is checked against.
+
+baseline_lemmatizer = WordNetLemmatizer()
+baseline_sia = SentimentIntensityAnalyzer()
+baseline_stop_words = set(stopwords.words('english'))
+
+BASELINE_SYNONYM_GROUPS = {
+    'tasty': ['tasty', 'flavorful', 'flavourful', 'delicious', 'yummy',
+              'scrumptious', 'delectable', 'appetizing'],
+    'bland': ['bland', 'tasteless', 'flavorless', 'flavourless', 'boring'],
+    'dry': ['dry', 'dried', 'dehydrated'],
+    'juicy': ['juicy', 'moist', 'succulent', 'tender'],
+    'crispy': ['crispy', 'crunchy', 'crisp'],
+    'soggy': ['soggy', 'soft', 'mushy', 'watery'],
+    'greasy': ['greasy', 'oily', 'fatty'],
+    'sweet': ['sweet', 'sugary', 'sugared'],
+    'salty': ['salty', 'salted', 'over-salted'],
+    'spicy': ['spicy', 'hot', 'pungent'],
+    'tender': ['tender', 'soft', 'delicate'],
+    'tough': ['tough', 'hard', 'chewy', 'rubbery'],
+    'fresh': ['fresh', 'crisp', 'new'],
+    'stale': ['stale', 'old', 'rancid'],
+    'burnt': ['burnt', 'burned', 'charred', 'overcooked'],
+    'good': ['good', 'nice', 'fine', 'decent'],
+    'great': ['great', 'excellent', 'amazing', 'wonderful'],
+    'bad': ['bad', 'terrible', 'awful', 'poor'],
+}
+
+BASELINE_POSITIVE_WORDS = {
+    'good', 'great', 'nice', 'excellent', 'amazing', 'wonderful',
+    'delicious', 'tasty', 'flavorful', 'flavourful', 'juicy',
+    'crispy', 'tender', 'sweet', 'savory', 'savoury', 'appetizing',
+    'fresh', 'moist', 'succulent', 'yummy', 'scrumptious', 'delectable',
+    'aromatic', 'crunchy', 'satisfying'
+}
+
+BASELINE_NEGATIVE_WORDS = {
+    'bad', 'terrible', 'awful', 'bland', 'dry', 'soggy', 'greasy',
+    'burnt', 'overcooked', 'undercooked', 'tough', 'hard', 'stale',
+    'sour', 'bitter', 'salty', 'spicy', 'tasteless', 'flavorless',
+    'flavourless', 'disgusting', 'unappetizing', 'rubbery', 'chewy',
+    'mushy', 'watery', 'oily', 'overdone'
+}
+
+BASELINE_TAG_KEYWORDS = {
+    "smoky": ["smoky"],
+    "sweet": ["sweet"],
+    "salty": ["salty", "too salty", "too much salt", "heavily salted"],
+    "not_enough_salt": ["not enough salt", "needs more salt"],
+    "bland": ["bland", "no flavour", "no flavor"],
+    "good_flavour": ["nice flavour", "good flavour", "tasty", "flavorful", "flavourful", "good flavor"],
+    "needs_more_sauce": ["not enough sauce", "needs more sauce", "more sauce", "could use more sauce"],
+    "too_much_sauce": ["too much sauce"],
+    "juicy_chicken": ["juicy", "tender chicken", "well cooked"],
+    "dry_chicken": ["dry chicken", "chicken felt dry", "chicken a bit dry"],
+    "not_filling": ["not filling", "not very filling", "needs more filling"],
+    "good_portion": ["good portion", "good size", "filling", "more filling"],
+    "crispy_pastry": ["crispy"],
+    "dry_pastry": ["dry pastry", "pastry was a bit dry", "slightly dry"],
+    "soggy_pastry": ["soggy"],
+    "greasy": ["greasy"],
+    "kids_liked": ["kids liked"],
+    "too_strong_for_kids": ["too smoky for kids", "too strong for kids"],
+    "kid_friendly": ["kids preferred", "kid friendly"],
+    "would_buy": ["would buy", "buy again", "would buy regularly", "would definitely buy"],
+    "would_not_buy": ["wouldn't buy", "would not buy", "skip"],
+    "average": ["average", "okay", "fine", "decent", "ok"]
+}
+
+BASELINE_COOKING_METHODS = {
+    'air fryer': 'Air Fryer',
+    'air fried': 'Air Fryer',
+    'air fry': 'Air Fryer',
+    'airfryer': 'Air Fryer',
+    'air-fryer': 'Air Fryer',
+    'air-fried': 'Air Fryer',
+    'deep fried': 'Deep Fried',
+    'deep fry': 'Deep Fried',
+    'deep-fried': 'Deep Fried',
+    'deep-fry': 'Deep Fried',
+    'fried': 'Deep Fried',
+    'oven': 'Oven',
+    'baked': 'Oven',
+    'bake': 'Oven',
+    'oven baked': 'Oven',
+    'oven-baked': 'Oven',
+    'microwave': 'Microwave',
+    'microwaved': 'Microwave',
+    'microwave oven': 'Microwave',
+    'stovetop': 'Stovetop',
+    'stove top': 'Stovetop',
+    'pan fried': 'Stovetop',
+    'pan-fried': 'Stovetop',
+    'pan fry': 'Stovetop',
+    'sautéed': 'Stovetop',
+    'sauteed': 'Stovetop',
+    'grill': 'Grill',
+    'grilled': 'Grill',
+    'bbq': 'Grill',
+    'barbecue': 'Grill',
+}
+
+BASELINE_COMPARISON_METRICS = {
+    'Taste': ('A_taste', 'B_taste'),
+    'Appearance': ('A_appearance', 'B_appearance'),
+    'Self Relevance': ('A_selfRelevance', 'B_selfRelevance'),
+    'Met Expectations': ('A_expectation', 'B_expectation'),
+}
+
+def baseline_clean_text(text):
+    """Clean and normalize text for analysis"""
+    if pd.isna(text) or text is None:
+        return ""
+    text = str(text).lower()
+    text = re.sub(r'[^\w\s]', ' ', text)  # Remove punctuation
+    text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
+    return text.strip()
+
+def baseline_normalize_text(text):
+    """Normalize text input - handle all edge cases consistently"""
+    if text is None:
+        return ""
+    if pd.isna(text):
+        return ""
+
+    text_str = str(text).strip()
+
+    if not text_str or text_str.lower() in ['none', 'null', 'n/a', 'na']:
+        return ""
+
+    return text_str
+
+def baseline_extract_adjectives(text):
+    """Extract adjectives from text using NLTK POS tagging"""
+    normalized_text = baseline_normalize_text(text)
+
+    if not normalized_text:
+        return []
+
+    try:
+        tokens = word_tokenize(normalized_text)
+
+        if not tokens:
+            return []
+
+        pos_tags = pos_tag(tokens)
+
+        adjectives = []
+        for word, tag in pos_tags:
+            if tag and tag.startswith('JJ'):
+                word_lower = word.lower().strip()
+
+                if (len(word_lower) > 2 and
+                    word_lower not in baseline_stop_words and
+                    any(c.isalpha() for c in word_lower)):
+
+                    try:
+                        lemma = baseline_lemmatizer.lemmatize(word_lower, pos=wordnet.ADJ)
+                        if lemma and any(c.isalpha() for c in lemma):
+                            adjectives.append(lemma)
+                    except Exception:
+                        adjectives.append(word_lower)
+
+        # Remove duplicates while preserving order
+        seen = set()
+        unique_adjectives = []
+        for adj in adjectives:
+            if adj not in seen:
+                seen.add(adj)
+                unique_adjectives.append(adj)
+
+        return unique_adjectives
+
+    except Exception as e:
+        print(f"Warning: Error processing text '{text[:50]}...': {str(e)}")
+        return []
+
+def baseline_classify_adjective_sentiment(adjective):
+    """Classify if an adjective is positive or negative using VADER sentiment"""
+    if not adjective or not isinstance(adjective, str):
+        return 'neutral'
+
+    adjective = adjective.lower().strip()
+    if not adjective:
+        return 'neutral'
+
+    try:
+        scores = baseline_sia.polarity_scores(adjective)
+        compound = scores.get('compound', 0.0)
+
+        if compound >= 0.1:
+            return 'positive'
+        elif compound <= -0.1:
+            return 'negative'
+        else:
+            if adjective in BASELINE_POSITIVE_WORDS:
+                return 'positive'
+            elif adjective in BASELINE_NEGATIVE_WORDS:
+                return 'negative'
+            else:
+                return 'neutral'
+
+    except Exception as e:
+        print(f"Warning: Error classifying sentiment for '{adjective}': {str(e)}")
+        return 'neutral'
+
+def baseline_group_similar_adjectives(adjectives):
+    """Group similar adjectives using synonym mapping"""
+    if not adjectives:
+        return {}
+
+    adj_to_group = {}
+    for group_name, variants in BASELINE_SYNONYM_GROUPS.items():
+        for variant in variants:
+            adj_to_group[variant] = group_name
+
+    final_groups = defaultdict(list)
+    for adj in adjectives:
+        if not adj or not isinstance(adj, str):
+            continue
+        adj_lower = adj.lower().strip()
+        group_key = adj_to_group.get(adj_lower, adj_lower)
+        final_groups[group_key].append(adj_lower)
+
+    return dict(final_groups)
+
+def baseline_analyze_adjectives_by_sentiment(adjectives_list, context='likes'):
+    """Analyze adjectives and classify them as positive/negative based on context"""
+    if not isinstance(adjectives_list, list):
+        adjectives_list = []
+
+    valid_adjectives = []
+    for adj in adjectives_list:
+        if adj and isinstance(adj, str) and adj.strip():
+            valid_adjectives.append(adj.strip())
+
+    positive_adjs = []
+    negative_adjs = []
+    neutral_adjs = []
+
+    for adj in valid_adjectives:
+        try:
+            sentiment = baseline_classify_adjective_sentiment(adj)
+
+            if context == 'likes':
+                if sentiment in ['positive', 'neutral']:
+                    positive_adjs.append(adj)
+                else:
+                    negative_adjs.append(adj)
+            else:  # dislikes context
+                if sentiment in ['negative', 'neutral']:
+                    negative_adjs.append(adj)
+                else:
+                    positive_adjs.append(adj)
+        except Exception as e:
+            print(f"Warning: Error analyzing adjective '{adj}': {str(e)}")
+            continue
+
+    return {
+        'positive': positive_adjs,
+        'negative': negative_adjs,
+        'neutral': neutral_adjs
+    }
+
+def baseline_group_and_count_adjectives(adjectives):
+    """Group similar adjectives and count frequencies"""
+    if not isinstance(adjectives, list):
+        adjectives = []
+
+    valid_adjectives = []
+    for adj in adjectives:
+        if adj and isinstance(adj, str) and adj.strip():
+            valid_adjectives.append(adj.strip().lower())
+
+    if not valid_adjectives:
+        return Counter(), Counter()
+
+    raw_counts = Counter(valid_adjectives)
+
+    try:
+        grouped = baseline_group_similar_adjectives(valid_adjectives)
+    except Exception as e:
+        print(f"Warning: Error grouping adjectives: {str(e)}")
+        grouped = {}
+
+    grouped_counts = Counter()
+    for group_name, variants in grouped.items():
+        if not variants:
+            continue
+        count = 0
+        for variant in variants:
+            count += raw_counts.get(variant, 0)
+            count += raw_counts.get(variant.lower(), 0)
+        if count > 0:
+            grouped_counts[group_name] = count
+
+    return raw_counts, grouped_counts
+
+def baseline_extract_tags(text, tag_keywords):
+    """Extract tags from text based on keyword matching"""
+    text = baseline_clean_text(text)
+    found_tags = []
+
+    for tag, keywords in tag_keywords.items():
+        for keyword in keywords:
+            if keyword.lower() in text:
+                found_tags.append(tag)
+                break
+
+    return found_tags
+
+def baseline_count_tags(tag_series):
+    """Count frequency of all tags"""
+    all_tags = []
+    for tags in tag_series:
+        if isinstance(tags, list):
+            all_tags.extend(tags)
+    return Counter(all_tags)
+
+def baseline_calculate_tag_ratings(df, variant):
+    """Calculate average taste ratings for each tag"""
+    tag_ratings = defaultdict(list)
+    taste_col = f'{variant}_taste'
+
+    if taste_col not in df.columns:
+        return {}
+
+    for idx, row in df.iterrows():
+        tags = row.get(f'{variant}_all_tags', [])
+        taste_rating = row[taste_col]
+
+        try:
+            taste_value = float(taste_rating)
+        except (TypeError, ValueError):
+            continue
+
+        for tag in tags:
+            tag_ratings[tag].append(taste_value)
+
+    tag_avg = {tag: np.mean(ratings) for tag, ratings in tag_ratings.items() if ratings}
+    return tag_avg
+
+def baseline_normalize_cooking_method(method):
+    """Normalize cooking method variations to standard groups"""
+    if pd.isna(method) or method is None:
+        return "Unknown"
+
+    method_str = str(method).strip().lower()
+
+    if method_str in BASELINE_COOKING_METHODS:
+        return BASELINE_COOKING_METHODS[method_str]
+
+    for key, normalized in BASELINE_COOKING_METHODS.items():
+        if key in method_str:
+            return normalized
+
+    return method_str.title()
+
+def baseline_calculate_sentiment(likes, dislikes):
+    """Simple sentiment based on presence of content"""
+    likes_len = len(baseline_clean_text(likes).split())
+    dislikes_len = len(baseline_clean_text(dislikes).split())
+
+    if likes_len > dislikes_len * 2:
+        return "Positive"
+    elif dislikes_len > likes_len * 2:
+        return "Negative"
+    else:
+        return "Neutral"
+
+# ============================================================================
+# ADJUSTMENTS TO THE BASELINE
+# ============================================================================
+
+def adjusted_group_and_count_adjectives(adjectives):
+    """baseline_group_and_count_adjectives with each occurrence counted once.
+
+    The baseline added raw_counts[variant] twice (variant and variant.lower()
+    are the same key) for every occurrence in a group, so a group's count was
+    2 * sum(count ** 2). Since user-033 a group's count is the number of
+    occurrences of its variants.
+    """
+    raw_counts, _ = baseline_group_and_count_adjectives(adjectives)
+    grouped = baseline_group_similar_adjectives(list(raw_counts))
+    grouped_counts = Counter({group_name: sum(raw_counts[variant] for variant in variants)
+                              for group_name, variants in grouped.items()})
+    return raw_counts, grouped_counts
+
+def adjusted_calculate_tag_ratings(df, variant):
+    """baseline_calculate_tag_ratings with missing taste ratings skipped.
+
+    float(NaN) succeeds, so in the baseline one missing rating made the
+    tag's average NaN. Since user-042 responses without a rating are left
+    out of the averages.
+    """
+    taste_col = f'{variant}_taste'
+    if taste_col in df.columns:
+        df = df[pd.to_numeric(df[taste_col], errors='coerce').notna()]
+    return baseline_calculate_tag_ratings(df, variant)
+
+# Deliberate changes since the baseline: description -> adjusted function
+BASELINE_ADJUSTMENTS = {
+    'user-033: grouped adjective counts count each occurrence once': adjusted_group_and_count_adjectives,
+    'user-042: missing taste ratings are skipped in tag ratings': adjusted_calculate_tag_ratings,
+}
+
+def baseline_summary(records):
+    """Summary from the baseline main()'s per-response loops, with the adjustments applied"""
+    df = pd.DataFrame(records)
+
+    for variant in ['A', 'B']:
+        likes_col = f'{variant}_likes'
+        dislikes_col = f'{variant}_dislikes'
+
+        if likes_col in df.columns:
+            df[f'{variant}_likes_adjectives'] = df[likes_col].apply(baseline_extract_adjectives)
+        else:
+            df[f'{variant}_likes_adjectives'] = [[] for _ in range(len(df))]
+
+        if dislikes_col in df.columns:
+            df[f'{variant}_dislikes_adjectives'] = df[dislikes_col].apply(baseline_extract_adjectives)
+        else:
+            df[f'{variant}_dislikes_adjectives'] = [[] for _ in range(len(df))]
+
+    for variant in ['A', 'B']:
+        df[f'{variant}_likes_adj_analysis'] = df[f'{variant}_likes_adjectives'].apply(
+            lambda x: baseline_analyze_adjectives_by_sentiment(x, context='likes')
+        )
+
+        df[f'{variant}_dislikes_adj_analysis'] = df[f'{variant}_dislikes_adjectives'].apply(
+            lambda x: baseline_analyze_adjectives_by_sentiment(x, context='dislikes')
+        )
+
+        df[f'{variant}_positive_adjectives'] = df.apply(
+            lambda row: row[f'{variant}_likes_adj_analysis']['positive'] +
+                        row[f'{variant}_dislikes_adj_analysis']['positive'],
+            axis=1
+        )
+
+        df[f'{variant}_negative_adjectives'] = df.apply(
+            lambda row: row[f'{variant}_likes_adj_analysis']['negative'] +
+                        row[f'{variant}_dislikes_adj_analysis']['negative'],
+            axis=1
+        )
+
+    collected = {f'{variant}_{polarity}': [] for variant in ['A', 'B'] for polarity in ['positive', 'negative']}
+    for idx, row in df.iterrows():
+        for key, adjectives in collected.items():
+            try:
+                values = row.get(f'{key}_adjectives', [])
+                if isinstance(values, list):
+                    adjectives.extend(values)
+            except Exception:
+                pass
+
+    for variant in ['A', 'B']:
+        likes_col = f'{variant}_likes'
+        dislikes_col = f'{variant}_dislikes'
+        feedback_col = f'{variant}_Feedback'
+
+        if likes_col in df.columns:
+            df[f'{variant}_likes_tags'] = df[likes_col].apply(lambda x: baseline_extract_tags(x, BASELINE_TAG_KEYWORDS))
+        else:
+            df[f'{variant}_likes_tags'] = [[] for _ in range(len(df))]
+
+        if dislikes_col in df.columns:
+            df[f'{variant}_dislikes_tags'] = df[dislikes_col].apply(lambda x: baseline_extract_tags(x, BASELINE_TAG_KEYWORDS))
+        else:
+            df[f'{variant}_dislikes_tags'] = [[] for _ in range(len(df))]
+
+        if feedback_col in df.columns:
+            df[f'{variant}_feedback_tags'] = df[feedback_col].apply(lambda x: baseline_extract_tags(x, BASELINE_TAG_KEYWORDS))
+        else:
+            df[f'{variant}_feedback_tags'] = [[] for _ in range(len(df))]
+
+        df[f'{variant}_all_tags'] = df.apply(
+            lambda row: list(set(
+                row[f'{variant}_likes_tags'] +
+                row[f'{variant}_dislikes_tags'] +
+                row[f'{variant}_feedback_tags']
+            )), axis=1
+        )
+
+    df['A_sentiment'] = df.apply(lambda x: baseline_calculate_sentiment(x.get('A_likes', ''), x.get('A_dislikes', '')), axis=1)
+    df['B_sentiment'] = df.apply(lambda x: baseline_calculate_sentiment(x.get('B_likes', ''), x.get('B_dislikes', '')), axis=1)
+
+    summary = {}
+    for variant in ['A', 'B']:
+        summary[f'tag_freq_{variant}'] = dict(baseline_count_tags(df[f'{variant}_all_tags']))
+        summary[f'tag_ratings_{variant}'] = adjusted_calculate_tag_ratings(df, variant)
+        summary[f'sentiment_{variant}'] = {k: int(v) for k, v in df[f'{variant}_sentiment'].value_counts().items()}
+        for polarity in ['positive', 'negative']:
+            key = f'{variant}_{polarity}'
+            raw_counts, grouped_counts = adjusted_group_and_count_adjectives(collected[key])
+            summary[f'adjectives_raw_{key}'] = dict(raw_counts)
+            summary[f'adjectives_{key}'] = dict(grouped_counts)
+
+    metric_means = {}
+    rows = []
+    for metric_name, (col_a, col_b) in BASELINE_COMPARISON_METRICS.items():
+        for col in [col_a, col_b]:
+            if col in df.columns and df[col].count():
+                metric_means[col] = float(df[col].mean())
+        if col_a in df.columns and col_b in df.columns:
+            rows.append([metric_name, df[col_a].mean(), df[col_b].mean(), df[col_b].mean() - df[col_a].mean()])
+    summary['metric_means'] = metric_means
+    summary['comparison'] = sorted(plain(rows), key=lambda row: row[0])
+
+    cooking = []
+    if 'cookingMethod' in df.columns:
+        df['cookingMethod_normalized'] = df['cookingMethod'].apply(baseline_normalize_cooking_method)
+        cooking_summary = df.groupby('cookingMethod_normalized').agg({
+            'A_taste': 'mean',
+            'B_taste': 'mean',
+            'fullName': 'count'
+        }).round(2)
+        cooking = [[str(method), row['A_taste'], row['B_taste'], int(row['fullName'])]
+                   for method, row in cooking_summary.iterrows()]
+    summary['cooking'] = sorted(plain(cooking), key=lambda row: row[0])
+
+    return plain(summary)
+
+# ============================================================================
+# FUNCTION PAIRS
+# ============================================================================
+
+def candidate_tag_ratings(df, variant):
+    """Tag ratings from the mergeable sums/counts used by the aggregates"""
+    sums, counts = analytics.tag_rating_totals(df, variant)
+    return {tag: sums[tag] / count for tag, count in counts.items() if count}
+
+def reference_adjective_groups(df, key):
+    """Baseline grouped adjective counts from the flat list of every occurrence"""
+    adjectives = [adj for adj_list in df[f'{key}_adjectives'] if isinstance(adj_list, list) for adj in adj_list]
+    return adjusted_group_and_count_adjectives(adjectives)[1]
+
+def candidate_adjective_groups(df, key):
+    """Grouped adjective counts rolled up from a Counter"""
+    counts = Counter()
+    for adj_list in df[f'{key}_adjectives']:
+        if isinstance(adj_list, list):
+            counts.update(adj_list)
+    return analytics.group_adjective_counts(analytics.normalize_adjective_counts(counts))
+
+# Reference and optimized implementations compared on a prepared DataFrame:
+# name -> (reference(df, arg), candidate(df, arg), args)
+FRAME_FUNCTION_PAIRS = {
+    'baseline calculate_tag_ratings vs tag_rating_totals': (
+        adjusted_calculate_tag_ratings, candidate_tag_ratings, ['A', 'B']),
+    'baseline group_and_count_adjectives vs group_adjective_counts': (
+        reference_adjective_groups, candidate_adjective_groups,
+        [f'{variant}_{polarity}' for variant in ['A', 'B'] for polarity in ['positive', 'negative']]),
+}
+
+def trained_lexicon(texts):
+    """AdjectiveLexicon.extract after learning from every answer once.
+
+    POS tags depend on context, so the lexicon is only exact on answers it
+    has learned from; training on all of them first makes the check
+    independent of answer order while still exercising the fast path.
+    """
+    lexicon = analytics.AdjectiveLexicon()
+    for text in texts:
+        lexicon.extract(text)
+    return lexicon.extract
+
+def answer_tokens(text):
+    """Tokens of one answer, as extract_adjectives feeds them to the tagger"""
+    normalized_text = baseline_normalize_text(text)
+    return word_tokenize(normalized_text) if normalized_text else []
+
+def nltk_tags(text):
+    return pos_tag(answer_tokens(text))
+
+def bundled_tagger(texts):
+    """BundledTagger.tag on the same tokens, or None without an NLP bundle"""
+    bundle = analytics.load_nlp_bundle(analytics.NLP_BUNDLE_DIR)
+    if bundle is None:
+        return None
+    return lambda text: bundle.tagger.tag(answer_tokens(text))
+
+def nltk_adjective_lemmas(text):
+    return [baseline_lemmatizer.lemmatize(token.lower(), pos=analytics.WORDNET_ADJ) for token in answer_tokens(text)]
+
+def bundled_lemmatizer(texts):
+    """BundledLemmatizer on every lowercased token as an adjective, or None without an NLP bundle"""
+    bundle = analytics.load_nlp_bundle(analytics.NLP_BUNDLE_DIR)
+    if bundle is None:
+        return None
+    return lambda text: [bundle.lemmatizer.lemmatize(token.lower(), pos=analytics.WORDNET_ADJ)
+                         for token in answer_tokens(text)]
+
+# Reference and optimized implementations compared answer by answer:
+# name -> (reference(text), make_candidate(texts) -> candidate(text)); every
+# free-text answer is an input. make_candidate returns None to skip a pair
+# whose candidate is not available (e.g. no NLP bundle has been built).
+TEXT_FUNCTION_PAIRS = {
+    'baseline extract_adjectives vs extract_adjectives': (
+        baseline_extract_adjectives, lambda texts: analytics.extract_adjectives),
+    'baseline extract_adjectives vs AdjectiveLexicon.extract': (baseline_extract_adjectives, trained_lexicon),
+    'nltk.pos_tag vs BundledTagger.tag': (nltk_tags, bundled_tagger),
+    'WordNetLemmatizer vs BundledLemmatizer': (nltk_adjective_lemmas, bundled_lemmatizer),
+}
+
+def load_records(args):
+    """Responses to check, from --input, --synthetic or the bundled responses.json"""
+    if args.synthetic:
+        print(f"Generating {args.synthetic} synthetic responses (seed {args.seed})")
+        return analytics.generate_synthetic_responses(args.synthetic, seed=args.seed)
+    path = args.input or analytics.find_responses_file()
+    print(f"Reading responses from {path}")
+    return list(analytics.iter_response_records(path))
+
+def plain(value):
+    """JSON-compatible form of a value, with NaN as None"""
+    if isinstance(value, dict):
+        return {str(k): plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def table(frame):
+    """Rows of a table as sorted lists, so tie order does not matter"""
+    if frame is None or frame.empty:
+        return []
+    frame = frame.reset_index()
+    rows = [plain(list(row)) for row in frame.itertuples(index=False)]
+    return [list(frame.columns)] + sorted(rows, key=lambda row: json.dumps(row, default=str))
+
+def results_summary(results):
+    """Summary in the same shape as baseline_summary, from finalize_aggregates results"""
+    summary = {}
+    for variant in ['A', 'B']:
+        summary[f'tag_freq_{variant}'] = dict(results['tag_freq'][variant])
+        summary[f'tag_ratings_{variant}'] = results['tag_ratings'][variant]
+        summary[f'sentiment_{variant}'] = {k: int(v) for k, v in results['sentiment'][variant].items()}
+        for polarity in ['positive', 'negative']:
+            key = f'{variant}_{polarity}'
+            summary[f'adjectives_raw_{key}'] = dict(results['adjectives_raw'][key])
+            summary[f'adjectives_{key}'] = dict(results['adjectives'][key])
+    summary['metric_means'] = results['metric_means']
+
+    comparison = results['comparison_df']
+    summary['comparison'] = sorted(
+        plain([[metric] + list(comparison[metric]) for metric in comparison.columns]),
+        key=lambda row: row[0])
+
+    cooking = results['cooking_summary']
+    summary['cooking'] = [] if cooking is None else sorted(
+        plain([[str(method)] + list(row) for method, row in cooking.iterrows()]),
+        key=lambda row: row[0])
+    # Cooking counts come back as floats from the rounded frame
+    summary['cooking'] = [row[:3] + [int(row[3])] for row in summary['cooking']]
+
+    return plain(summary)
+
+def sheets_summary(results):
+    """Contents of every summary sheet, independent of row order"""
+    return {name: table(frame) for name, frame in analytics.build_summary_sheets(results).items()
+            if isinstance(frame, pd.DataFrame)}
+
+def same(a, b):
+    """Equality with a float tolerance; None (NaN) equals None"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=FLOAT_TOLERANCE, abs_tol=FLOAT_TOLERANCE)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    return a == b
+
+def diff(expected, actual, path=''):
+    """List of human-readable differences between two summaries"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual), key=str):
+            where = f"{path}.{key}" if path else str(key)
+            if key not in actual:
+                differences.append(f"{where}: missing (expected {expected[key]!r})")
+            elif key not in expected:
+                differences.append(f"{where}: unexpected {actual[key]!r}")
+            else:
+                differences.extend(diff(expected[key], actual[key], where))
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        differences = []
+        for i, (x, y) in enumerate(zip(expected, actual)):
+            differences.extend(diff(x, y, f"{path}[{i}]"))
+        return differences
+    if not same(expected, actual):
+        return [f"{path}: expected {expected!r}, got {actual!r}"]
+    return []
+
+def report(name, differences):
+    """Print one check's outcome; returns True when it passed"""
+    if not differences:
+        print(f"✓ {name}")
+        return True
+    print(f"✗ {name}: {len(differences)} difference(s)")
+    for line in differences[:MAX_REPORTED]:
+        print(f"    {line}")
+    if len(differences) > MAX_REPORTED:
+        print(f"    ... {len(differences) - MAX_REPORTED} more")
+    return False
+
+def check_function_pairs(records):
+    """Compare reference and candidate implementations of individual functions"""
+    passed = True
+    df = pd.DataFrame(records)
+    analytics.prepare_responses(df)
+
+    for name, (reference, candidate, arguments) in FRAME_FUNCTION_PAIRS.items():
+        differences = []
+        for argument in arguments:
+            differences.extend(diff(plain(dict(reference(df, argument))),
+                                    plain(dict(candidate(df, argument))), str(argument)))
+        passed &= report(name, differences)
+
+    texts = [text for record in records for col in analytics.TEXT_COLUMNS
+             for text in [record.get(col)] if text is not None]
+    texts = list(dict.fromkeys(texts))
+    for name, (reference, make_candidate) in TEXT_FUNCTION_PAIRS.items():
+        candidate = make_candidate(texts)
+        if candidate is None:
+            print(f"- {name}: skipped (not available)")
+            continue
+        differences = []
+        for text in texts:
+            expected, actual = plain(reference(text)), plain(candidate(text))
+            if not same(expected, actual):
+                differences.append(f"{text!r}: expected {expected!r}, got {actual!r}")
+        passed &= report(name, differences)
+
+    return passed
+
+def run_paths(records, chunk_sizes, workers):
+    """Summaries from the frozen baseline and every optimized path"""
+    summaries = {'reference': baseline_summary(records)}
+    results = {}
+
+    df = analytics.records_to_frame(records)
+    analytics.prepare_responses(df)
+    results['in-memory'] = analytics.finalize_aggregates(analytics.aggregate_responses(df))
+
+    df = analytics.records_to_frame(records)
+    analytics.downcast_ratings(df)
+    analytics.categorize_columns(df)
+    analytics.prepare_responses(df, low_memory=True)
+    results['low-memory'] = analytics.finalize_aggregates(analytics.aggregate_responses(df))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'responses.jsonl'
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+
+        for chunk_size in chunk_sizes:
+            aggregates = analytics.run_chunked(chunk_size, input_path=str(path))
+            results[f'chunked ({chunk_size})'] = analytics.finalize_aggregates(aggregates)
+
+        if workers:
+            aggregates = analytics.run_pipelined(max(chunk_sizes), workers=workers, input_path=str(path))
+            results[f'pipelined ({workers} workers)'] = analytics.finalize_aggregates(aggregates)
+
+    for name, result in results.items():
+        summaries[name] = results_summary(result)
+    sheets = {name: sheets_summary(result) for name, result in results.items()}
+    return summaries, sheets
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Check that optimized analytics paths match the reference outputs")
+    parser.add_argument('--input', default=None,
+                        help="responses file to check (default: the bundled responses.json)")
+    parser.add_argument('--synthetic', type=int, default=None, metavar='N',
+                        help="check N generated responses instead of a file")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="seed for --synthetic (default 0)")
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[1, 7, 1000],
+                        help="chunk sizes to run the chunked path with (default: 1 7 1000)")
+    parser.add_argument('--workers', type=int, default=2,
+                        help="workers for the pipelined path; 0 skips it (default 2)")
+    parser.add_argument('--save-golden', default=None, metavar='PATH',
+                        help="write the reference summary to PATH")
+    parser.add_argument('--golden', default=None, metavar='PATH',
+                        help="also compare every path against a summary saved with --save-golden")
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+    records = load_records(args)
+    print(f"{len(records)} responses")
+    print("Reference: frozen baseline with adjustments")
+    for description in BASELINE_ADJUSTMENTS:
+        print(f"  - {description}")
+    print()
+
+    passed = check_function_pairs(records)
+    summaries, sheets = run_paths(records, args.chunk_sizes, args.workers)
+
+    print("\n" + "=" * 80)
+    print("EQUIVALENCE REPORT")
+    print("=" * 80)
+
+    reference = summaries['reference']
+    for name, summary in summaries.items():
+        if name != 'reference':
+            passed &= report(f"{name} matches reference", diff(reference, summary))
+
+    baseline = next(iter(sheets))
+    for name, sheet_contents in sheets.items():
+        if name != baseline:
+            passed &= report(f"{name} sheets match {baseline}", diff(sheets[baseline], sheet_contents))
+
+    if args.golden:
+        with open(args.golden, encoding='utf-8') as f:
+            golden = json.load(f)
+        for name, summary in summaries.items():
+            passed &= report(f"{name} matches {args.golden}", diff(golden, summary))
+
+    if args.save_golden:
+        Path(args.save_golden).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save_golden, 'w', encoding='utf-8') as f:
+            json.dump(reference, f, indent=2, sort_keys=True)
+        print(f"\n✓ Saved reference summary to {args.save_golden}")
+
+    print("\n" + ("✓ All outputs match" if passed else "✗ Outputs differ"))
+    sys.exit(0 if passed else 1)
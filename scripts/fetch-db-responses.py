@@ -1,29 +1,82 @@
 """
-Helper script to fetch responses directly from Neon database for analysis
-Use this if you want to export responses to JSON for backup or offline analysis
+Helper script to export responses directly from Neon database
+Use this for backups or offline analysis
+
+The responses and answers tables are streamed with COPY ... TO STDOUT (CSV or
+binary) into compressed JSON Lines or Parquet part files. Parts are committed
+one at a time and recorded in manifest.json, so an interrupted export can be
+continued with --resume. The manifest also records the highest response and
+answer ids of the first run, and a resumed export stops there, so it never
+picks up answers of responses added after the export started.
+
+    python scripts/fetch-db-responses.py --out backups/2026-01-15
+    python scripts/fetch-db-responses.py --out backups/2026-01-15 --resume
+    python scripts/fetch-db-responses.py --format parquet --copy-format binary
+    python scripts/fetch-db-responses.py --summary
 """
 
 import os
+import io
+import csv
+import gzip
 import json
+import time
+import struct
+import argparse
+import threading
 import psycopg2
 import psycopg2.extras
 from pathlib import Path
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Load environment variables
 env_file = Path(__file__).parent.parent / '.env'
 load_dotenv(env_file)
 
+# Exported tables and their columns, in export order. Types drive the binary COPY decoder.
+EXPORT_TABLES = {
+    'responses': [
+        ('id', 'int4'),
+        ('survey_id', 'int4'),
+        ('submitted_at', 'timestamp'),
+    ],
+    'answers': [
+        ('id', 'int4'),
+        ('response_id', 'int4'),
+        ('question_id', 'text'),
+        ('answer_value', 'text'),
+        ('answer_data', 'jsonb'),
+        ('created_at', 'timestamp'),
+    ],
+}
+
+# Rows restricted to one survey (answers are filtered through their response)
+SURVEY_FILTERS = {
+    'responses': 'survey_id = %(survey_id)s',
+    'answers': 'response_id IN (SELECT id FROM responses WHERE survey_id = %(survey_id)s)',
+}
+
+# Highest ids visible in the export's first snapshot; recorded in the manifest
+# so a resumed export (a new snapshot) leaves out rows added in between
+UPPER_IDS_QUERY = """
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM responses),
+           (SELECT COALESCE(MAX(id), 0) FROM answers)
+"""
+
+PGCOPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+POSTGRES_EPOCH = datetime(2000, 1, 1)
+
 def get_database_url():
     """Get database URL from environment variables"""
     db_url = os.environ.get('NETLIFY_DATABASE_URL')
     if db_url:
         return db_url
-    
+
     db_url = os.environ.get('DATABASE_URL')
     if db_url:
         return db_url
-    
+
     raise ValueError(
         "No database URL found. Please set DATABASE_URL or NETLIFY_DATABASE_URL in .env file"
     )
@@ -31,13 +84,13 @@ def get_database_url():
 def fetch_responses_from_db(survey_id=1):
     """Fetch all responses from Neon database and convert to JSON format"""
     db_url = get_database_url()
-    
+
     conn = psycopg2.connect(db_url)
     cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    
+
     # Fetch all responses with their answers
     cur.execute("""
-        SELECT 
+        SELECT
             r.id,
             r.survey_id,
             r.submitted_at,
@@ -54,22 +107,22 @@ def fetch_responses_from_db(survey_id=1):
         GROUP BY r.id, r.survey_id, r.submitted_at
         ORDER BY r.submitted_at DESC
     """, (survey_id,))
-    
+
     responses_data = cur.fetchall()
     cur.close()
     conn.close()
-    
+
     # Convert to JSON format
     responses_json = []
     for row in responses_data:
         response_obj = {}
-        
+
         if row['answers']:
             for answer in row['answers']:
                 question_id = answer['question_id']
                 answer_value = answer['answer_value']
                 answer_data = answer['answer_data']
-                
+
                 if answer_data:
                     try:
                         response_obj[question_id] = json.loads(answer_data)
@@ -87,24 +140,362 @@ def fetch_responses_from_db(survey_id=1):
                             response_obj[question_id] = answer_value
                     else:
                         response_obj[question_id] = None
-        
+
         responses_json.append(response_obj)
-    
+
     return responses_json
 
+# ============================================================================
+# COPY STREAMING
+# ============================================================================
+
+def copy_query(cur, table, survey_id, after_id, upper_ids, copy_format):
+    """Build the COPY ... TO STDOUT statement for one table, ordered by id"""
+    columns = EXPORT_TABLES[table]
+    # Explicit casts pin the wire types the binary decoder expects
+    select_list = ', '.join(f'{name}::{pg_type}' for name, pg_type in columns)
+    condition = f"{SURVEY_FILTERS[table]} AND id > %(after_id)s AND id <= %(upper_id)s"
+    if table == 'answers':
+        # Answers added later to a response that is in the export are left out too
+        condition += " AND response_id <= %(upper_response_id)s"
+    where = cur.mogrify(condition, {
+        'survey_id': survey_id, 'after_id': after_id,
+        'upper_id': upper_ids[table], 'upper_response_id': upper_ids['responses'],
+    }).decode()
+    options = "FORMAT binary" if copy_format == 'binary' else "FORMAT csv, NULL '\\N'"
+    return f"COPY (SELECT {select_list} FROM {table} WHERE {where} ORDER BY id) TO STDOUT WITH ({options})"
+
+def start_copy(conn, sql):
+    """Run COPY ... TO STDOUT in a background thread and return a reader over its output.
+
+    psycopg2 pushes COPY data into a file object; writing it into a pipe lets
+    the main thread decode rows while they are still arriving, instead of
+    spooling the whole table to memory or disk first.
+    """
+    read_fd, write_fd = os.pipe()
+    reader = os.fdopen(read_fd, 'rb')
+    writer = os.fdopen(write_fd, 'wb')
+    errors = []
+
+    def run():
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(sql, writer)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            writer.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return reader, thread, errors
+
+def parse_timestamp(text):
+    """Convert a Postgres text timestamp to ISO 8601"""
+    return text.replace(' ', 'T', 1) if text else text
+
+def iter_csv_rows(reader, columns):
+    """Decode COPY CSV output (NULL written as \\N) into row dicts"""
+    text = io.TextIOWrapper(reader, encoding='utf-8', newline='')
+    for values in csv.reader(text):
+        row = {}
+        for (name, pg_type), value in zip(columns, values):
+            if value == '\\N':
+                row[name] = None
+            elif pg_type == 'int4':
+                row[name] = int(value)
+            elif pg_type == 'timestamp':
+                row[name] = parse_timestamp(value)
+            elif pg_type == 'jsonb':
+                row[name] = json.loads(value)
+            else:
+                row[name] = value
+        yield row
+
+def read_exact(reader, size):
+    """Read exactly size bytes from the COPY stream"""
+    data = reader.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated binary COPY stream")
+    return data
+
+def decode_binary_value(data, pg_type):
+    """Decode one field of the binary COPY format"""
+    if pg_type == 'int4':
+        return struct.unpack('>i', data)[0]
+    if pg_type == 'timestamp':
+        microseconds = struct.unpack('>q', data)[0]
+        return (POSTGRES_EPOCH + timedelta(microseconds=microseconds)).isoformat()
+    if pg_type == 'jsonb':
+        # jsonb is sent as a version byte (1) followed by the JSON text
+        return json.loads(data[1:].decode('utf-8'))
+    return data.decode('utf-8')
+
+def iter_binary_rows(reader, columns):
+    """Decode COPY binary output (PGCOPY format) into row dicts"""
+    header = read_exact(reader, len(PGCOPY_SIGNATURE))
+    if header != PGCOPY_SIGNATURE:
+        raise ValueError("Not a binary COPY stream")
+    read_exact(reader, 4)  # flags
+    extension_length = struct.unpack('>i', read_exact(reader, 4))[0]
+    read_exact(reader, extension_length)
+
+    while True:
+        field_count = struct.unpack('>h', read_exact(reader, 2))[0]
+        if field_count == -1:
+            return
+
+        row = {}
+        for name, pg_type in columns:
+            length = struct.unpack('>i', read_exact(reader, 4))[0]
+            row[name] = None if length == -1 else decode_binary_value(read_exact(reader, length), pg_type)
+        yield row
+
+# ============================================================================
+# OUTPUT PARTS
+# ============================================================================
+
+class JsonlPartWriter:
+    """Writes one gzip-compressed JSON Lines part file"""
+
+    extension = '.jsonl.gz'
+
+    def __init__(self, path):
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+
+    def write(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False))
+        self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+class ParquetPartWriter:
+    """Buffers one part's rows by column and writes them as a zstd-compressed Parquet file"""
+
+    extension = '.parquet'
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.columns = {}
+
+    def write(self, row):
+        for name, value in row.items():
+            # JSON answers have mixed shapes, so they are stored as JSON text
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            self.columns.setdefault(name, []).append(value)
+
+    def close(self):
+        table = self.pa.table(self.columns)
+        self.pq.write_table(table, self.path, compression='zstd')
+
+PART_WRITERS = {
+    'jsonl': JsonlPartWriter,
+    'parquet': ParquetPartWriter,
+}
+
+def load_manifest(path):
+    """Read the export manifest (or return None when starting fresh)"""
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    """Atomically replace the manifest so an interrupted run never leaves it half-written"""
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def estimate_rows(conn, table):
+    """Planner row estimate for progress reporting (no full count needed)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", (table,))
+        row = cur.fetchone()
+    return max(row[0], 0) if row else 0
+
+def export_table(conn, table, out_dir, manifest, manifest_path, args):
+    """Stream one table into part files, committing each part to the manifest"""
+    table_state = manifest['tables'].setdefault(table, {'parts': [], 'rows': 0, 'complete': False})
+    if table_state['complete']:
+        print(f"✓ {table}: already complete ({table_state['rows']:,} rows)")
+        return
+
+    parts = table_state['parts']
+    after_id = parts[-1]['last_id'] if parts else 0
+    columns = EXPORT_TABLES[table]
+    writer_class = PART_WRITERS[args.format]
+    estimate = estimate_rows(conn, table)
+
+    with conn.cursor() as cur:
+        sql = copy_query(cur, table, args.survey_id, after_id, manifest['upper_ids'], args.copy_format)
+
+    if after_id:
+        print(f"Resuming {table} after id {after_id} ({table_state['rows']:,} rows already exported)")
+    else:
+        print(f"Exporting {table}...")
+
+    reader, thread, errors = start_copy(conn, sql)
+    decode = iter_binary_rows if args.copy_format == 'binary' else iter_csv_rows
+
+    started = time.time()
+    last_report = started
+    exported = 0
+    part = None
+    part_rows = 0
+    last_id = after_id
+
+    def commit_part():
+        nonlocal part, part_rows
+        part.close()
+        final_path = out_dir / part_name
+        os.replace(tmp_path, final_path)
+        parts.append({'file': part_name, 'rows': part_rows, 'last_id': last_id})
+        table_state['rows'] += part_rows
+        save_manifest(manifest_path, manifest)
+        part = None
+        part_rows = 0
+
+    try:
+        for row in decode(reader, columns):
+            if part is None:
+                part_name = f"{table}.part-{len(parts):05d}{writer_class.extension}"
+                tmp_path = out_dir / (part_name + '.tmp')
+                part = writer_class(tmp_path)
+
+            part.write(row)
+            part_rows += 1
+            exported += 1
+            last_id = row['id']
+
+            if part_rows >= args.part_rows:
+                commit_part()
+
+            now = time.time()
+            if now - last_report >= args.progress_interval:
+                done = table_state['rows'] + part_rows
+                rate = exported / (now - started)
+                progress = f" of ~{estimate:,}" if estimate else ""
+                print(f"  {table}: {done:,}{progress} rows ({rate:,.0f} rows/s)")
+                last_report = now
+
+        thread.join()
+        if errors:
+            raise errors[0]
+
+        if part is not None:
+            commit_part()
+    finally:
+        reader.close()
+        if part is not None:
+            # Uncommitted rows are re-exported by --resume
+            part.close()
+            tmp_path.unlink(missing_ok=True)
+
+    table_state['complete'] = True
+    save_manifest(manifest_path, manifest)
+
+    elapsed = max(time.time() - started, 1e-9)
+    print(f"✓ {table}: {exported:,} rows in {elapsed:.1f}s ({exported / elapsed:,.0f} rows/s)")
+
+def export_responses(args):
+    """Export the responses and answers tables into args.out"""
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / 'manifest.json'
+
+    manifest = load_manifest(manifest_path)
+    if manifest and not args.resume:
+        raise SystemExit(f"{manifest_path} already exists. Use --resume to continue it or choose another --out.")
+    if manifest and (manifest['format'] != args.format or manifest['survey_id'] != args.survey_id):
+        raise SystemExit("--resume must use the same --format and --survey-id as the original export.")
+
+    if manifest is None:
+        manifest = {
+            'survey_id': args.survey_id,
+            'format': args.format,
+            'started_at': datetime.now().isoformat(),
+            'tables': {},
+        }
+        save_manifest(manifest_path, manifest)
+
+    conn = psycopg2.connect(get_database_url())
+    try:
+        # One snapshot for both tables so answers match the exported responses.
+        # --resume opens a new snapshot, so it only reads rows up to the ids
+        # recorded by the first run; rows changed or deleted in between are
+        # still exported as they are now.
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        if 'upper_ids' not in manifest:
+            if manifest['tables']:
+                print("⚠ The manifest has no recorded upper ids; limiting the rest of the export to the rows "
+                      "that exist now")
+            with conn.cursor() as cur:
+                cur.execute(UPPER_IDS_QUERY)
+                responses_id, answers_id = cur.fetchone()
+            manifest['upper_ids'] = {'responses': responses_id, 'answers': answers_id}
+            save_manifest(manifest_path, manifest)
+        for table in args.tables:
+            export_table(conn, table, out_dir, manifest, manifest_path, args)
+    finally:
+        conn.close()
+
+    manifest['finished_at'] = datetime.now().isoformat()
+    save_manifest(manifest_path, manifest)
+    print(f"\n✓ Export written to {out_dir}")
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Export survey responses from the database")
+    parser.add_argument('--out', default=f"exports/responses_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                        help="output directory (default: exports/responses_<timestamp>)")
+    parser.add_argument('--format', choices=sorted(PART_WRITERS), default='jsonl',
+                        help="output file format (default: jsonl, gzip-compressed)")
+    parser.add_argument('--copy-format', choices=['csv', 'binary'], default='csv',
+                        help="COPY wire format (default: csv)")
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES), default=list(EXPORT_TABLES),
+                        help="tables to export (default: responses answers)")
+    parser.add_argument('--survey-id', type=int, default=1)
+    parser.add_argument('--part-rows', type=int, default=500_000,
+                        help="rows per part file; each finished part is a resume point")
+    parser.add_argument('--progress-interval', type=float, default=2.0,
+                        help="seconds between progress lines")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted export in --out")
+    parser.add_argument('--summary', action='store_true',
+                        help="only print a summary of the stored responses")
+    return parser.parse_args(argv)
+
 if __name__ == '__main__':
+    args = parse_args()
     try:
-        print("Fetching responses from Neon database...")
-        responses = fetch_responses_from_db()
-        print(f"✓ Retrieved {len(responses)} responses")
-        
-        # Print summary
-        if responses:
-            print(f"\nFirst response fields: {list(responses[0].keys())}")
-            print(f"Total responses: {len(responses)}")
+        if args.summary:
+            print("Fetching responses from Neon database...")
+            responses = fetch_responses_from_db(args.survey_id)
+            print(f"✓ Retrieved {len(responses)} responses")
+
+            # Print summary
+            if responses:
+                print(f"\nFirst response fields: {list(responses[0].keys())}")
+                print(f"Total responses: {len(responses)}")
+            else:
+                print("No responses found in database")
         else:
-            print("No responses found in database")
-            
+            export_responses(args)
+
     except Exception as e:
         print(f"✗ Error: {e}")
         raise
@@ -19,6 +19,42 @@ if (!DATABASE_URL) {
   process.exit(1);
 }
 
+/**
+ * Split a SQL script into statements.
+ * Drops `--` comment lines and keeps `$$ ... $$` function bodies (which contain
+ * semicolons) together with their statement.
+ */
+function splitSqlStatements(script: string): string[] {
+  const withoutComments = script
+    .split('\n')
+    .filter((line) => !line.trim().startsWith('--'))
+    .join('\n');
+
+  const statements: string[] = [];
+  let current = '';
+  let inDollarQuote = false;
+
+  for (let i = 0; i < withoutComments.length; i++) {
+    if (withoutComments.startsWith('$$', i)) {
+      inDollarQuote = !inDollarQuote;
+      current += '$$';
+      i++;
+      continue;
+    }
+
+    const char = withoutComments[i];
+    if (char === ';' && !inDollarQuote) {
+      statements.push(current.trim());
+      current = '';
+    } else {
+      current += char;
+    }
+  }
+  statements.push(current.trim());
+
+  return statements.filter((s) => s.length > 0);
+}
+
 async function initDatabase() {
   const client = new pg.Client({ connectionString: DATABASE_URL });
   try {
@@ -29,10 +65,7 @@ async function initDatabase() {
     console.log('Step 1: Creating database tables...');
     const schemaPath = join(process.cwd(), 'database', 'schema.sql');
     const schema = readFileSync(schemaPath, 'utf-8');
-    const statements = schema
-      .split(';')
-      .map((s) => s.trim())
-      .filter((s) => s.length > 0 && !s.startsWith('--'));
+    const statements = splitSqlStatements(schema);
 
     for (const statement of statements) {
       const sql = statement + ';';
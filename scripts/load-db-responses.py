@@ -0,0 +1,307 @@
+"""
+Bulk loader for seeding a local database with large survey datasets
+
+Responses are read from a JSON array or JSON Lines file (gzip when the name
+ends in .gz) or generated with analytics.py's synthetic data generator, and
+written to the responses and answers tables with COPY ... FROM STDIN in
+batches. Response ids for the whole load are reserved from the sequence in a
+single step up front, so answers can reference their response without a
+round trip per row.
+
+    python scripts/load-db-responses.py --input responses.jsonl.gz
+    python scripts/load-db-responses.py --generate 1000000 --seed 3
+    python scripts/load-db-responses.py --generate 1000000 --defer-documents
+
+Answers are stored the way the app's submitResponse does: strings, numbers
+and null in answer_value, everything else as JSON in answer_data.
+"""
+
+import os
+import io
+import sys
+import gzip
+import json
+import time
+import argparse
+import itertools
+import psycopg2
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+env_file = Path(__file__).parent.parent / '.env'
+load_dotenv(env_file)
+
+# Response fields that are submission metadata rather than answers
+# (response_id is set on records exported from the database)
+METADATA_FIELDS = {'timestamp', 'submitted_at', 'response_id'}
+
+RESPONSES_COPY = "COPY responses (id, survey_id, submitted_at) FROM STDIN WITH (FORMAT csv)"
+ANSWERS_COPY = "COPY answers (response_id, question_id, answer_value, answer_data) FROM STDIN WITH (FORMAT csv)"
+
+# Same statement as the backfill in database/schema.sql, limited to the loaded ids
+REBUILD_DOCUMENTS = """
+    INSERT INTO response_documents (response_id, survey_id, submitted_at, document)
+    SELECT r.id, r.survey_id, r.submitted_at,
+           COALESCE(
+             jsonb_object_agg(a.question_id, jsonb_build_object('value', a.answer_value, 'data', a.answer_data))
+               FILTER (WHERE a.question_id IS NOT NULL),
+             '{}'::jsonb
+           )
+    FROM responses r
+    LEFT JOIN answers a ON a.response_id = r.id
+    WHERE r.id BETWEEN %(first_id)s AND %(last_id)s
+    GROUP BY r.id, r.survey_id, r.submitted_at
+    ON CONFLICT (response_id) DO UPDATE SET document = EXCLUDED.document
+"""
+
+def get_database_url():
+    """Get database URL from environment variables"""
+    db_url = os.environ.get('NETLIFY_DATABASE_URL')
+    if db_url:
+        return db_url
+
+    db_url = os.environ.get('DATABASE_URL')
+    if db_url:
+        return db_url
+
+    raise ValueError(
+        "No database URL found. Please set DATABASE_URL or NETLIFY_DATABASE_URL in .env file"
+    )
+
+# ============================================================================
+# INPUT
+# ============================================================================
+
+def load_analytics():
+    """Import analytics.py from the repository root"""
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    import analytics
+    return analytics
+
+def open_input(path):
+    """Open a JSON/JSONL input file as text (gzip when the name ends in .gz)"""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def is_json_lines(path):
+    """JSON Lines unless the file starts with a JSON array"""
+    with open_input(path) as f:
+        for line in f:
+            if line.strip():
+                return not line.lstrip().startswith('[')
+    return True
+
+def count_responses(path):
+    """Number of responses in the input, needed before ids can be reserved"""
+    if is_json_lines(path):
+        with open_input(path) as f:
+            return sum(1 for line in f if line.strip())
+    analytics = load_analytics()
+    with open_input(path) as f:
+        return sum(1 for _ in analytics.iter_json_array(f))
+
+def iter_file_responses(path):
+    """Yield responses from a JSON array or JSON Lines file"""
+    if is_json_lines(path):
+        with open_input(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        # Streamed element by element, so a large array is never held in memory
+        analytics = load_analytics()
+        with open_input(path) as f:
+            yield from analytics.iter_json_array(f)
+
+def iter_generated_responses(count, seed, block_size):
+    """Yield synthetic responses, generated one block at a time to bound memory"""
+    analytics = load_analytics()
+
+    for block, start in enumerate(range(0, count, block_size)):
+        yield from analytics.generate_synthetic_responses(min(block_size, count - start), seed=seed + block)
+
+# ============================================================================
+# COPY BATCHES
+# ============================================================================
+
+def csv_field(value):
+    """One CSV field for COPY: None is an unquoted empty field (NULL), everything else is quoted"""
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+def csv_row(values):
+    return ','.join(csv_field(value) for value in values) + '\n'
+
+def answer_columns(value):
+    """(answer_value, answer_data) for one answer, matching db.submitResponse"""
+    if value is None:
+        return '', None
+    if isinstance(value, str):
+        return value, None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # String(value) in JavaScript: whole floats have no trailing .0
+        return str(int(value)) if float(value).is_integer() else str(value), None
+    return None, json.dumps(value, ensure_ascii=False)
+
+def submitted_at(response, default):
+    """Submission time from the response, or default (the load's start time)"""
+    return response.get('submitted_at') or response.get('timestamp') or default
+
+def build_batch(responses, first_id, survey_id, default_time):
+    """COPY CSV buffers for a batch of responses numbered from first_id"""
+    response_rows = io.StringIO()
+    answer_rows = io.StringIO()
+    answers = 0
+
+    for response_id, response in enumerate(responses, start=first_id):
+        response_rows.write(csv_row([response_id, survey_id, submitted_at(response, default_time)]))
+        for question_id, value in response.items():
+            if question_id in METADATA_FIELDS:
+                continue
+            answer_rows.write(csv_row([response_id, question_id, *answer_columns(value)]))
+            answers += 1
+
+    response_rows.seek(0)
+    answer_rows.seek(0)
+    return response_rows, answer_rows, answers
+
+def copy_batch(conn, response_rows, answer_rows):
+    """COPY one batch into both tables and commit it"""
+    with conn.cursor() as cur:
+        cur.copy_expert(RESPONSES_COPY, response_rows)
+        cur.copy_expert(ANSWERS_COPY, answer_rows)
+    conn.commit()
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+def reserve_response_ids(conn, count):
+    """Reserve count consecutive response ids with one sequence update; returns the first id.
+
+    The table lock only lasts for this short transaction, so concurrent
+    inserts cannot take a value from the middle of the range.
+    """
+    with conn.cursor() as cur:
+        cur.execute("LOCK TABLE responses IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute("""
+            SELECT setval(seq, nextval(seq) + %(count)s - 1)
+            FROM pg_get_serial_sequence('responses', 'id') AS seq
+        """, {'count': count})
+        last_id = cur.fetchone()[0]
+    conn.commit()
+    return last_id - count + 1
+
+def rebuild_documents(conn, first_id, last_id):
+    """Build response_documents for the loaded ids in one set-based statement"""
+    started = time.time()
+    with conn.cursor() as cur:
+        cur.execute(REBUILD_DOCUMENTS, {'first_id': first_id, 'last_id': last_id})
+        rows = cur.rowcount
+    conn.commit()
+    print(f"✓ Rebuilt {rows:,} response documents in {time.time() - started:.1f}s")
+
+def load_responses(args):
+    """Load responses from --input or --generate into the database"""
+    if args.generate:
+        count = args.generate
+        responses = iter_generated_responses(count, args.seed, args.batch_size)
+        source = f"{count:,} generated responses (seed {args.seed})"
+    else:
+        print(f"Counting responses in {args.input}...")
+        count = count_responses(args.input)
+        responses = iter_file_responses(args.input)
+        source = f"{count:,} responses from {args.input}"
+
+    if count == 0:
+        print("No responses to load")
+        return
+
+    conn = psycopg2.connect(get_database_url())
+    try:
+        first_id = reserve_response_ids(conn, count)
+        with conn.cursor() as cur:
+            # Responses without a time get the database clock, as the column default would give them
+            cur.execute("SELECT NOW()::timestamp")
+            default_time = cur.fetchone()[0].isoformat()
+        last_id = first_id + count - 1
+        print(f"Loading {source} as response ids {first_id:,}-{last_id:,}")
+
+        if args.defer_documents:
+            # Skips the per-statement document triggers (and FK triggers); needs superuser
+            with conn.cursor() as cur:
+                cur.execute("SET session_replication_role = replica")
+
+        started = time.time()
+        last_report = started
+        loaded = 0
+        answers = 0
+        next_id = first_id
+
+        while True:
+            batch = list(itertools.islice(responses, args.batch_size))
+            if not batch:
+                break
+
+            response_rows, answer_rows, batch_answers = build_batch(batch, next_id, args.survey_id, default_time)
+            copy_batch(conn, response_rows, answer_rows)
+
+            next_id += len(batch)
+            loaded += len(batch)
+            answers += batch_answers
+
+            now = time.time()
+            if now - last_report >= args.progress_interval:
+                rate = loaded / (now - started)
+                print(f"  {loaded:,}/{count:,} responses, {answers:,} answers "
+                      f"({rate:,.0f} responses/s, {answers / (now - started):,.0f} answers/s)")
+                last_report = now
+
+        elapsed = max(time.time() - started, 1e-9)
+        if loaded != count:
+            print(f"⚠ Input changed while loading: expected {count:,} responses, loaded {loaded:,}")
+        print(f"✓ {loaded:,} responses and {answers:,} answers in {elapsed:.1f}s "
+              f"({loaded / elapsed:,.0f} responses/s, {(loaded + answers) / elapsed:,.0f} rows/s)")
+
+        if args.defer_documents:
+            with conn.cursor() as cur:
+                cur.execute("SET session_replication_role = DEFAULT")
+            rebuild_documents(conn, first_id, next_id - 1)
+
+        with conn.cursor() as cur:
+            # Fresh statistics so the analytics queries are planned for the new row counts
+            cur.execute("ANALYZE responses")
+            cur.execute("ANALYZE answers")
+            cur.execute("ANALYZE response_documents")
+        conn.commit()
+    finally:
+        conn.close()
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Bulk load survey responses into the database")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help="JSON array or JSON Lines file of responses (.gz allowed)")
+    source.add_argument('--generate', type=int, metavar='N',
+                        help="load N responses from analytics.py's synthetic data generator")
+    parser.add_argument('--seed', type=int, default=0, help="seed for --generate (default 0)")
+    parser.add_argument('--survey-id', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=10_000,
+                        help="responses per COPY batch and commit (default 10000)")
+    parser.add_argument('--progress-interval', type=float, default=2.0,
+                        help="seconds between progress lines")
+    parser.add_argument('--defer-documents', action='store_true',
+                        help="disable triggers while loading and rebuild response_documents afterwards "
+                             "(faster; needs superuser)")
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+    try:
+        load_responses(args)
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        raise